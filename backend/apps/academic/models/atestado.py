@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from apps.core.models import UUIDModel
 
@@ -31,6 +32,10 @@ class Atestado(UUIDModel):
             return False
 
         return self.criado_por == user
+
+    @classmethod
+    def owner_q(cls, user):
+        return Q(criado_por=user)
     
     class Meta:
         verbose_name = 'Atestado'
@@ -117,7 +117,7 @@ class AnoLetivoAdmin(admin.ModelAdmin):
             'fields': ('dias_letivos_extras', 'dias_nao_letivos')
         }),
         ('Controles JSON', {
-            'fields': ('controles', 'datas_liberadas_aulas_faltas'),
+            'fields': ('controles',),
             'classes': ('collapse',)
         }),
     )
@@ -139,8 +139,8 @@ class HorarioAulaAdmin(admin.ModelAdmin):
 
 @admin.register(GradeHorariaValidade)
 class GradeHorariaValidadeAdmin(admin.ModelAdmin):
-    list_display = ('ano_letivo', 'turma_numero', 'turma_letra', 'data_inicio', 'data_fim')
-    list_filter = ('ano_letivo',)
+    list_display = ('ano_letivo', 'turma_numero', 'turma_letra', 'data_inicio', 'data_fim', 'rascunho')
+    list_filter = ('ano_letivo', 'rascunho')
     search_fields = ('turma_numero', 'turma_letra')
 
 @admin.register(GradeHoraria)
@@ -0,0 +1,96 @@
+"""
+Management Command para gerar automaticamente a grade horária de um ano letivo.
+Grava o resultado como rascunho (GradeHorariaValidade.rascunho), que é revisado
+e publicado pelo editor de grade.
+
+Uso:
+    python manage.py gerar_grade_horaria --ano 2026
+    python manage.py gerar_grade_horaria --ano 2026 --grupo 1A --grupo 2B --tempo 20 --processos 4
+"""
+import re
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Gera a grade horária (rascunho) dos grupos de turmas de um ano letivo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ano', type=int, required=True, help='Ano letivo.')
+        parser.add_argument(
+            '--inicio',
+            help='Início da validade (AAAA-MM-DD). Padrão: início do 1º bimestre.',
+        )
+        parser.add_argument(
+            '--fim',
+            help='Fim da validade (AAAA-MM-DD). Padrão: fim do 4º bimestre.',
+        )
+        parser.add_argument(
+            '--grupo', action='append', default=[],
+            help='Grupo de turmas a gerar (ex.: 1A). Pode ser repetido. Padrão: todos.',
+        )
+        parser.add_argument('--tempo', type=float, default=10, help='Tempo de busca em segundos (padrão: 10).')
+        parser.add_argument('--processos', type=int, default=1, help='Tentativas em paralelo (padrão: 1).')
+        parser.add_argument('--semente', type=int, help='Semente aleatória (para repetir um resultado).')
+        parser.add_argument('--simular', action='store_true', help='Não grava o rascunho.')
+
+    def handle(self, *args, **options):
+        from apps.core.models import AnoLetivo
+        from apps.core.services.gerador_grade_service import GeradorGradeService
+
+        try:
+            ano_letivo = AnoLetivo.objects.get(ano=options['ano'])
+        except AnoLetivo.DoesNotExist:
+            raise CommandError(f"Ano letivo {options['ano']} não encontrado.")
+
+        try:
+            data_inicio = date.fromisoformat(options['inicio']) if options['inicio'] else ano_letivo.data_inicio_1bim
+            data_fim = date.fromisoformat(options['fim']) if options['fim'] else ano_letivo.data_fim_4bim
+        except ValueError:
+            raise CommandError('Data inválida. Use o formato AAAA-MM-DD.')
+        if not data_inicio or not data_fim or data_inicio > data_fim:
+            raise CommandError('Informe uma validade válida (--inicio/--fim).')
+
+        grupos = None
+        if options['grupo']:
+            grupos = []
+            for grupo in options['grupo']:
+                encontrado = re.fullmatch(r'(\d+)([A-Za-z])', grupo.strip())
+                if not encontrado:
+                    raise CommandError(f'Grupo inválido: {grupo}. Use numero e letra (ex.: 1A).')
+                grupos.append((int(encontrado.group(1)), encontrado.group(2).upper()))
+
+        self.stdout.write(self.style.NOTICE(
+            f"Gerando grade horária de {options['ano']} ({data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y})..."
+        ))
+
+        relatorio = GeradorGradeService.gerar(
+            options['ano'], data_inicio, data_fim,
+            grupos=grupos,
+            tempo_limite=options['tempo'],
+            processos=options['processos'],
+            semente=options['semente'],
+            salvar=not options['simular'],
+        )
+
+        for aviso in relatorio['sem_professor']:
+            self.stdout.write(self.style.WARNING(f'Sem professor disponível: {aviso}'))
+        for aviso in relatorio['sem_espaco']:
+            self.stdout.write(self.style.WARNING(f'Aulas além dos horários do grupo (não alocadas): {aviso}'))
+
+        resumo = (
+            f"{relatorio['grupos']} grupo(s), {relatorio['aulas']} aula(s), "
+            f"{relatorio['choques']} choque(s) de professor, "
+            f"{relatorio['espalhamento']} aula(s) acima do limite diário, "
+            f"semente {relatorio['semente']}, {relatorio['tempo']}s"
+        )
+        if relatorio['choques']:
+            self.stdout.write(self.style.WARNING(f'Grade com choques: {resumo}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Grade gerada: {resumo}'))
+
+        if not options['simular']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Rascunhos gravados: {relatorio['validades']} validade(s). Revise e publique no editor de grade."
+            ))
@@ -0,0 +1,32 @@
+"""
+Management Command para reconstrução dos caches de grade horária.
+Reconstrói Turma/Funcionario.grade_horaria por ano letivo (ex.: para converter
+caches no formato antigo para a linha do tempo 'periodos', ou após cargas
+feitas sem passar pelos signals).
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os caches de grade horária (turmas e professores) de um ou mais anos letivos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano', type=int, action='append', default=[],
+            help='Ano letivo a reconstruir. Pode ser repetido. Padrão: todos.',
+        )
+
+    def handle(self, *args, **options):
+        from apps.core.models import AnoLetivo
+        from apps.core.services.grade_horaria_service import GradeHorariaService
+
+        anos = options['ano'] or list(AnoLetivo.objects.order_by('ano').values_list('ano', flat=True))
+        self.stdout.write(self.style.NOTICE(
+            f"Reconstruindo grades horárias ({', '.join(map(str, anos)) or 'nenhum ano letivo'})..."
+        ))
+
+        resultado = GradeHorariaService.reconstruir(anos=anos)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Grades reconstruídas: {resultado['turmas']} turma(s), {resultado['professores']} professor(es)"
+        ))
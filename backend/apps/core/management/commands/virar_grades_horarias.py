@@ -0,0 +1,36 @@
+"""
+Management Command para a virada de vigência das grades horárias.
+Atualiza o período vigente dos caches (Turma/Funcionario.grade_horaria) cuja
+vigência terminou, sem reconstruí-los. Deve rodar diariamente (ex.: cron à 00:05).
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Atualiza o período vigente das grades horárias em cache cuja vigência terminou.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data',
+            help='Data de referência (AAAA-MM-DD). Padrão: hoje.',
+        )
+
+    def handle(self, *args, **options):
+        from apps.core.services.grade_horaria_service import GradeHorariaService
+
+        data = None
+        if options['data']:
+            try:
+                data = date.fromisoformat(options['data'])
+            except ValueError:
+                raise CommandError('Data inválida. Use o formato AAAA-MM-DD.')
+
+        self.stdout.write(self.style.NOTICE('Verificando vigências das grades horárias...'))
+
+        resultado = GradeHorariaService.virar_vigencias(data)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Grades atualizadas: {resultado['turmas']} turma(s), {resultado['professores']} professor(es)"
+        ))
@@ -0,0 +1,22 @@
+"""
+Middlewares do Core.
+"""
+from apps.core.services.ano_letivo_service import AnoLetivoService
+
+
+class AnoLetivoRequestMiddleware:
+    """
+    Abre o escopo de memoização do ano letivo para cada requisição.
+
+    Com ele, User.get_ano_letivo_selecionado() executa no máximo uma query por
+    usuário durante a requisição, independente de quantas views, serializers
+    e mixins o chamem. Funciona também com autenticação JWT (DRF), pois o
+    cache é indexado pelo id do usuário e não pela sessão.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with AnoLetivoService.escopo_requisicao():
+            return self.get_response(request)
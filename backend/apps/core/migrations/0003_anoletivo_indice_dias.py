@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-16 10:12
+
+from datetime import date
+
+from django.db import migrations
+
+
+def preencher_indice_dias(apps, schema_editor):
+    """Gera controles['indice_dias'] para anos letivos já existentes."""
+    AnoLetivo = apps.get_model('core', 'AnoLetivo')
+
+    for ano_letivo in AnoLetivo.objects.all():
+        controles = ano_letivo.controles or {}
+        mapa = ['0'] * date(ano_letivo.ano, 12, 31).timetuple().tm_yday
+        for bim_key in ('1', '2', '3', '4'):
+            for dia in controles.get(bim_key, {}).get('dias_letivos_base', []):
+                d = date.fromisoformat(dia)
+                if d.year == ano_letivo.ano:
+                    mapa[d.timetuple().tm_yday - 1] = bim_key
+        controles['indice_dias'] = {'ano': ano_letivo.ano, 'mapa': ''.join(mapa)}
+        ano_letivo.controles = controles
+        ano_letivo.save(update_fields=['controles'])
+
+
+def remover_indice_dias(apps, schema_editor):
+    AnoLetivo = apps.get_model('core', 'AnoLetivo')
+
+    for ano_letivo in AnoLetivo.objects.all():
+        controles = ano_letivo.controles or {}
+        if controles.pop('indice_dias', None) is not None:
+            ano_letivo.controles = controles
+            ano_letivo.save(update_fields=['controles'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_indice_dias, remover_indice_dias),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_anoletivo_indice_dias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gradehorariavalidade',
+            name='rascunho',
+            field=models.BooleanField(default=False, verbose_name='Rascunho'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_gradehorariavalidade_rascunho'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anoletivo',
+            name='versao_cache',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Versão do Cache'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-17 14:40
+
+from django.db import migrations
+
+
+TIPOS = ('AULA', 'NOTA', 'BOLETIM')
+
+
+def preencher_liberacoes(apps, schema_editor):
+    """Gera controles['indice_dias']['liberacoes'] para anos letivos já existentes."""
+    AnoLetivo = apps.get_model('core', 'AnoLetivo')
+
+    for ano_letivo in AnoLetivo.objects.all():
+        controles = ano_letivo.controles or {}
+        indice = controles.get('indice_dias')
+        if not indice:
+            continue
+
+        liberacoes = {}
+        for bim_key in ('1', '2', '3', '4', '5'):
+            for tipo in TIPOS:
+                controle = controles.get(bim_key, {}).get(tipo)
+                if controle:
+                    liberacoes.setdefault(tipo, {})[bim_key] = [
+                        controle.get('data_liberada_inicio'),
+                        controle.get('data_liberada_fim'),
+                        controle.get('digitacao_futura', True),
+                    ]
+        indice['liberacoes'] = liberacoes
+        ano_letivo.controles = controles
+        ano_letivo.save(update_fields=['controles'])
+
+
+def remover_liberacoes(apps, schema_editor):
+    AnoLetivo = apps.get_model('core', 'AnoLetivo')
+
+    for ano_letivo in AnoLetivo.objects.all():
+        indice = (ano_letivo.controles or {}).get('indice_dias') or {}
+        if indice.pop('liberacoes', None) is not None:
+            ano_letivo.save(update_fields=['controles'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_anoletivo_versao_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_liberacoes, remover_liberacoes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_anoletivo_indice_liberacoes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anoletivo',
+            name='versao_grade',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Versão da Grade Horária'),
+        ),
+    ]
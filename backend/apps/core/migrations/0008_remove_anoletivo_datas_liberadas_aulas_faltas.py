@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 16:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_anoletivo_versao_grade'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='anoletivo',
+            name='datas_liberadas_aulas_faltas',
+        ),
+    ]
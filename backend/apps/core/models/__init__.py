@@ -1,4 +1,4 @@
-from .base import UUIDModel
+from .base import UUIDModel, OwnerQuerySet
 from .funcionario import Funcionario, PeriodoTrabalho
 from .disciplina import Disciplina
 from .curso import Curso
@@ -11,7 +11,7 @@ from .files import Arquivo
 from .indicadores_bimestre import IndicadorBimestre, IndicadorBimestreAnoLetivo
 
 __all__ = [
-    'UUIDModel', 'Funcionario', 'PeriodoTrabalho', 'Disciplina', 
+    'UUIDModel', 'OwnerQuerySet', 'Funcionario', 'PeriodoTrabalho', 'Disciplina', 
     'Curso', 'Turma', 'DisciplinaTurma', 'ProfessorDisciplinaTurma', 'Habilidade', 
     'DiaLetivoExtra', 'DiaNaoLetivo', 'AnoLetivo', 'ControleRegistrosVisualizacao',
     'HorarioAula', 'GradeHorariaValidade', 'GradeHoraria', 'AnoLetivoSelecionado',
@@ -1,19 +1,65 @@
 import uuid
 from django.db import models
+from django.db.models import BooleanField, Case, Q, Value, When
+
+
+class OwnerQuerySet(models.QuerySet):
+    """QuerySet com anotação de ownership (ver UUIDModel.owner_q)."""
+
+    def annotate_is_owner(self, user):
+        """
+        Anota is_owner_anotado (bool) em cada registro, resolvendo o ownership
+        de toda a página na mesma SQL da listagem. Usado por Policy (OWNER) e
+        pelos serializers via UUIDModel.verificar_owner.
+        """
+        if not user or user.is_anonymous or not user.is_active:
+            expressao = Value(False)
+        else:
+            expressao = Case(
+                When(self.model.owner_q(user), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        return self.annotate(**{UUIDModel.OWNER_ANOTACAO: expressao})
+
 
 class UUIDModel(models.Model):
     """Classe base para usar UUID como chave primária."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
+    # Nome da anotação criada por OwnerQuerySet.annotate_is_owner
+    OWNER_ANOTACAO = 'is_owner_anotado'
+
+    objects = OwnerQuerySet.as_manager()
+
     def is_owner(self, user) -> bool:
         """
         Verifica se o usuário é o 'dono' deste registro.
-        
+
         Retorna False por padrão. Sobrescreva este método nos models
         que possuem lógica de ownership (ex: PlanoAula, Avaliacao).
         """
         return False
 
+    @classmethod
+    def owner_q(cls, user):
+        """
+        Equivalente de is_owner em SQL: Q que filtra os registros cujo dono é o
+        usuário (autenticado e ativo). Sobrescreva junto com is_owner.
+
+        Retorna um Q que não seleciona nenhum registro por padrão.
+        """
+        return Q(pk__in=[])
+
+    def verificar_owner(self, user) -> bool:
+        """
+        is_owner usando o valor anotado por annotate_is_owner(user), quando o
+        registro veio de um queryset anotado; caso contrário, is_owner(user).
+        """
+        anotado = getattr(self, self.OWNER_ANOTACAO, None)
+        if anotado is not None:
+            return anotado
+        return self.is_owner(user)
+
     class Meta:
         abstract = True
-
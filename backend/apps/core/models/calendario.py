@@ -1,10 +1,12 @@
-from datetime import date, timedelta
+from datetime import date
 from django.db import models
-from django.db.models.signals import m2m_changed, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from .base import UUIDModel
+from apps.core.services.ano_letivo_service import AnoLetivoService
+from apps.core.services.calendario_service import CalendarioLetivo, CalendarioService
 
 class DiaLetivoExtra(UUIDModel):
     """Dia letivo extra. Sábado, Domingo ou feriado que se torna letivo."""
@@ -64,6 +66,33 @@ AVALIACAO_CONFIG_PADRAO = {
 }
 
 
+# -----------------------------------------------------------------------------
+# Índice de Dias Letivos (controles['indice_dias'])
+# -----------------------------------------------------------------------------
+# Mapa compacto dia-do-ano -> bimestre: uma string com um caractere por dia
+# do ano ('0' = não letivo, '1'..'4' = bimestre do dia letivo). Permite
+# resolver o bimestre e "é dia letivo?" em O(1), sem varrer listas de datas.
+# Gerado por CalendarioLetivo.para_indice; CalendarioLetivo.do_indice recria
+# o calendário vetorizado a partir dele.
+
+def consultar_indice_dias(indice, data):
+    """
+    Retorna o bimestre (1-4) do dia letivo informado, ou None se não for letivo.
+
+    Args:
+        indice: controles['indice_dias']
+        data: date ou string ISO 'YYYY-MM-DD'
+    """
+    if isinstance(data, str):
+        try:
+            data = date.fromisoformat(data)
+        except ValueError:
+            return None
+    if data.year != indice['ano']:
+        return None
+    return int(indice['mapa'][data.timetuple().tm_yday - 1]) or None
+
+
 class AnoLetivo(UUIDModel):
     """Ano letivo escolar."""
     ano = models.PositiveSmallIntegerField(unique=True, verbose_name='Ano')
@@ -88,12 +117,14 @@ class AnoLetivo(UUIDModel):
         verbose_name='Controles'
     )
 
-    datas_liberadas_aulas_faltas = models.JSONField(
-        default=dict,
-        blank=True,
-        null=True,
-        verbose_name='Cache de Datas Liberadas (Aulas/Faltas)'
-    )
+    # Versão dos dados derivados em cache (controles, datas liberadas, índice
+    # de dias). Trocada a cada invalidação; os workers a releem do banco a cada
+    # ANO_LETIVO_VERSAO_TTL segundos (ver AnoLetivoService._versao).
+    versao_cache = models.BigIntegerField(default=0, editable=False, verbose_name='Versão do Cache')
+
+    # Versão dos dados do editor de grade em cache, trocada a cada reconstrução
+    # da grade do ano (ver GradeHorariaService.obter_dados_edicao).
+    versao_grade = models.BigIntegerField(default=0, editable=False, verbose_name='Versão da Grade Horária')
 
     def bimestre(self, data=None):
         if data is None:
@@ -121,44 +152,52 @@ class AnoLetivo(UUIDModel):
 
     def get_dias_letivos(self, data=None) -> list[date]:
         """
-        Retorna os dias letivos do bimestre acessando diretamente o cache JSON (Busca Direta).
+        Retorna os dias letivos do bimestre da data (calendário vetorizado).
         """
         num_bimestre = self.bimestre(data)
         if not num_bimestre:
             return []
-        
-        # Acessa o cache dentro do JSONField 'controles'
-        bim_data = self.controles.get(str(num_bimestre), {})
-        cache = bim_data.get('dias_letivos_base', [])
-        
-        return [date.fromisoformat(d) for d in cache]
 
-    def _calcular_dias_letivos_bimestre(self, num_bimestre, feriados_ano=None, extras_ano=None):
-        """Lógica interna para calcular e retornar os dias letivos em formato ISO string."""
-        inicio = getattr(self, f'data_inicio_{num_bimestre}bim')
-        fim = getattr(self, f'data_fim_{num_bimestre}bim')
-        
-        if not inicio or not fim:
-            return []
+        return self.calendario.dias_bimestre(num_bimestre).tolist()
 
-        if feriados_ano is None:
-            feriados_ano = set(self.dias_nao_letivos.filter(data__range=(inicio, fim)).values_list('data', flat=True))
-        else:
-            feriados_ano = {d for d in feriados_ano if inicio <= d <= fim}
-            
-        if extras_ano is None:
-            extras_ano = set(self.dias_letivos_extras.filter(data__range=(inicio, fim)).values_list('data', flat=True))
-        else:
-            extras_ano = {d for d in extras_ano if inicio <= d <= fim}
+    @property
+    def calendario(self):
+        """
+        CalendarioLetivo do ano: consultas vetorizadas de dias letivos
+        (bimestre, eh_dia_letivo, contar, n_esimo, dias_bimestre).
 
-        dias_uteis = {
-            (inicio + timedelta(n))
-            for n in range((fim - inicio).days + 1)
-            if (inicio + timedelta(n)).weekday() < 5
+        Recriado sem queries de controles['indice_dias'] (memorizado por
+        conteúdo); sem índice (controles antigos), calculado do banco.
+        """
+        indice = (self.controles or {}).get('indice_dias')
+        if indice:
+            return CalendarioLetivo.do_indice(indice)
+        return self._construir_calendario()
+
+    def _construir_calendario(self):
+        """Calcula o calendário a partir dos bimestres, feriados e dias extras (2 queries)."""
+        bimestres = {
+            n: (getattr(self, f'data_inicio_{n}bim'), getattr(self, f'data_fim_{n}bim'))
+            for n in range(1, 5)
         }
+        datas_validas = [d for periodo in bimestres.values() for d in periodo if d]
+
+        feriados_ano = []
+        extras_ano = []
+        if datas_validas and self.pk:
+            inicio_ano, fim_ano = min(datas_validas), max(datas_validas)
+            feriados_ano = list(self.dias_nao_letivos.filter(data__range=(inicio_ano, fim_ano)).values_list('data', flat=True))
+            extras_ano = list(self.dias_letivos_extras.filter(data__range=(inicio_ano, fim_ano)).values_list('data', flat=True))
+
+        return CalendarioLetivo.construir(self.ano, bimestres, feriados_ano, extras_ano)
 
-        dias = sorted(list((dias_uteis - feriados_ano) | extras_ano))
-        return [d.isoformat() for d in dias]
+    def bimestre_dia_letivo(self, data):
+        """Retorna o bimestre (1-4) se a data for dia letivo, senão None. O(1)."""
+        return self.calendario.bimestre(data) or None
+
+    def eh_dia_letivo(self, data) -> bool:
+        """Retorna True se a data for dia letivo em algum bimestre. O(1)."""
+        return self.bimestre_dia_letivo(data) is not None
 
     def clean(self):
         bimestres = [
@@ -226,6 +265,13 @@ class AnoLetivo(UUIDModel):
 
     def save(self, *args, **kwargs):
         is_new = self._state.adding
+        if not is_new and kwargs.get('update_fields') is None:
+            # As versões de cache só mudam por update() no banco: o save() de
+            # uma instância carregada antes da troca não pode voltá-las
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in ('versao_cache', 'versao_grade')
+            ]
         super().save(*args, **kwargs)
         if is_new:
             self._criar_controles_iniciais()
@@ -258,30 +304,19 @@ class AnoLetivo(UUIDModel):
         )
     
     def atualizar_controles_json(self):
+        # Em CalendarioService.lote(): recalculado uma vez ao final do bloco
+        if CalendarioService.adiar(self, 'controles'):
+            return
+
         controles_db = ControleRegistrosVisualizacao.objects.filter(ano_letivo=self)
         novo_controles = {}
+        liberacoes = {}
         
-        # Otimização: Busca feriados e extras uma única vez para o intervalo total do ano
-        datas_referencia = [
-            self.data_inicio_1bim, self.data_fim_1bim,
-            self.data_inicio_2bim, self.data_fim_2bim,
-            self.data_inicio_3bim, self.data_fim_3bim,
-            self.data_inicio_4bim, self.data_fim_4bim
-        ]
-        datas_validas = [d for d in datas_referencia if d]
-        
-        feriados_ano = set()
-        extras_ano = set()
-        if datas_validas:
-            inicio_ano, fim_ano = min(datas_validas), max(datas_validas)
-            feriados_ano = set(self.dias_nao_letivos.filter(data__range=(inicio_ano, fim_ano)).values_list('data', flat=True))
-            extras_ano = set(self.dias_letivos_extras.filter(data__range=(inicio_ano, fim_ano)).values_list('data', flat=True))
+        # Calendário do ano (feriados e extras buscados uma única vez)
+        calendario = self._construir_calendario()
 
         # Pré-calcula os dias letivos de todos os bimestres para usar no JSON
-        dias_por_bimestre = {
-            str(n): self._calcular_dias_letivos_bimestre(n, feriados_ano, extras_ano)
-            for n in range(1, 5)
-        }
+        dias_por_bimestre = {str(n): calendario.dias_iso(n) for n in range(1, 5)}
 
         for controle in controles_db:
             bim_key = str(controle.bimestre)
@@ -301,12 +336,19 @@ class AnoLetivo(UUIDModel):
                 c_data['dias_letivos'] = dias_por_bimestre.get(bim_key, [])
                 
             novo_controles[bim_key][controle.tipo] = c_data
+            liberacoes.setdefault(controle.tipo, {})[bim_key] = [
+                c_data['data_liberada_inicio'], c_data['data_liberada_fim'], controle.digitacao_futura
+            ]
             
         # Garante que mesmo bimestres sem controles tenham seus dias letivos base no JSON
         for bim_key, dias in dias_por_bimestre.items():
             if bim_key not in novo_controles:
                 novo_controles[bim_key] = {'dias_letivos_base': dias}
 
+        # Índice O(1): data -> bimestre (mapa do calendário, ver CalendarioLetivo)
+        # e (tipo, bimestre) -> janela de liberação [inicio, fim, digitacao_futura]
+        novo_controles['indice_dias'] = {**calendario.para_indice(), 'liberacoes': liberacoes}
+
         # Configurações de avaliação: preserva existente ou cria com valores padrão
         novo_controles['avaliacao'] = (
             self.controles.get('avaliacao', AVALIACAO_CONFIG_PADRAO.copy())
@@ -315,6 +357,7 @@ class AnoLetivo(UUIDModel):
 
         AnoLetivo.objects.filter(pk=self.pk).update(controles=novo_controles)
         self.controles = novo_controles
+        AnoLetivoService.invalidar()
         self.invalidar_cache_datas_liberadas()
 
     def sincronizar_configuracoes_disciplinas_turmas(self):
@@ -322,6 +365,9 @@ class AnoLetivo(UUIDModel):
         Sincroniza as configurações de avaliação de todas as disciplinas/turmas deste ano letivo
         sempre que a configuração global do Ano Letivo é alterada.
         """
+        if CalendarioService.adiar(self, 'sincronizar'):
+            return
+
         from apps.evaluation.models import AvaliacaoConfigDisciplinaTurma
         
         config_av = self.controles.get('avaliacao', {})
@@ -353,27 +399,20 @@ class AnoLetivo(UUIDModel):
         Centraliza a lógica de validação de datas para todo o sistema.
         """
         from django.core.exceptions import ValidationError
-        from datetime import timedelta
         
         # 1. O bimestre deve existir para a data_inicio
-        if not self.bimestre(data_inicio):
+        bimestre_inicio = self.bimestre(data_inicio)
+        if not bimestre_inicio:
             raise ValidationError(
                 f"A data {data_inicio.strftime('%d/%m/%Y')} não pertence a nenhum bimestre no ano {self.ano}."
             )
         
-        # 2. Verificar se existe pelo menos um dia letivo no intervalo [data_inicio, data_fim]
+        # 2. Verificar se existe pelo menos um dia letivo do bimestre da data_inicio
+        # no intervalo [data_inicio, data_fim] (contagem O(1) no calendário)
         fim_check = data_fim if data_fim else data_inicio
+        fim_bimestre = min(fim_check, getattr(self, f'data_fim_{bimestre_inicio}bim'))
         
-        # Otimização: busca O(1) com set
-        dias_letivos_set = set(self.get_dias_letivos(data_inicio))
-        
-        def datas_no_intervalo():
-            curr = data_inicio
-            while curr <= fim_check:
-                yield curr
-                curr += timedelta(days=1)
-        
-        if not any(d in dias_letivos_set for d in datas_no_intervalo()):
+        if self.calendario.contar(data_inicio, fim_bimestre) == 0:
             if data_inicio == fim_check:
                 msg = f"A data {data_inicio.strftime('%d/%m/%Y')} não é um dia letivo."
             else:
@@ -381,8 +420,8 @@ class AnoLetivo(UUIDModel):
             raise ValidationError(msg)
 
     def invalidar_cache_datas_liberadas(self):
-        AnoLetivo.objects.filter(pk=self.pk).update(datas_liberadas_aulas_faltas=None)
-        self.datas_liberadas_aulas_faltas = None
+        """Invalida controles/datas liberadas deste ano no cache compartilhado."""
+        self.versao_cache = AnoLetivoService.invalidar_cache_ano(self.ano)
 
     class Meta:
         verbose_name = 'Ano Letivo'
@@ -507,3 +546,10 @@ def sync_related_ano_letivo_on_save(sender, instance, **kwargs):
     
     for ano in anos:
         ano.atualizar_controles_json()
+
+
+@receiver(post_save, sender=AnoLetivo)
+@receiver(post_delete, sender=AnoLetivo)
+def invalidar_cache_ano_letivo(sender, instance, **kwargs):
+    """Invalida o cache do ano ativo/selecionado quando um Ano Letivo muda."""
+    AnoLetivoService.invalidar()
@@ -6,6 +6,7 @@ import re
 import uuid
 from datetime import date
 from django.db import models
+from django.db.models import Q
 from .base import UUIDModel
 
 
@@ -157,6 +158,10 @@ class Arquivo(UUIDModel):
             return False
 
         return self.criado_por == user
+
+    @classmethod
+    def owner_q(cls, user):
+        return Q(criado_por=user)
     
     class Meta:
         verbose_name = 'Arquivo'
@@ -1,6 +1,5 @@
 from django.db import models
 from django.conf import settings
-from django.utils import timezone
 from django.core.exceptions import ValidationError
 from .base import UUIDModel
 from ..validators import validate_cpf
@@ -81,135 +80,39 @@ class Funcionario(UUIDModel):
             return f"{self.usuario.get_full_name()} - {self.area_atuacao}"
         return self.usuario.get_full_name()
 
-    def build_grade_horaria(self, save=True):
+    def build_grade_horaria(self, save=True, ano=None):
         """
         Constrói e atualiza o cache da grade horária do professor.
+
+        O cache é indexado pelo ano letivo: {'<ano>': grade}. Sem ano, constrói
+        todos os anos em que o professor tem atribuições.
+        Para vários professores, use GradeHorariaService.construir_ano.
         """
         from .turma import ProfessorDisciplinaTurma
-        from .grade_horaria import HorarioAula, GradeHoraria, GradeHorariaValidade
-        
-        hoje = timezone.now().date()
-        
-        # Busca o ano letivo selecionado do usuário vinculado
-        ano_letivo_obj = self.usuario.get_ano_letivo_selecionado()
-        
-        if not ano_letivo_obj:
-            self.grade_horaria = None
-            if save:
-                self.save(update_fields=['grade_horaria'])
-            return None
-        
-        ano_referencia = ano_letivo_obj.ano
-        
-        # Busca atribuições ativas do professor para verificar disciplinas e turmas
-        atribuicoes = ProfessorDisciplinaTurma.objects.filter(
-            professor=self,
-            disciplina_turma__turma__ano_letivo=ano_referencia
-        ).filter(
-            models.Q(data_fim__isnull=True) | models.Q(data_fim__gte=hoje)
-        ).select_related('disciplina_turma', 'disciplina_turma__turma', 'disciplina_turma__disciplina')
-
-        if not atribuicoes.exists():
-            # Estrutura vazia
-            self.grade_horaria = {
-                'ano_letivo': ano_referencia,
-                'matriz': {},
-                'horarios': {},
-                'aulas': [],
-                'gerado_em': timezone.now().isoformat()
-            }
-            if save:
-                 self.save(update_fields=['grade_horaria'])
-            return self.grade_horaria
-
-        matriz = {}
-        horarios = {}
-        aulas_list = []
-        
-        # Precisamos dos horários de aula para montar a legenda
-        todos_horarios = HorarioAula.objects.filter(ano_letivo=ano_letivo_obj)
-        horarios_map = {h.id: h for h in todos_horarios}
+        from apps.core.services.grade_horaria_service import GradeHorariaService
 
-        for h in todos_horarios:
-            if str(h.numero) not in horarios:
-                horarios[str(h.numero)] = {
-                    'hora_inicio': h.hora_inicio.strftime('%H:%M'),
-                    'hora_fim': h.hora_fim.strftime('%H:%M')
-                }
+        if ano is not None:
+            anos = [ano]
+        else:
+            anos = sorted(set(
+                ProfessorDisciplinaTurma.objects.filter(
+                    professor=self
+                ).values_list('disciplina_turma__turma__ano_letivo', flat=True)
+            ))
 
-        for atribuicao in atribuicoes:
-            turma = atribuicao.disciplina_turma.turma
-            disciplina = atribuicao.disciplina_turma.disciplina
-            
-            # Busca validade vigente para esta turma (agora por numero/letra)
-            validade = GradeHorariaValidade.objects.filter(
-                ano_letivo__ano=turma.ano_letivo,
-                turma_numero=turma.numero,
-                turma_letra=turma.letra,
-                data_inicio__lte=hoje,
-                data_fim__gte=hoje
-            ).first()
-
-            if not validade:
-                continue
-
-            # Busca itens da grade para esta DISCIPLINA nesta VALIDADE
-            itens_grade = GradeHoraria.objects.filter(
-                validade=validade,
-                disciplina=disciplina
+        cache = self.grade_horaria
+        if not isinstance(cache, dict) or 'matriz' in cache:
+            cache = {}
+        for ano_referencia in anos:
+            resultado = GradeHorariaService.construir_ano(
+                ano_referencia, turma_ids=[], professor_ids=[self.pk], salvar=False
             )
+            cache[str(ano_referencia)] = resultado['professores'][self.pk]
 
-            for item in itens_grade:
-                # Recupera horário do map (evita query extra)
-                horario_aula = horarios_map.get(item.horario_aula_id)
-                if not horario_aula:
-                    continue
-
-                num_key = str(horario_aula.numero)
-                dia_key = str(horario_aula.dia_semana)
-
-                if num_key not in matriz:
-                    matriz[num_key] = {}
-                
-                celula_existente = matriz[num_key].get(dia_key)
-                
-                texto_turma = turma.sigla
-                
-                if celula_existente:
-                     if texto_turma not in celula_existente['turma_sigla']:
-                        celula_existente['turma_sigla'] += f", {texto_turma}"
-                        celula_existente['turma_id'] = None
-                else:
-                    matriz[num_key][dia_key] = {
-                        'disciplina_nome': disciplina.nome,
-                        'disciplina_sigla': disciplina.sigla,
-                        'turma_sigla': texto_turma,
-                        'turma_label': f"{turma.numero}{turma.letra}",
-                        'curso_sigla': turma.curso.sigla,
-                        'turma_id': str(turma.id),
-                        'sala': ''
-                    }
-                
-                aulas_list.append({
-                    'dia_semana': horario_aula.dia_semana,
-                    'numero_aula': horario_aula.numero,
-                    'hora_inicio': horario_aula.hora_inicio.strftime('%H:%M'),
-                    'hora_fim': horario_aula.hora_fim.strftime('%H:%M'),
-                    'disciplina': disciplina.nome,
-                    'turma': turma.nome_completo
-                })
-
-        self.grade_horaria = {
-            'ano_letivo': ano_referencia,
-            'matriz': matriz,
-            'horarios': horarios,
-            'aulas': aulas_list,
-            'gerado_em': timezone.now().isoformat()
-        }
-        
+        self.grade_horaria = cache
         if save:
             self.save(update_fields=['grade_horaria'])
-        
+
         return self.grade_horaria
 
 
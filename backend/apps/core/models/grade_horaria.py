@@ -4,6 +4,7 @@ from .base import UUIDModel
 from .calendario import AnoLetivo
 from .disciplina import Disciplina
 from .curso import Curso
+from apps.core.services.grade_horaria_service import GradeHorariaService
 
 class HorarioAula(UUIDModel):
     """Horário de aula de referência (grades horárias)."""
@@ -66,22 +67,18 @@ class HorarioAula(UUIDModel):
         self._rebuild_all_caches()
 
     def _rebuild_all_caches(self):
-        from .turma import Turma, ProfessorDisciplinaTurma
-        from .funcionario import Funcionario
-        
-        for t in Turma.objects.filter(ano_letivo=self.ano_letivo.ano):
-            t.build_grade_horaria(save=True)
-            
-        professores_ids = ProfessorDisciplinaTurma.objects.filter(
-            disciplina_turma__turma__ano_letivo=self.ano_letivo.ano
-        ).values_list('professor_id', flat=True).distinct()
-        
-        for p in Funcionario.objects.filter(id__in=professores_ids):
-            p.build_grade_horaria(save=True)
+        # Todas as turmas e professores do ano (reconstruídos uma vez, após o commit)
+        GradeHorariaService.agendar(anos=[self.ano_letivo.ano])
 
 
 class GradeHorariaValidade(UUIDModel):
-    """Grade horária com validade."""
+    """
+    Grade horária com validade.
+
+    Rascunhos (ex.: gerados por GeradorGradeService) não valem para nenhuma
+    data: ficam fora dos caches de grade e da checagem de sobreposição até
+    serem publicados pelo editor.
+    """
     ano_letivo = models.ForeignKey(
         AnoLetivo,
         on_delete=models.CASCADE,
@@ -93,6 +90,7 @@ class GradeHorariaValidade(UUIDModel):
     
     data_inicio = models.DateField(verbose_name='Data de início')
     data_fim = models.DateField(verbose_name='Data de fim')
+    rascunho = models.BooleanField(default=False, verbose_name='Rascunho')
 
     class Meta:
         verbose_name = 'Vigência de Grade Horária'
@@ -103,8 +101,12 @@ class GradeHorariaValidade(UUIDModel):
         if self.data_inicio and self.data_fim:
             if self.data_inicio > self.data_fim:
                 raise ValidationError('A data de início deve ser menor ou igual à data de fim.')
-            
+
+            if self.rascunho:
+                return
+
             sobreposicoes = GradeHorariaValidade.objects.filter(
+                rascunho=False,
                 ano_letivo=self.ano_letivo,
                 turma_numero=self.turma_numero,
                 turma_letra=self.turma_letra,
@@ -118,26 +120,27 @@ class GradeHorariaValidade(UUIDModel):
                 raise ValidationError('Já existe uma vigência de grade horária para este período e grupo de turmas.')
 
     def __str__(self):
-        return f"{self.turma_numero}{self.turma_letra} ({self.data_inicio.strftime('%d/%m')} a {self.data_fim.strftime('%d/%m')})"
+        rotulo = f"{self.turma_numero}{self.turma_letra} ({self.data_inicio.strftime('%d/%m')} a {self.data_fim.strftime('%d/%m')})"
+        return f"{rotulo} - rascunho" if self.rascunho else rotulo
 
     def save(self, *args, **kwargs):
         self.clean()
         super().save(*args, **kwargs)
         self._rebuild_turmas()
+        # Datas liberadas dependem das validades (datas com grade vigente)
+        self.ano_letivo.invalidar_cache_datas_liberadas()
 
     def delete(self, *args, **kwargs):
         super().delete(*args, **kwargs)
         self._rebuild_turmas()
+        self.ano_letivo.invalidar_cache_datas_liberadas()
         
     def _rebuild_turmas(self):
-        from .turma import Turma
-        turmas = Turma.objects.filter(
-            ano_letivo=self.ano_letivo.ano,
-            numero=self.turma_numero,
-            letra=self.turma_letra
+        # Turmas do grupo e seus professores (a grade do professor também
+        # depende da validade vigente)
+        GradeHorariaService.agendar(
+            grupos=[(self.ano_letivo.ano, self.turma_numero, self.turma_letra)]
         )
-        for t in turmas:
-            t.build_grade_horaria(save=True)
 
 
 class GradeHoraria(UUIDModel):
@@ -221,26 +224,12 @@ class GradeHoraria(UUIDModel):
         self._rebuild_afetados()
 
     def _rebuild_afetados(self):
-        from .turma import Turma, ProfessorDisciplinaTurma
         if not self.validade:
             return
-            
-        turmas = Turma.objects.filter(
-            ano_letivo=self.validade.ano_letivo.ano,
-            numero=self.validade.turma_numero,
-            letra=self.validade.turma_letra
-        )
-        for t in turmas:
-            t.build_grade_horaria(save=True)
-            
-        pdts = ProfessorDisciplinaTurma.objects.filter(
-            disciplina_turma__turma__in=turmas,
-            disciplina_turma__disciplina=self.disciplina
-        ).select_related('professor')
         
-        professores = set(pdt.professor for pdt in pdts)
-        for p in professores:
-            p.build_grade_horaria(save=True)
+        GradeHorariaService.agendar(
+            grupos=[(self.validade.ano_letivo.ano, self.validade.turma_numero, self.validade.turma_letra)]
+        )
 
     def __str__(self):
         return f"{self.validade} - {self.horario_aula} - {self.disciplina.sigla}"
@@ -1,7 +1,9 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from .base import UUIDModel
 from .calendario import AnoLetivo
+from apps.core.services.ano_letivo_service import AnoLetivoService
 
 class AnoLetivoSelecionado(UUIDModel):
     """Ano letivo selecionado pelo usuário para visualização de dados."""
@@ -22,6 +24,10 @@ class AnoLetivoSelecionado(UUIDModel):
         """Verifica se o usuário é o dono desta seleção."""
         return self.usuario == user
 
+    @classmethod
+    def owner_q(cls, user):
+        return Q(usuario=user)
+
     class Meta:
         verbose_name = 'Ano Letivo Selecionado'
         verbose_name_plural = 'Anos Letivos Selecionados'
@@ -31,11 +37,9 @@ class AnoLetivoSelecionado(UUIDModel):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        if hasattr(self.usuario, 'funcionario'):
-            self.usuario.funcionario.build_grade_horaria(save=True)
+        AnoLetivoService.invalidar(usuario_id=self.usuario_id)
 
     def delete(self, *args, **kwargs):
         usuario = self.usuario
         super().delete(*args, **kwargs)
-        if hasattr(usuario, 'funcionario'):
-            usuario.funcionario.build_grade_horaria(save=True)
+        AnoLetivoService.invalidar(usuario_id=usuario.pk)
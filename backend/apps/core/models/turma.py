@@ -1,5 +1,4 @@
 from django.db import models
-from django.utils import timezone
 from .base import UUIDModel
 from .funcionario import Funcionario
 from .curso import Curso
@@ -83,125 +82,32 @@ class Turma(UUIDModel):
         from .calendario import AnoLetivo
         return AnoLetivo.objects.get(ano=self.ano_letivo)
 
+    def save(self, *args, **kwargs):
+        from apps.core.services.grade_horaria_service import GradeHorariaService
+        super().save(*args, **kwargs)
+        # Nome, curso e situação da turma aparecem nas grades e no editor do grupo
+        if kwargs.get('update_fields') != ['grade_horaria']:
+            GradeHorariaService.agendar(grupos=[(self.ano_letivo, self.numero, self.letra)])
+
+    def delete(self, *args, **kwargs):
+        from apps.core.services.grade_horaria_service import GradeHorariaService
+        grupo = (self.ano_letivo, self.numero, self.letra)
+        super().delete(*args, **kwargs)
+        GradeHorariaService.agendar(grupos=[grupo])
+
     def build_grade_horaria(self, save=True):
         """
         Constrói e atualiza o cache da grade horária da turma.
+        Para várias turmas, use GradeHorariaService.construir_ano.
         """
-        from .grade_horaria import GradeHorariaValidade, GradeHoraria
-        
-        hoje = timezone.now().date()
-        
-        # Busca a validade vigente para esta turma (por numero/letra)
-        validade = GradeHorariaValidade.objects.filter(
-            ano_letivo__ano=self.ano_letivo,
-            turma_numero=self.numero,
-            turma_letra=self.letra,
-            data_inicio__lte=hoje,
-            data_fim__gte=hoje
-        ).first()
-        
-        if not validade:
-            self.grade_horaria = None
-            if save:
-                self.save(update_fields=['grade_horaria'])
-            return None
-        
-        # Busca os itens da grade dessa validade
-        grades = GradeHoraria.objects.filter(
-            validade=validade
-        ).select_related(
-            'horario_aula',
-            'disciplina'
-        ).order_by('horario_aula__dia_semana', 'horario_aula__hora_inicio')
-        
-        # Busca disciplinas VINCLULADAS a esta turma específica
-        disciplinas_turma_ids = set(
-            DisciplinaTurma.objects.filter(turma=self).values_list('disciplina_id', flat=True)
-        )
+        from apps.core.services.grade_horaria_service import GradeHorariaService
 
-        grades_filtradas = [g for g in grades if g.disciplina_id in disciplinas_turma_ids]
-        
-        if not grades_filtradas:
-            self.grade_horaria = {
-                'ano_letivo': self.ano_letivo,
-                'validade': validade.data_fim.isoformat(),
-                'matriz': {},
-                'horarios': {},
-                'gerado_em': timezone.now().isoformat()
-            }
-            if save:
-                self.save(update_fields=['grade_horaria'])
-            return self.grade_horaria
-        
-        # Busca os professores das disciplinas desta turma
-        professores_map = {}
-        disciplinas_turma = DisciplinaTurma.objects.filter(
-            turma=self
-        ).prefetch_related('professores__professor')
-        
-        for dt in disciplinas_turma:
-            professor_ativo = dt.professores.filter(
-                models.Q(data_fim__isnull=True) | models.Q(data_fim__gte=hoje)
-            ).order_by(
-                models.Case(
-                    models.When(tipo='TITULAR', then=0),
-                    models.When(tipo='SUBSTITUTO', then=1),
-                    models.When(tipo='AUXILIAR', then=2),
-                    default=3,
-                    output_field=models.IntegerField()
-                )
-            ).first()
-            
-            if professor_ativo:
-                professores_map[dt.disciplina_id] = professor_ativo.professor.get_apelido()
-            else:
-                professores_map[dt.disciplina_id] = None
-        
-        matriz = {}
-        horarios = {}
-        
-        for g in grades_filtradas:
-            numero = g.horario_aula.numero
-            dia = g.horario_aula.dia_semana
-            num_key = str(numero)
-            dia_key = str(dia)
-            
-            if num_key not in matriz:
-                matriz[num_key] = {}
-            
-            matriz[num_key][dia_key] = {
-                'disciplina_id': str(g.disciplina.id),
-                'disciplina_nome': g.disciplina.nome,
-                'disciplina_sigla': g.disciplina.sigla,
-                'curso_sigla': g.curso.sigla if g.curso else '',
-                'professor_apelido': professores_map.get(g.disciplina_id)
-            }
-            
-            if num_key not in horarios:
-                horarios[num_key] = {
-                    'hora_inicio': g.horario_aula.hora_inicio.strftime('%H:%M'),
-                    'hora_fim': g.horario_aula.hora_fim.strftime('%H:%M')
-                }
-        
-        self.grade_horaria = {
-            'ano_letivo': self.ano_letivo,
-            'validade': validade.data_fim.isoformat(),
-            'matriz': matriz,
-            'horarios': horarios,
-            'cursos_turmas': { 
-                 str(t.id): {'curso_sigla': t.curso.sigla, 'turma_nome': t.nome} 
-                 for t in Turma.objects.filter(
-                    ano_letivo=self.ano_letivo,
-                    numero=self.numero,
-                    letra=self.letra
-                 ).select_related('curso')
-            },
-            'gerado_em': timezone.now().isoformat()
-        }
-        
+        resultado = GradeHorariaService.construir_ano(
+            self.ano_letivo, turma_ids=[self.pk], professor_ids=[], salvar=False
+        )
+        self.grade_horaria = resultado['turmas'].get(self.pk)
         if save:
             self.save(update_fields=['grade_horaria'])
-        
         return self.grade_horaria
 
 
@@ -229,13 +135,15 @@ class DisciplinaTurma(UUIDModel):
         return f"{self.disciplina.sigla} - {self.turma} ({self.aulas_semanais} aulas/sem)"
 
     def save(self, *args, **kwargs):
+        from apps.core.services.grade_horaria_service import GradeHorariaService
         super().save(*args, **kwargs)
-        self.turma.build_grade_horaria(save=True)
+        GradeHorariaService.agendar(turmas=[self.turma_id])
 
     def delete(self, *args, **kwargs):
-        turma = self.turma
+        from apps.core.services.grade_horaria_service import GradeHorariaService
+        turma_id = self.turma_id
         super().delete(*args, **kwargs)
-        turma.build_grade_horaria(save=True)
+        GradeHorariaService.agendar(turmas=[turma_id])
 
 
 class ProfessorDisciplinaTurma(UUIDModel):
@@ -283,10 +191,13 @@ class ProfessorDisciplinaTurma(UUIDModel):
         return f"{self.professor.usuario.get_full_name()} ({tipo}) - {self.disciplina_turma}"
 
     def save(self, *args, **kwargs):
+        from apps.core.services.grade_horaria_service import GradeHorariaService
         is_new = self._state.adding
         super().save(*args, **kwargs)
-        self.professor.build_grade_horaria(save=True)
-        self.disciplina_turma.turma.build_grade_horaria(save=True)
+        GradeHorariaService.agendar(
+            turmas=[self.disciplina_turma.turma_id],
+            professores=[self.professor_id]
+        )
         
         if is_new:
             self._criar_configuracao_avaliacao_professor()
@@ -310,8 +221,8 @@ class ProfessorDisciplinaTurma(UUIDModel):
             pass
 
     def delete(self, *args, **kwargs):
-        professor = self.professor
-        turma = self.disciplina_turma.turma
+        from apps.core.services.grade_horaria_service import GradeHorariaService
+        professor_id = self.professor_id
+        turma_id = self.disciplina_turma.turma_id
         super().delete(*args, **kwargs)
-        professor.build_grade_horaria(save=True)
-        turma.build_grade_horaria(save=True)
+        GradeHorariaService.agendar(turmas=[turma_id], professores=[professor_id])
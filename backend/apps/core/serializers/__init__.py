@@ -20,7 +20,8 @@ from .professor_disciplina_turma import ProfessorDisciplinaTurmaSerializer
 from .calendario import (
     AnoLetivoSerializer, 
     DiaLetivoExtraSerializer, 
-    DiaNaoLetivoSerializer
+    DiaNaoLetivoSerializer,
+    CalendarioLoteSerializer
 )
 from .habilidade import HabilidadeSerializer
 from .horario_aula import HorarioAulaSerializer
@@ -48,6 +49,7 @@ __all__ = [
     'AnoLetivoSerializer',
     'DiaLetivoExtraSerializer',
     'DiaNaoLetivoSerializer',
+    'CalendarioLoteSerializer',
     'HabilidadeSerializer',
     'HorarioAulaSerializer',
     'GradeHorariaSerializer',
@@ -106,3 +106,59 @@ class AnoLetivoSerializer(serializers.ModelSerializer):
              raise drf_serializers.ValidationError({"non_field_errors": [str(e)]})
 
         return data
+
+
+class DiaNaoLetivoLoteSerializer(serializers.Serializer):
+    data = serializers.DateField()
+    tipo = serializers.ChoiceField(choices=DiaNaoLetivo.Tipo.choices)
+    descricao = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+
+class DiaLetivoExtraLoteSerializer(serializers.Serializer):
+    data = serializers.DateField()
+    descricao = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+
+class CalendarioLoteSerializer(serializers.Serializer):
+    """
+    Alterações em lote no calendário de um ano letivo (ver CalendarioService.aplicar_lote).
+    Espera o ano letivo em context['ano_letivo'].
+    """
+    CAMPOS_BIMESTRES = [
+        'data_inicio_1bim', 'data_fim_1bim',
+        'data_inicio_2bim', 'data_fim_2bim',
+        'data_inicio_3bim', 'data_fim_3bim',
+        'data_inicio_4bim', 'data_fim_4bim',
+    ]
+
+    data_inicio_1bim = serializers.DateField(required=False, allow_null=True)
+    data_fim_1bim = serializers.DateField(required=False, allow_null=True)
+    data_inicio_2bim = serializers.DateField(required=False, allow_null=True)
+    data_fim_2bim = serializers.DateField(required=False, allow_null=True)
+    data_inicio_3bim = serializers.DateField(required=False, allow_null=True)
+    data_fim_3bim = serializers.DateField(required=False, allow_null=True)
+    data_inicio_4bim = serializers.DateField(required=False, allow_null=True)
+    data_fim_4bim = serializers.DateField(required=False, allow_null=True)
+
+    dias_nao_letivos = DiaNaoLetivoLoteSerializer(many=True, required=False, default=list)
+    dias_letivos_extras = DiaLetivoExtraLoteSerializer(many=True, required=False, default=list)
+    remover_dias_nao_letivos = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    remover_dias_letivos_extras = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+
+    def validate(self, data):
+        ano = self.context['ano_letivo'].ano
+        erros = {}
+
+        for campo in ('dias_nao_letivos', 'dias_letivos_extras'):
+            datas = [item['data'] for item in data[campo]]
+            fora_do_ano = sorted({d for d in datas if d.year != ano})
+            if fora_do_ano:
+                erros[campo] = [f"Datas fora do ano letivo {ano}: {', '.join(d.strftime('%d/%m/%Y') for d in fora_do_ano)}."]
+            elif len(datas) != len(set(datas)):
+                erros[campo] = ['Há datas repetidas na lista.']
+
+        if erros:
+            raise serializers.ValidationError(erros)
+
+        data['bimestres'] = {campo: data.pop(campo) for campo in self.CAMPOS_BIMESTRES if campo in data}
+        return data
@@ -18,12 +18,15 @@ class GradeHorariaEdicaoSerializer(serializers.Serializer):
     - turma_id (para identificar o grupo de turmas)
     - validade_id (opcional, se for edição de validade existente)
     - data_inicio / data_fim
+    - rascunho (opcional; ausente mantém o estado da validade existente,
+      e uma validade nova é publicada)
     - grades: Lista de itens { horario_aula, disciplina }
     """
     turma_id = serializers.UUIDField()
     validade_id = serializers.UUIDField(required=False, allow_null=True)
     data_inicio = serializers.DateField()
     data_fim = serializers.DateField()
+    rascunho = serializers.BooleanField(required=False)
     grades = serializers.ListField(
         child=serializers.DictField(
             child=serializers.UUIDField() # horario_aula: uuid, disciplina: uuid
@@ -73,4 +76,4 @@ class GradeHorariaValidadeSerializer(serializers.ModelSerializer):
     """Serializer para listar validades existentes."""
     class Meta:
         model = GradeHorariaValidade
-        fields = ['id', 'data_inicio', 'data_fim', 'turma_numero', 'turma_letra']
+        fields = ['id', 'data_inicio', 'data_fim', 'turma_numero', 'turma_letra', 'rascunho']
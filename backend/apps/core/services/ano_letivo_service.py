@@ -0,0 +1,284 @@
+"""
+Resolução do Ano Letivo selecionado/ativo com cache.
+
+Praticamente toda requisição da API resolve o ano letivo do usuário
+(AnoLetivoFilterMixin, serializers, actions, build_grade_horaria...).
+Este módulo evita que isso vire várias queries por requisição:
+
+- Escopo de requisição: o ano letivo de cada usuário (e o ano ativo, fallback
+  de quem não tem seleção) é carregado uma única vez (já com o JSON de
+  controles) e reaproveitado até o fim da requisição. Nada disso fica em
+  memória entre requisições. O escopo é aberto pelo AnoLetivoRequestMiddleware.
+- Cache compartilhado (Django cache framework): controles e dados derivados
+  (ex.: datas liberadas) ficam em chaves versionadas por ano. A versão é a
+  coluna AnoLetivo.versao_cache, guardada em memória por ANO_LETIVO_VERSAO_TTL
+  segundos: leituras quentes não tocam o banco, e os outros workers enxergam
+  a invalidação commitada em no máximo esse tempo, com LocMem (cache por
+  processo) ou memcached/Redis (ver CACHES). O worker que invalida a enxerga
+  na hora. Invalidar = trocar a versão do ano; as chaves antigas expiram sozinhas.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+# {usuario_id | _ATIVO: AnoLetivo | None} da requisição corrente (None = fora de requisição)
+_escopo_requisicao = ContextVar('ano_letivo_escopo_requisicao', default=None)
+
+# Chave do ano ativo no escopo de requisição
+_ATIVO = object()
+
+# {ano: versão do cache} usadas na requisição corrente (None = fora de requisição)
+_versoes_requisicao = ContextVar('ano_letivo_versoes_requisicao', default=None)
+
+# Versões lidas do banco neste processo: {ano: (versao, expira_em)}
+_versoes_processo = {}
+
+# Atraso máximo para um worker enxergar a invalidação feita por outro
+ANO_LETIVO_VERSAO_TTL = getattr(settings, 'ANO_LETIVO_VERSAO_TTL', 5)
+
+# Índices de dias letivos já desserializados neste processo: {ano: (versao, indice)}
+_indices_processo = {}
+
+# Cache compartilhado (alias em CACHES) e validade padrão das chaves versionadas
+ANO_LETIVO_CACHE_ALIAS = getattr(settings, 'ANO_LETIVO_CACHE_ALIAS', 'default')
+ANO_LETIVO_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class AnoLetivoService:
+    """
+    Serviço centralizado para obter o ano letivo ativo/selecionado e os
+    dados derivados do ano letivo mantidos em cache.
+    """
+
+    @staticmethod
+    @contextmanager
+    def escopo_requisicao():
+        """
+        Abre o escopo de memoização de uma requisição.
+
+        Uso:
+            with AnoLetivoService.escopo_requisicao():
+                response = get_response(request)
+        """
+        token = _escopo_requisicao.set({})
+        token_versoes = _versoes_requisicao.set({})
+        try:
+            yield
+        finally:
+            _versoes_requisicao.reset(token_versoes)
+            _escopo_requisicao.reset(token)
+
+    @staticmethod
+    def obter_ano_ativo():
+        """
+        Retorna o AnoLetivo ativo (is_active=True) ou None.
+
+        Queries: 1, memorizada na requisição (0 se já lido na requisição).
+        """
+        from apps.core.models import AnoLetivo
+
+        escopo = _escopo_requisicao.get()
+        if escopo is not None and _ATIVO in escopo:
+            return escopo[_ATIVO]
+
+        ano_letivo = AnoLetivo.objects.filter(is_active=True).first()
+
+        if escopo is not None:
+            escopo[_ATIVO] = ano_letivo
+        return ano_letivo
+
+    @staticmethod
+    def obter_selecionado(usuario):
+        """
+        Retorna o AnoLetivo selecionado pelo usuário (ou o ativo, se não houver
+        seleção). Dentro de uma requisição, resolve no máximo uma vez por usuário.
+
+        Queries: 1 (seleção + ano letivo via select_related), mais 1 para o ano
+        ativo quando não há seleção (ver obter_ano_ativo). 0 se já resolvido na requisição.
+        """
+        from apps.core.models import AnoLetivoSelecionado
+
+        escopo = _escopo_requisicao.get()
+        if escopo is not None and usuario.pk in escopo:
+            return escopo[usuario.pk]
+
+        selecionado = AnoLetivoSelecionado.objects.select_related('ano_letivo').filter(
+            usuario_id=usuario.pk
+        ).first()
+        ano_letivo = selecionado.ano_letivo if selecionado else AnoLetivoService.obter_ano_ativo()
+
+        if escopo is not None:
+            escopo[usuario.pk] = ano_letivo
+        return ano_letivo
+
+    @staticmethod
+    def invalidar(usuario_id=None):
+        """
+        Invalida os caches após alterações.
+
+        Args:
+            usuario_id: Se informado, invalida apenas a seleção desse usuário
+                (AnoLetivoSelecionado). Caso contrário invalida tudo (AnoLetivo).
+        """
+        escopo = _escopo_requisicao.get()
+        if escopo is None:
+            return
+        if usuario_id is not None:
+            escopo.pop(usuario_id, None)
+        else:
+            escopo.clear()
+
+    # -------------------------------------------------------------------------
+    # Cache compartilhado versionado por ano
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _versao(ano):
+        """
+        Retorna a versão atual do cache do ano (pk + AnoLetivo.versao_cache).
+
+        Lida do banco, e não do próprio cache, para que a invalidação feita
+        por um worker valha para todos (com LocMem cada worker tem o seu
+        cache). O pk na versão evita reaproveitar chaves de um banco recriado.
+
+        Guardada no processo por ANO_LETIVO_VERSAO_TTL segundos (só após o
+        commit, para não espalhar uma versão que ainda pode ser desfeita) e
+        fixa dentro da requisição.
+
+        Queries: 0 com a versão em memória; 1 por ano a cada TTL.
+        """
+        from apps.core.models import AnoLetivo
+
+        versoes = _versoes_requisicao.get()
+        if versoes is not None and ano in versoes:
+            return versoes[ano]
+
+        agora = time.monotonic()
+        memo = _versoes_processo.get(ano)
+        if memo is not None and memo[1] > agora:
+            versao = memo[0]
+        else:
+            linha = AnoLetivo.objects.filter(ano=ano).values_list('pk', 'versao_cache').first()
+            versao = f'{linha[0].hex}.{linha[1]}' if linha else 'inexistente'
+
+            def guardar():
+                _versoes_processo[ano] = (versao, agora + ANO_LETIVO_VERSAO_TTL)
+
+            transaction.on_commit(guardar)
+
+        if versoes is not None:
+            versoes[ano] = versao
+        return versao
+
+    @staticmethod
+    def obter_do_cache(ano, nome, calcular, timeout=ANO_LETIVO_CACHE_TIMEOUT):
+        """
+        Lê um valor derivado do ano letivo do cache compartilhado, calculando
+        e gravando em caso de ausência.
+
+        Args:
+            ano: Ano (int) do AnoLetivo
+            nome: Nome da chave (ex.: 'controles', 'datas_liberadas:2026-03-02')
+            calcular: Função sem argumentos que produz o valor (serializável)
+            timeout: Validade em segundos
+
+        Returns:
+            O valor em cache ou recém-calculado.
+        """
+        cache = caches[ANO_LETIVO_CACHE_ALIAS]
+        chave = f'anoletivo:{ano}:v{AnoLetivoService._versao(ano)}:{nome}'
+
+        valor = cache.get(chave)
+        if valor is None:
+            valor = calcular()
+            cache.set(chave, valor, timeout)
+        return valor
+
+    @staticmethod
+    def obter_controles(ano):
+        """
+        Retorna AnoLetivo.controles do ano informado sem carregar a linha inteira.
+
+        Queries: 0 com cache quente; 1 (apenas a coluna controles) no miss.
+        """
+        from apps.core.models import AnoLetivo
+
+        return AnoLetivoService.obter_do_cache(
+            ano,
+            'controles',
+            lambda: AnoLetivo.objects.filter(ano=ano).values_list('controles', flat=True).first() or {},
+        )
+
+    @staticmethod
+    def obter_indice_dias(ano):
+        """
+        Retorna controles['indice_dias'] do ano (ver CalendarioLetivo.para_indice),
+        carregado uma vez por processo e versão do cache.
+
+        Custo por chamada com índice carregado: a versão, em memória (ver _versao).
+        """
+        versao = AnoLetivoService._versao(ano)
+
+        memo = _indices_processo.get(ano)
+        if memo is not None and memo[0] == versao:
+            return memo[1]
+
+        indice = AnoLetivoService.obter_controles(ano).get('indice_dias')
+        _indices_processo[ano] = (versao, indice)
+        return indice
+
+    @staticmethod
+    def obter_calendario(ano):
+        """
+        Retorna o CalendarioLetivo do ano (consultas vetorizadas de dias
+        letivos), recriado do índice de dias sem queries com cache quente.
+        None se o ano não tiver índice.
+        """
+        from apps.core.services.calendario_service import CalendarioLetivo
+
+        indice = AnoLetivoService.obter_indice_dias(ano)
+        return CalendarioLetivo.do_indice(indice) if indice else None
+
+    @staticmethod
+    def obter_calendario_anos(anos):
+        """
+        CalendarioLetivo único cobrindo vários anos (relatórios plurianuais).
+        Anos sem índice ficam sem dias letivos.
+        """
+        from apps.core.services.calendario_service import CalendarioLetivo
+
+        calendarios = [AnoLetivoService.obter_calendario(ano) for ano in sorted(set(anos))]
+        return CalendarioLetivo.unir([c for c in calendarios if c is not None])
+
+    @staticmethod
+    def invalidar_cache_ano(ano):
+        """
+        Invalida todas as chaves do ano no cache compartilhado (troca a versão).
+        Chamado por AnoLetivo.atualizar_controles_json / invalidar_cache_datas_liberadas.
+
+        A nova versão é gravada na transação corrente: os outros workers passam
+        a usá-la no commit. É única (relógio), então chaves calculadas aqui a
+        partir de um estado que for desfeito nunca voltam a ser lidas.
+
+        Returns:
+            int: Nova versão
+        """
+        from apps.core.models import AnoLetivo
+
+        versao = time.time_ns()
+        AnoLetivo.objects.filter(ano=ano).update(versao_cache=versao)
+
+        versoes = _versoes_requisicao.get()
+        if versoes is not None:
+            versoes.pop(ano, None)
+
+        # Este processo relê a versão já (na transação, a nova) e de novo após
+        # o commit; os demais workers, ao fim do TTL
+        _versoes_processo.pop(ano, None)
+        transaction.on_commit(lambda: _versoes_processo.pop(ano, None))
+        return versao
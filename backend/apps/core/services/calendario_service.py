@@ -0,0 +1,330 @@
+"""
+Calendário letivo vetorizado (NumPy).
+
+Os dias letivos são definidos por numpy.busdaycalendar (segunda a sexta,
+feriados de DiaNaoLetivo) mais os dias de DiaLetivoExtra, recortados pelos
+bimestres do ano letivo. O resultado fica em um mapa dia -> bimestre
+(0 = não letivo) e na sua soma acumulada, de modo que as consultas abaixo
+aceitam uma data ou um array de datas e custam O(1) por data:
+
+- bimestre / eh_dia_letivo: bimestre do dia letivo (0 se não letivo)
+- contar: dias letivos entre duas datas (inclusive)
+- n_esimo: n-ésimo dia letivo (do início ou a partir de uma data)
+- dias_bimestre: dias letivos de um bimestre
+
+O mapa é o mesmo de controles['indice_dias'] (AnoLetivo.atualizar_controles_json),
+então o calendário de um ano é recriado sem queries a partir dos controles.
+Calendários de vários anos podem ser unidos (CalendarioLetivo.unir) para
+relatórios que atravessam anos.
+
+Edição em lote (CalendarioService): cada save de DiaNaoLetivo/DiaLetivoExtra,
+vínculo m2m ou save de AnoLetivo recalcula AnoLetivo.controles via signals.
+Dentro de CalendarioService.lote() esses recálculos são adiados e feitos uma
+única vez por ano letivo afetado, ao final do bloco.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+from django.db import transaction
+
+
+# Recálculos adiados dentro de CalendarioService.lote(): {ano_letivo_pk: {operações}}
+# (None = fora de lote)
+_lote = ContextVar('calendario_lote', default=None)
+
+
+def _dias(datas):
+    """Converte date, string ISO, datetime64 ou sequências deles em datetime64[D]."""
+    if isinstance(datas, (list, tuple)):
+        datas = [d.isoformat() if isinstance(d, date) else d for d in datas]
+    elif isinstance(datas, date):
+        datas = datas.isoformat()
+    return np.asarray(datas, dtype='datetime64[D]')
+
+
+def _saida(valor, escalar):
+    """Devolve escalar Python para entrada escalar, array para entrada vetorial."""
+    return valor.item() if escalar else valor
+
+
+class CalendarioLetivo:
+    """
+    Calendário de dias letivos de um ou mais anos consecutivos.
+
+    Args:
+        inicio: Primeiro dia coberto (datetime64[D])
+        mapa: np.uint8 com o bimestre de cada dia a partir de inicio (0 = não letivo)
+    """
+
+    def __init__(self, inicio, mapa):
+        self.inicio = np.datetime64(inicio, 'D')
+        self.mapa = mapa
+        # acumulado[i] = dias letivos antes do dia i
+        self.acumulado = np.concatenate(([0], np.cumsum(mapa > 0)))
+        self.dias = self.inicio + np.flatnonzero(mapa)
+
+    @classmethod
+    def construir(cls, ano, bimestres, feriados=(), extras=()):
+        """
+        Constrói o calendário do ano a partir das datas dos bimestres.
+
+        Args:
+            ano: Ano (int)
+            bimestres: {numero: (data_inicio, data_fim)} (datas None são ignoradas)
+            feriados: Datas de DiaNaoLetivo
+            extras: Datas de DiaLetivoExtra (prevalecem sobre feriados)
+        """
+        dias_ano = np.arange(f'{ano}-01-01', f'{ano + 1}-01-01', dtype='datetime64[D]')
+        extras = _dias(sorted(extras)) if extras else np.array([], dtype='datetime64[D]')
+        feriados = _dias(sorted(feriados)) if feriados else np.array([], dtype='datetime64[D]')
+
+        calendario = np.busdaycalendar(weekmask='1111100', holidays=np.setdiff1d(feriados, extras))
+        letivo = np.is_busday(dias_ano, busdaycal=calendario) | np.isin(dias_ano, extras)
+
+        mapa = np.zeros(len(dias_ano), dtype=np.uint8)
+        for numero, (inicio, fim) in bimestres.items():
+            if not inicio or not fim:
+                continue
+            i = max(int((_dias(inicio) - dias_ano[0]).astype(int)), 0)
+            f = min(int((_dias(fim) - dias_ano[0]).astype(int)), len(dias_ano) - 1)
+            if i <= f:
+                mapa[i:f + 1] = np.where(letivo[i:f + 1], int(numero), 0)
+        return cls(dias_ano[0], mapa)
+
+    @classmethod
+    def do_indice(cls, indice):
+        """Calendário a partir de controles['indice_dias'] (sem queries; memorizado)."""
+        return _calendario_do_mapa(indice['ano'], indice['mapa'])
+
+    @classmethod
+    def unir(cls, calendarios):
+        """Une calendários de anos diferentes em um só (dias entre eles: não letivos)."""
+        calendarios = sorted(calendarios, key=lambda c: c.inicio)
+        if not calendarios:
+            return cls(np.datetime64('1970-01-01'), np.zeros(0, dtype=np.uint8))
+
+        fim = max(c.inicio + len(c.mapa) for c in calendarios)
+        inicio = calendarios[0].inicio
+        mapa = np.zeros(int((fim - inicio).astype(int)), dtype=np.uint8)
+        for calendario in calendarios:
+            i = int((calendario.inicio - inicio).astype(int))
+            mapa[i:i + len(calendario.mapa)] = calendario.mapa
+        return cls(inicio, mapa)
+
+    def para_indice(self):
+        """Formato de controles['indice_dias'] (um caractere por dia)."""
+        return {
+            'ano': int(str(self.inicio)[:4]),
+            'mapa': (self.mapa + ord('0')).astype(np.uint8).tobytes().decode('ascii'),
+        }
+
+    # -------------------------------------------------------------------------
+    # Consultas (aceitam data única ou array de datas)
+    # -------------------------------------------------------------------------
+
+    def _posicoes(self, datas):
+        dias = _dias(datas)
+        return dias, (dias - self.inicio).astype(np.int64)
+
+    def bimestre(self, datas):
+        """Bimestre (1-4) de cada dia letivo; 0 para dias não letivos."""
+        dias, posicoes = self._posicoes(datas)
+        dentro = (posicoes >= 0) & (posicoes < len(self.mapa))
+        valor = np.zeros(dias.shape, dtype=np.uint8)
+        valor[dentro] = self.mapa[posicoes[dentro]]
+        return _saida(valor, dias.ndim == 0)
+
+    def eh_dia_letivo(self, datas):
+        """True para cada data que é dia letivo."""
+        return self.bimestre(datas) > 0
+
+    def contar(self, inicio, fim):
+        """Dias letivos entre inicio e fim (inclusive). Aceita arrays (pareados)."""
+        dias_inicio, posicoes_inicio = self._posicoes(inicio)
+        _, posicoes_fim = self._posicoes(fim)
+        total = len(self.mapa)
+        contagem = (
+            self.acumulado[np.clip(posicoes_fim + 1, 0, total)]
+            - self.acumulado[np.clip(posicoes_inicio, 0, total)]
+        )
+        return _saida(np.maximum(contagem, 0), dias_inicio.ndim == 0 and np.ndim(posicoes_fim) == 0)
+
+    def n_esimo(self, n, a_partir=None):
+        """
+        n-ésimo dia letivo (n >= 1), contando do início do calendário ou a
+        partir de uma data (inclusive). Retorna None (NaT em arrays) se não houver.
+        """
+        n = np.asarray(n, dtype=np.int64)
+        base = 0 if a_partir is None else np.searchsorted(self.dias, _dias(a_partir), side='left')
+        posicoes = base + n - 1
+        validas = (posicoes >= 0) & (posicoes < len(self.dias)) & (n >= 1)
+        if np.ndim(posicoes) == 0:
+            return self.dias[int(posicoes)].item() if validas else None
+        resultado = np.full(posicoes.shape, np.datetime64('NaT'), dtype='datetime64[D]')
+        resultado[validas] = self.dias[posicoes[validas]]
+        return resultado
+
+    def dias_bimestre(self, numero):
+        """Dias letivos do bimestre (datetime64[D], em ordem)."""
+        return self.inicio + np.flatnonzero(self.mapa == numero)
+
+    def dias_iso(self, numero):
+        """Dias letivos do bimestre como strings ISO (formato de controles)."""
+        return np.datetime_as_string(self.dias_bimestre(numero), unit='D').tolist()
+
+
+@lru_cache(maxsize=64)
+def _calendario_do_mapa(ano, mapa):
+    mapa = np.frombuffer(mapa.encode('ascii'), dtype=np.uint8) - ord('0')
+    return CalendarioLetivo(np.datetime64(f'{ano}-01-01', 'D'), mapa.astype(np.uint8))
+
+
+class CalendarioService:
+    """
+    Edição em lote do calendário letivo (feriados, dias extras e bimestres).
+    """
+
+    @staticmethod
+    @contextmanager
+    def lote():
+        """
+        Adia os recálculos de AnoLetivo.controles (e a sincronização das
+        configurações de avaliação) até o final do bloco, executando-os uma
+        única vez por ano letivo afetado.
+
+        Uso:
+            with CalendarioService.lote():
+                for feriado in feriados:
+                    ano_letivo.dias_nao_letivos.add(feriado)
+        """
+        if _lote.get() is not None:
+            # Lote aninhado: acumula no lote externo
+            yield
+            return
+
+        pendentes = {}
+        token = _lote.set(pendentes)
+        try:
+            yield
+        finally:
+            _lote.reset(token)
+
+        CalendarioService._processar(pendentes)
+
+    @staticmethod
+    def adiar(ano_letivo, operacao):
+        """
+        Registra a operação ('controles' ou 'sincronizar') do ano letivo para o
+        final do lote. Retorna False fora de lote (o chamador executa na hora).
+        """
+        pendentes = _lote.get()
+        if pendentes is None:
+            return False
+        pendentes.setdefault(ano_letivo.pk, set()).add(operacao)
+        return True
+
+    @staticmethod
+    def _processar(pendentes):
+        from apps.core.models import AnoLetivo
+
+        for ano_letivo in AnoLetivo.objects.filter(pk__in=pendentes.keys()):
+            operacoes = pendentes[ano_letivo.pk]
+            # Controles antes da sincronização (que lê controles['avaliacao'])
+            if 'controles' in operacoes:
+                ano_letivo.atualizar_controles_json()
+            if 'sincronizar' in operacoes:
+                ano_letivo.sincronizar_configuracoes_disciplinas_turmas()
+
+    @staticmethod
+    @transaction.atomic
+    def aplicar_lote(
+        ano_letivo, bimestres=None, dias_nao_letivos=(), dias_letivos_extras=(),
+        remover_dias_nao_letivos=(), remover_dias_letivos_extras=(),
+    ):
+        """
+        Aplica um conjunto de alterações no calendário do ano letivo com
+        operações em massa; controles é recalculado uma única vez.
+
+        Args:
+            ano_letivo: Instância de AnoLetivo
+            bimestres: {campo: data} (ex.: {'data_fim_1bim': date(...)})
+            dias_nao_letivos: [{'data', 'tipo', 'descricao'}] - cria ou atualiza
+                pela data e vincula ao ano
+            dias_letivos_extras: [{'data', 'descricao'}] - idem
+            remover_dias_nao_letivos / remover_dias_letivos_extras: IDs a
+                desvincular do ano e excluir
+
+        Returns:
+            dict: Quantidades aplicadas
+
+        Raises:
+            django.core.exceptions.ValidationError: datas de bimestre inválidas
+        """
+        resumo = {}
+        with CalendarioService.lote():
+            # 1. Datas dos bimestres
+            if bimestres:
+                for campo, valor in bimestres.items():
+                    setattr(ano_letivo, campo, valor)
+                ano_letivo.clean()
+                ano_letivo.save()
+            resumo['bimestres'] = len(bimestres or {})
+
+            # 2. Remoções (apenas dias vinculados a este ano)
+            for relacao, ids, chave in (
+                (ano_letivo.dias_nao_letivos, remover_dias_nao_letivos, 'dias_nao_letivos_removidos'),
+                (ano_letivo.dias_letivos_extras, remover_dias_letivos_extras, 'dias_letivos_extras_removidos'),
+            ):
+                vinculados = list(relacao.filter(id__in=ids).values_list('id', flat=True)) if ids else []
+                if vinculados:
+                    relacao.remove(*vinculados)
+                    relacao.model.objects.filter(id__in=vinculados).delete()
+                resumo[chave] = len(vinculados)
+
+            # 3. Inclusões: cria ou atualiza pela data (única) e vincula em uma operação
+            for relacao, itens, campos, chave in (
+                (ano_letivo.dias_nao_letivos, dias_nao_letivos, ['tipo', 'descricao'], 'dias_nao_letivos'),
+                (ano_letivo.dias_letivos_extras, dias_letivos_extras, ['descricao'], 'dias_letivos_extras'),
+            ):
+                dias = CalendarioService._salvar_dias(relacao.model, itens, campos)
+                if dias:
+                    relacao.add(*dias)
+                resumo[chave] = len(dias)
+
+        return resumo
+
+    @staticmethod
+    def _salvar_dias(modelo, itens, campos):
+        """
+        Cria/atualiza em massa dias (DiaNaoLetivo ou DiaLetivoExtra) pela data.
+        Anos letivos que já usavam um dia alterado também são recalculados.
+        """
+        from apps.core.models import AnoLetivo, DiaNaoLetivo
+
+        if not itens:
+            return []
+
+        existentes = {dia.data: dia for dia in modelo.objects.filter(data__in=[i['data'] for i in itens])}
+        criar = []
+        atualizar = []
+        for item in itens:
+            dia = existentes.get(item['data'])
+            if dia is None:
+                criar.append(modelo(data=item['data'], **{campo: item.get(campo, '') for campo in campos}))
+            elif any(getattr(dia, campo) != item.get(campo, getattr(dia, campo)) for campo in campos):
+                for campo in campos:
+                    setattr(dia, campo, item.get(campo, getattr(dia, campo)))
+                atualizar.append(dia)
+
+        if atualizar:
+            # bulk_update não dispara post_save: marca os anos que usam estes dias
+            modelo.objects.bulk_update(atualizar, campos)
+            filtro = 'dias_nao_letivos__in' if modelo is DiaNaoLetivo else 'dias_letivos_extras__in'
+            for outro_ano in AnoLetivo.objects.filter(**{filtro: atualizar}).distinct():
+                CalendarioService.adiar(outro_ano, 'controles')
+        criados = modelo.objects.bulk_create(criar)
+
+        return list(existentes.values()) + criados
@@ -0,0 +1,433 @@
+"""
+Geração automática de grade horária.
+
+Distribui as aulas semanais (DisciplinaTurma.aulas_semanais) de cada grupo de
+turmas (ano, numero, letra) nos horários do ano (HorarioAula), sem choque de
+professores (ProfessorDisciplinaTurma), e grava o resultado como rascunho
+(GradeHorariaValidade.rascunho), para revisão e publicação no editor de grade.
+
+Restrições:
+- Grupo: um item por horário (estrutural: cada grupo é uma permutação das
+  suas aulas nos horários do ano).
+- Professor: no máximo uma aula por horário. Aulas já publicadas em grupos
+  fora da geração (índice de ocupação dos caches) bloqueiam o horário.
+  Professores sem período de trabalho (PeriodoTrabalho) na validade não
+  entram nas restrições.
+- Espalhamento (restrição fraca): cada disciplina com no máximo
+  ceil(aulas_semanais / dias) aulas por dia.
+
+Busca:
+1. Construção: aulas ordenadas pela carga dos professores (mais restritas
+   primeiro), cada uma no horário livre do grupo que menos aumenta o custo.
+2. Busca local: trocas de horário dentro do grupo (recozimento simulado),
+   com foco nas aulas em choque, até custo zero ou o fim do tempo.
+
+Com processos > 1, cada processo faz uma tentativa com semente diferente no
+mesmo tempo e fica a de menor custo.
+"""
+import math
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+from django.db.models import Q
+
+
+# Peso de um choque de professor em relação a uma aula acima do limite diário
+PESO_CHOQUE = 100
+
+
+def _resolver(problema, semente, tempo_limite):
+    """
+    Uma tentativa de busca (função de módulo para rodar em ProcessPoolExecutor).
+
+    Args:
+        problema: Ver GeradorGradeService.montar_problema (somente tipos simples)
+        semente: Semente do gerador aleatório
+        tempo_limite: Segundos
+
+    Returns:
+        dict: {'choques': int, 'espalhamento': int, 'slots': [slot por aula], 'semente': int}
+    """
+    rng = random.Random(semente)
+    fim = time.monotonic() + tempo_limite
+
+    n_slots = problema['n_slots']
+    n_dias = problema['n_dias']
+    dia_slot = problema['dia_slot']
+    aulas = problema['aulas']  # [(grupo, par, professores)]
+    limite_dia = problema['limite_dia']  # por par (grupo, disciplina)
+    aulas_grupo = defaultdict(list)
+    for indice, (grupo, _, _) in enumerate(aulas):
+        aulas_grupo[grupo].append(indice)
+
+    ocupacao = [0] * (problema['n_professores'] * n_slots)
+    for professor, slot in problema['bloqueios']:
+        ocupacao[professor * n_slots + slot] += 1
+    grade = {grupo: [-1] * n_slots for grupo in aulas_grupo}
+    por_dia = [0] * (len(limite_dia) * n_dias)
+    slot_aula = [-1] * len(aulas)
+    custo = {'choques': sum(max(0, c - 1) for c in ocupacao), 'espalhamento': 0}
+
+    def inserir(aula, slot):
+        grupo, par, professores = aulas[aula]
+        choques = 0
+        for professor in professores:
+            chave = professor * n_slots + slot
+            if ocupacao[chave] >= 1:
+                choques += 1
+            ocupacao[chave] += 1
+        chave = par * n_dias + dia_slot[slot]
+        espalhamento = 1 if por_dia[chave] >= limite_dia[par] else 0
+        por_dia[chave] += 1
+        grade[grupo][slot] = aula
+        slot_aula[aula] = slot
+        custo['choques'] += choques
+        custo['espalhamento'] += espalhamento
+        return choques * PESO_CHOQUE + espalhamento
+
+    def remover(aula):
+        grupo, par, professores = aulas[aula]
+        slot = slot_aula[aula]
+        choques = 0
+        for professor in professores:
+            chave = professor * n_slots + slot
+            ocupacao[chave] -= 1
+            if ocupacao[chave] >= 1:
+                choques += 1
+        chave = par * n_dias + dia_slot[slot]
+        por_dia[chave] -= 1
+        espalhamento = 1 if por_dia[chave] >= limite_dia[par] else 0
+        grade[grupo][slot] = -1
+        slot_aula[aula] = -1
+        custo['choques'] -= choques
+        custo['espalhamento'] -= espalhamento
+        return -(choques * PESO_CHOQUE + espalhamento)
+
+    def custo_insercao(aula, slot):
+        _, par, professores = aulas[aula]
+        choques = sum(1 for p in professores if ocupacao[p * n_slots + slot] >= 1)
+        espalhamento = 1 if por_dia[par * n_dias + dia_slot[slot]] >= limite_dia[par] else 0
+        return choques * PESO_CHOQUE + espalhamento
+
+    # 1. Construção: aulas de professores mais carregados primeiro
+    carga = defaultdict(int)
+    for _, _, professores in aulas:
+        for professor in professores:
+            carga[professor] += 1
+    ordem = sorted(
+        range(len(aulas)),
+        key=lambda a: (-sum(carga[p] for p in aulas[a][2]), rng.random())
+    )
+    for aula in ordem:
+        livres = [s for s, ocupante in enumerate(grade[aulas[aula][0]]) if ocupante == -1]
+        inserir(aula, min(livres, key=lambda s: (custo_insercao(aula, s), rng.random())))
+
+    def total():
+        return custo['choques'] * PESO_CHOQUE + custo['espalhamento']
+
+    melhor = (custo['choques'], custo['espalhamento'], list(slot_aula))
+
+    # 2. Busca local: troca de horários dentro do grupo
+    temperatura = 2.0
+    iteracao = 0
+    em_choque = []
+    while total() > 0:
+        iteracao += 1
+        if iteracao % 256 == 0:
+            if time.monotonic() >= fim:
+                break
+            temperatura = max(0.05, temperatura * 0.97)
+            em_choque = [
+                a for a, (_, _, professores) in enumerate(aulas)
+                if any(ocupacao[p * n_slots + slot_aula[a]] > 1 for p in professores)
+            ]
+
+        if em_choque and rng.random() < 0.8:
+            aula = rng.choice(em_choque)
+        else:
+            aula = rng.randrange(len(aulas))
+        grupo = aulas[aula][0]
+        origem = slot_aula[aula]
+        destino = rng.randrange(n_slots)
+        if destino == origem:
+            continue
+        outra = grade[grupo][destino]
+
+        delta = remover(aula)
+        if outra != -1:
+            delta += remover(outra)
+        delta += inserir(aula, destino)
+        if outra != -1:
+            delta += inserir(outra, origem)
+
+        if delta <= 0 or rng.random() < math.exp(-delta / temperatura):
+            if (custo['choques'], custo['espalhamento']) < melhor[:2]:
+                melhor = (custo['choques'], custo['espalhamento'], list(slot_aula))
+        else:
+            # Desfaz a troca
+            remover(aula)
+            if outra != -1:
+                remover(outra)
+            inserir(aula, origem)
+            if outra != -1:
+                inserir(outra, destino)
+
+    return {'choques': melhor[0], 'espalhamento': melhor[1], 'slots': melhor[2], 'semente': semente}
+
+
+class GeradorGradeService:
+    """
+    Serviço de geração automática de grade horária (rascunho).
+    """
+
+    @staticmethod
+    def montar_problema(ano, data_inicio, data_fim, grupos=None):
+        """
+        Carrega os dados do ano e monta o problema em tipos simples
+        (índices inteiros), pronto para _resolver.
+
+        Args:
+            ano: Ano letivo (int)
+            data_inicio, data_fim: Validade da grade a gerar (date)
+            grupos: Tuplas (numero, letra) a gerar (None = todos do ano)
+
+        Returns:
+            tuple: (problema, contexto) - contexto guarda os IDs reais e avisos
+        """
+        from apps.core.models import (
+            Turma, DisciplinaTurma, ProfessorDisciplinaTurma, PeriodoTrabalho, HorarioAula,
+        )
+        from apps.core.services.grade_horaria_service import GradeHorariaService
+
+        # 1. Horários do ano (slots)
+        horarios = list(HorarioAula.objects.filter(ano_letivo__ano=ano).order_by('dia_semana', 'hora_inicio'))
+        dias = sorted({h.dia_semana for h in horarios})
+        indice_dia = {dia: i for i, dia in enumerate(dias)}
+        indice_slot = {str(h.id): i for i, h in enumerate(horarios)}
+
+        # 2. Grupos do ano e carga de cada disciplina
+        turmas = {
+            t.id: (t.numero, t.letra) for t in Turma.objects.filter(ano_letivo=ano, is_active=True)
+        }
+        grupos_alvo = sorted(set(turmas.values()) if grupos is None else set(grupos) & set(turmas.values()))
+
+        cargas = {}  # (grupo, disciplina_id) -> aulas semanais
+        cursos = {}  # (grupo, disciplina_id) -> curso da primeira turma que oferece
+        siglas = {}
+        for turma_id, disciplina_id, sigla, aulas_semanais, curso_id in DisciplinaTurma.objects.filter(
+            turma_id__in=turmas
+        ).order_by('-turma__ano_letivo', 'turma__numero', 'turma__letra').values_list(
+            'turma_id', 'disciplina_id', 'disciplina__sigla', 'aulas_semanais', 'turma__curso_id'
+        ):
+            grupo = turmas[turma_id]
+            if grupo not in grupos_alvo:
+                continue
+            chave = (grupo, disciplina_id)
+            cargas[chave] = max(cargas.get(chave, 0), aulas_semanais)
+            cursos.setdefault(chave, curso_id)
+            siglas[disciplina_id] = sigla
+
+        # 3. Professores atribuídos na validade e com período de trabalho nela
+        atribuicoes = defaultdict(set)
+        for professor_id, turma_id, disciplina_id in ProfessorDisciplinaTurma.objects.filter(
+            disciplina_turma__turma_id__in=turmas
+        ).filter(
+            Q(data_inicio__isnull=True) | Q(data_inicio__lte=data_fim),
+            Q(data_fim__isnull=True) | Q(data_fim__gte=data_inicio)
+        ).values_list('professor_id', 'disciplina_turma__turma_id', 'disciplina_turma__disciplina_id'):
+            atribuicoes[(turmas[turma_id], disciplina_id)].add(professor_id)
+        professores = {p for ps in atribuicoes.values() for p in ps}
+
+        periodos = defaultdict(list)
+        for funcionario_id, entrada, saida in PeriodoTrabalho.objects.filter(
+            funcionario_id__in=professores
+        ).values_list('funcionario_id', 'data_entrada', 'data_saida'):
+            periodos[funcionario_id].append((entrada, saida))
+        disponiveis = {
+            p for p in professores
+            if not periodos[p] or any(
+                entrada <= data_fim and (saida is None or saida >= data_inicio)
+                for entrada, saida in periodos[p]
+            )
+        }
+        indice_professor = {p: i for i, p in enumerate(sorted(disponiveis, key=str))}
+
+        # 4. Horários já ocupados pelos professores em grupos fora da geração
+        rotulos = {f"{numero}{letra}" for numero, letra in grupos_alvo}
+        bloqueios = set()
+        if indice_professor:
+            for funcionario, grade in GradeHorariaService._caches_professores_ano(ano, indice_professor):
+                for horario_id, aulas in grade['ocupacao'].items():
+                    if horario_id not in indice_slot:
+                        continue
+                    if any(
+                        aula['grupo'] not in rotulos
+                        and aula['data_inicio'] <= data_fim.isoformat()
+                        and aula['data_fim'] >= data_inicio.isoformat()
+                        for aula in aulas
+                    ):
+                        bloqueios.add((indice_professor[funcionario.id], indice_slot[horario_id]))
+
+        # 5. Aulas (uma por aula semanal), respeitando a capacidade do grupo
+        indice_grupo = {grupo: i for i, grupo in enumerate(grupos_alvo)}
+        pares = []
+        limite_dia = []
+        aulas = []
+        sem_espaco = []
+        sem_professor = []
+        carga_grupo = defaultdict(int)
+        for (grupo, disciplina_id), carga in sorted(cargas.items(), key=lambda c: (c[0][0], -c[1], siglas[c[0][1]])):
+            professores_par = tuple(sorted(
+                indice_professor[p] for p in atribuicoes.get((grupo, disciplina_id), ()) if p in indice_professor
+            ))
+            if not professores_par:
+                sem_professor.append(f"{grupo[0]}{grupo[1]} {siglas[disciplina_id]}")
+
+            par = len(pares)
+            pares.append((grupo, disciplina_id))
+            limite_dia.append(max(1, math.ceil(carga / max(1, len(dias)))))
+            for _ in range(carga):
+                if carga_grupo[grupo] >= len(horarios):
+                    sem_espaco.append(f"{grupo[0]}{grupo[1]} {siglas[disciplina_id]}")
+                    break
+                carga_grupo[grupo] += 1
+                aulas.append((indice_grupo[grupo], par, professores_par))
+
+        problema = {
+            'n_slots': len(horarios),
+            'n_dias': len(dias),
+            'dia_slot': [indice_dia[h.dia_semana] for h in horarios],
+            'n_professores': len(indice_professor),
+            'bloqueios': sorted(bloqueios),
+            'limite_dia': limite_dia,
+            'aulas': aulas,
+        }
+        contexto = {
+            'ano': ano,
+            'data_inicio': data_inicio,
+            'data_fim': data_fim,
+            'grupos': grupos_alvo,
+            'horarios': [h.id for h in horarios],
+            'pares': pares,
+            'cursos': cursos,
+            'sem_espaco': sem_espaco,
+            'sem_professor': sem_professor,
+        }
+        return problema, contexto
+
+    @staticmethod
+    def resolver(problema, tempo_limite=10, processos=1, semente=None):
+        """
+        Busca a grade de menor custo (choques, espalhamento) no tempo dado.
+
+        Args:
+            tempo_limite: Segundos por tentativa (as tentativas rodam em paralelo)
+            processos: Número de tentativas/processos (ProcessPoolExecutor se > 1)
+            semente: Semente base (None = aleatória)
+        """
+        semente = random.randrange(2 ** 31) if semente is None else semente
+        if not problema['aulas']:
+            return {'choques': 0, 'espalhamento': 0, 'slots': [], 'semente': semente}
+
+        if processos <= 1:
+            return _resolver(problema, semente, tempo_limite)
+
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(
+                _resolver,
+                [problema] * processos,
+                [semente + i for i in range(processos)],
+                [tempo_limite] * processos,
+            ))
+        return min(resultados, key=lambda r: (r['choques'], r['espalhamento']))
+
+    @staticmethod
+    @transaction.atomic
+    def gravar_rascunho(problema, contexto, resultado):
+        """
+        Grava o resultado como rascunhos de GradeHorariaValidade (um por grupo),
+        substituindo rascunhos anteriores do grupo com as mesmas datas.
+
+        Rascunhos não entram nos caches de grade, então nada é reconstruído;
+        apenas os dados do editor do ano são invalidados, após o commit.
+
+        Returns:
+            int: Número de validades criadas
+        """
+        from apps.core.models import AnoLetivo, GradeHorariaValidade, GradeHoraria
+        from apps.core.services.grade_horaria_service import GradeHorariaService
+
+        ano_letivo = AnoLetivo.objects.get(ano=contexto['ano'])
+        grupos = contexto['grupos']
+
+        if not grupos:
+            return 0
+
+        filtro_grupos = Q()
+        for numero, letra in grupos:
+            filtro_grupos |= Q(turma_numero=numero, turma_letra=letra)
+        GradeHorariaValidade.objects.filter(
+            filtro_grupos,
+            ano_letivo=ano_letivo,
+            rascunho=True,
+            data_inicio=contexto['data_inicio'],
+            data_fim=contexto['data_fim'],
+        ).delete()
+
+        validades = GradeHorariaValidade.objects.bulk_create([
+            GradeHorariaValidade(
+                ano_letivo=ano_letivo,
+                turma_numero=numero,
+                turma_letra=letra,
+                data_inicio=contexto['data_inicio'],
+                data_fim=contexto['data_fim'],
+                rascunho=True,
+            )
+            for numero, letra in grupos
+        ])
+
+        itens = []
+        for aula, slot in enumerate(resultado['slots']):
+            grupo_indice, par, _ = problema['aulas'][aula]
+            grupo, disciplina_id = contexto['pares'][par]
+            itens.append(GradeHoraria(
+                validade=validades[grupo_indice],
+                horario_aula_id=contexto['horarios'][slot],
+                disciplina_id=disciplina_id,
+                curso_id=contexto['cursos'][(grupo, disciplina_id)],
+            ))
+        GradeHoraria.objects.bulk_create(itens, batch_size=1000)
+
+        transaction.on_commit(lambda: GradeHorariaService.invalidar_dados_edicao(contexto['ano']))
+        return len(validades)
+
+    @staticmethod
+    def gerar(ano, data_inicio, data_fim, grupos=None, tempo_limite=10, processos=1, semente=None, salvar=True):
+        """
+        Gera e grava (rascunho) a grade horária dos grupos do ano.
+
+        Returns:
+            dict: Relatório (grupos, aulas, choques, espalhamento, avisos, tempo)
+        """
+        inicio = time.monotonic()
+        problema, contexto = GeradorGradeService.montar_problema(ano, data_inicio, data_fim, grupos)
+        resultado = GeradorGradeService.resolver(problema, tempo_limite, processos, semente)
+
+        validades = 0
+        if salvar:
+            validades = GeradorGradeService.gravar_rascunho(problema, contexto, resultado)
+
+        return {
+            'grupos': len(contexto['grupos']),
+            'validades': validades,
+            'aulas': len(problema['aulas']),
+            'choques': resultado['choques'],
+            'espalhamento': resultado['espalhamento'],
+            'semente': resultado['semente'],
+            'sem_espaco': contexto['sem_espaco'],
+            'sem_professor': contexto['sem_professor'],
+            'tempo': round(time.monotonic() - inicio, 2),
+        }
@@ -0,0 +1,954 @@
+"""
+Agendamento da reconstrução dos caches de grade horária (Turma/Funcionario.grade_horaria).
+
+Alterações em HorarioAula, GradeHorariaValidade, GradeHoraria, DisciplinaTurma e
+ProfessorDisciplinaTurma invalidam os caches de várias turmas e professores.
+Em vez de reconstruir a cada save()/delete(), os afetados são marcados e
+reconstruídos uma única vez:
+
+- Dentro de transação (ATOMIC_REQUESTS): após o commit (transaction.on_commit).
+  Cada transação acumula suas marcações à parte (apps.core.utils.agendar_apos_commit):
+  se for desfeita, nada é reconstruído, nem depois, no commit seguinte.
+- Fora de transação (shell, scripts): imediatamente, como antes.
+- Em GradeHorariaService.lote(): ao final do bloco, para operações em massa
+  (salvar_lote, importações) que salvam muitas linhas seguidas.
+
+A reconstrução é feita por ano letivo (GradeHorariaService.construir_ano):
+validades, itens, atribuições e horários do ano são carregados em poucas
+queries, todas as matrizes são montadas em memória e gravadas com bulk_update.
+
+Formato dos caches:
+- Turma.grade_horaria: linha do tempo da turma.
+- Funcionario.grade_horaria: {'<ano>': linha do tempo do professor naquele ano},
+  uma entrada por ano letivo construído (independe do ano selecionado).
+  Cada entrada traz também o índice de ocupação do professor ('ocupacao':
+  horario_aula_id -> aulas com seus intervalos) e os choques de horário
+  entre grupos ('conflitos'), mantidos junto com a linha do tempo.
+
+A linha do tempo ('periodos') cobre todas as validades do ano, dividida nas
+datas em que atribuições começam/terminam, de modo que qualquer data pode ser
+consultada sem reconstrução (GradeHorariaService.periodo_em). O período de hoje
+fica copiado em 'vigente' até 'vigente_ate' e responde às consultas dessa faixa
+sem percorrer a linha do tempo; o comando virar_grades_horarias atualiza apenas
+os caches cuja vigência terminou. Caches antigos (sem 'periodos') são
+convertidos com o comando reconstruir_grades_horarias.
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.utils import agendar_apos_commit
+
+
+# Marcações da transação corrente aguardando o commit (ver agendar_apos_commit)
+_pendentes = ContextVar('grade_horaria_pendentes', default=None)
+
+# Marcações acumuladas dentro de GradeHorariaService.lote() (None = fora de lote)
+_lote = ContextVar('grade_horaria_lote', default=None)
+
+# Cache dos dados estáticos do editor de grade (ver obter_dados_edicao). As chaves
+# levam AnoLetivo.versao_grade, trocada a cada reconstrução do ano; o timeout
+# cobre edições sem gatilho (ex.: nome de disciplina).
+GRADE_EDICAO_CACHE_ALIAS = getattr(settings, 'ANO_LETIVO_CACHE_ALIAS', 'default')
+GRADE_EDICAO_CACHE_TIMEOUT = 60 * 60
+
+
+def _novas_marcacoes():
+    return {'turmas': set(), 'professores': set(), 'grupos': set(), 'anos': set()}
+
+
+UM_DIA = timedelta(days=1)
+
+# Professor exibido na grade da turma quando há mais de uma atribuição ativa
+PRIORIDADE_TIPO = {'TITULAR': 0, 'SUBSTITUTO': 1, 'AUXILIAR': 2}
+
+
+def _iso(data):
+    return data.isoformat() if data else None
+
+
+def _atribuicao_ativa(atribuicao, data):
+    """Atribuição (ProfessorDisciplinaTurma) vigente na data."""
+    return (
+        (atribuicao.data_inicio is None or atribuicao.data_inicio <= data)
+        and (atribuicao.data_fim is None or atribuicao.data_fim >= data)
+    )
+
+
+def _cortes_atribuicoes(atribuicoes):
+    """Datas em que o conjunto de atribuições ativas muda."""
+    cortes = set()
+    for atribuicao in atribuicoes:
+        if atribuicao.data_inicio:
+            cortes.add(atribuicao.data_inicio)
+        if atribuicao.data_fim:
+            cortes.add(atribuicao.data_fim + UM_DIA)
+    return cortes
+
+
+def _dividir(inicio, fim, cortes):
+    """Divide [inicio, fim] nos cortes que caem dentro do intervalo."""
+    for corte in sorted(c for c in cortes if inicio < c <= fim):
+        yield inicio, corte - UM_DIA
+        inicio = corte
+    yield inicio, fim
+
+
+def _intervalos(cortes):
+    """
+    Intervalos consecutivos delimitados pelos cortes, incluindo as pontas
+    abertas (None) antes do primeiro e a partir do último.
+    """
+    cortes = sorted(cortes)
+    if not cortes:
+        yield None, None
+        return
+    yield None, cortes[0] - UM_DIA
+    for atual, proximo in zip(cortes, cortes[1:]):
+        yield atual, proximo - UM_DIA
+    yield cortes[-1], None
+
+
+def _validade_em(validades, data):
+    """Validade (GradeHorariaValidade) do grupo vigente na data, se houver."""
+    return next((v for v in validades if v.data_inicio <= data <= v.data_fim), None)
+
+
+def _periodo_na_linha_do_tempo(grade, data_iso):
+    """Período de grade['periodos'] que contém a data (ISO), se houver."""
+    for periodo in grade.get('periodos', []):
+        if (
+            (periodo['data_inicio'] is None or periodo['data_inicio'] <= data_iso)
+            and (periodo['data_fim'] is None or periodo['data_fim'] >= data_iso)
+        ):
+            return periodo
+    return None
+
+
+def _juntar_periodos(periodos):
+    """Une períodos consecutivos com o mesmo conteúdo."""
+    resultado = []
+    for periodo in periodos:
+        anterior = resultado[-1] if resultado else None
+        if (
+            anterior
+            and anterior['data_fim'] and periodo['data_inicio']
+            and date.fromisoformat(anterior['data_fim']) + UM_DIA == date.fromisoformat(periodo['data_inicio'])
+            and _conteudo(anterior) == _conteudo(periodo)
+        ):
+            anterior['data_fim'] = periodo['data_fim']
+        else:
+            resultado.append(periodo)
+    return resultado
+
+
+def _conteudo(periodo):
+    return {chave: valor for chave, valor in periodo.items() if chave not in ('data_inicio', 'data_fim')}
+
+
+def _ocupacao_professor(atribuicoes, turmas, validades_grupo, itens_validade, horarios_ids):
+    """
+    Índice de ocupação do professor no ano: horario_aula_id -> aulas naquele
+    horário, cada uma com o intervalo em que vale (validade da grade do grupo
+    recortada pela vigência da atribuição).
+    """
+    ocupacao = defaultdict(list)
+    for atribuicao in atribuicoes:
+        turma = turmas[atribuicao.disciplina_turma.turma_id]
+        disciplina = atribuicao.disciplina_turma.disciplina
+        for validade in validades_grupo[(turma.numero, turma.letra)]:
+            inicio = max(validade.data_inicio, atribuicao.data_inicio or validade.data_inicio)
+            fim = min(validade.data_fim, atribuicao.data_fim or validade.data_fim)
+            if inicio > fim:
+                continue
+            for item in itens_validade[validade.id]:
+                if item.disciplina_id != disciplina.id or item.horario_aula_id not in horarios_ids:
+                    continue
+                ocupacao[str(item.horario_aula_id)].append({
+                    'grupo': f"{turma.numero}{turma.letra}",
+                    'turma_id': str(turma.id),
+                    'turma_sigla': turma.sigla,
+                    'disciplina_id': str(disciplina.id),
+                    'disciplina_sigla': disciplina.sigla,
+                    'professor_disciplina_turma_id': str(atribuicao.id),
+                    'dia_semana': item.horario_aula.dia_semana,
+                    'numero_aula': item.horario_aula.numero,
+                    'data_inicio': inicio.isoformat(),
+                    'data_fim': fim.isoformat(),
+                })
+    return dict(ocupacao)
+
+
+def _conflitos_ocupacao(ocupacao):
+    """
+    Choques do professor: aulas de grupos (numero, letra) diferentes no mesmo
+    horário com intervalos sobrepostos. Turmas do mesmo grupo (cursos
+    diferentes) dividem a aula e não são choque.
+    """
+    conflitos = []
+    for horario_id, aulas in ocupacao.items():
+        for i, aula in enumerate(aulas):
+            for outra in aulas[i + 1:]:
+                if aula['grupo'] == outra['grupo']:
+                    continue
+                inicio = max(aula['data_inicio'], outra['data_inicio'])
+                fim = min(aula['data_fim'], outra['data_fim'])
+                if inicio <= fim:
+                    conflitos.append({
+                        'horario_aula_id': horario_id,
+                        'dia_semana': aula['dia_semana'],
+                        'numero_aula': aula['numero_aula'],
+                        'data_inicio': inicio,
+                        'data_fim': fim,
+                        'aulas': [aula, outra],
+                    })
+    return conflitos
+
+
+class GradeHorariaService:
+    """
+    Serviço centralizado para reconstrução dos caches de grade horária.
+    """
+
+    @staticmethod
+    def agendar(turmas=(), professores=(), grupos=(), anos=()):
+        """
+        Marca caches de grade horária para reconstrução.
+
+        Args:
+            turmas: IDs de Turma
+            professores: IDs de Funcionario
+            grupos: Tuplas (ano, turma_numero, turma_letra) - turmas do grupo e
+                seus professores (ex.: alteração de validade/itens da grade)
+            anos: Anos letivos (int) - todas as turmas e professores do ano
+                (ex.: alteração de HorarioAula)
+        """
+        marcacoes = {'turmas': turmas, 'professores': professores, 'grupos': grupos, 'anos': anos}
+
+        lote = _lote.get()
+        if lote is not None:
+            for nome, valores in marcacoes.items():
+                lote[nome].update(valores)
+            return
+
+        agendar_apos_commit(_pendentes, marcacoes, GradeHorariaService.processar_pendentes)
+
+    @staticmethod
+    @contextmanager
+    def lote():
+        """
+        Suspende as reconstruções por linha durante operações em massa.
+        Ao sair do bloco, os afetados são agendados uma única vez.
+
+        Uso:
+            with GradeHorariaService.lote():
+                for item in itens:
+                    item.save()
+        """
+        if _lote.get() is not None:
+            # Lote aninhado: acumula no lote externo
+            yield
+            return
+
+        marcacoes = _novas_marcacoes()
+        token = _lote.set(marcacoes)
+        try:
+            yield
+        finally:
+            _lote.reset(token)
+
+        if any(marcacoes.values()):
+            GradeHorariaService.agendar(**marcacoes)
+
+    @staticmethod
+    def processar_pendentes(marcacoes):
+        """
+        Reconstrói os caches marcados em uma transação (chamado após o commit).
+
+        Args:
+            marcacoes: dict com os conjuntos acumulados por agendar()
+
+        Returns:
+            dict: {'turmas': int, 'professores': int}
+        """
+        if not any(marcacoes.values()):
+            return {'turmas': 0, 'professores': 0}
+
+        return GradeHorariaService.reconstruir(**marcacoes)
+
+    @staticmethod
+    def reconstruir(turmas=(), professores=(), grupos=(), anos=()):
+        """
+        Reconstrói imediatamente os caches informados (mesmos argumentos de agendar).
+
+        Agrupa os afetados por ano letivo e chama construir_ano uma vez por ano.
+
+        Returns:
+            dict: {'turmas': int, 'professores': int}
+        """
+        from apps.core.models import Turma, Funcionario, ProfessorDisciplinaTurma
+
+        anos_completos = set(anos)
+        turmas_por_ano = defaultdict(set)
+        professores_por_ano = defaultdict(set)
+
+        # Turmas avulsas e dos grupos (anos completos são construídos inteiros)
+        filtro = Q(id__in=set(turmas))
+        for ano, numero, letra in grupos:
+            if ano not in anos_completos:
+                filtro |= Q(ano_letivo=ano, numero=numero, letra=letra)
+        turmas_afetadas = {}
+        if turmas or grupos:
+            turmas_afetadas = dict(Turma.objects.filter(filtro).values_list('id', 'ano_letivo'))
+        for turma_id, ano in turmas_afetadas.items():
+            if ano not in anos_completos:
+                turmas_por_ano[ano].add(turma_id)
+
+        # Professores atribuídos às turmas afetadas
+        for professor_id, ano in ProfessorDisciplinaTurma.objects.filter(
+            disciplina_turma__turma_id__in=[
+                turma_id for turma_ids in turmas_por_ano.values() for turma_id in turma_ids
+            ]
+        ).values_list('professor_id', 'disciplina_turma__turma__ano_letivo').distinct():
+            professores_por_ano[ano].add(professor_id)
+
+        # Professores avulsos: anos em que têm atribuição ou entrada no cache
+        professor_ids = set(professores)
+        if professor_ids:
+            for professor_id, ano in ProfessorDisciplinaTurma.objects.filter(
+                professor_id__in=professor_ids
+            ).values_list('professor_id', 'disciplina_turma__turma__ano_letivo').distinct():
+                professores_por_ano[ano].add(professor_id)
+            for professor_id, cache in Funcionario.objects.filter(
+                id__in=professor_ids, grade_horaria__isnull=False
+            ).values_list('id', 'grade_horaria'):
+                for chave in GradeHorariaService._anos_em_cache(cache):
+                    professores_por_ano[chave].add(professor_id)
+
+        total = {'turmas': 0, 'professores': 0}
+        for ano in anos_completos:
+            resultado = GradeHorariaService.construir_ano(ano)
+            total['turmas'] += len(resultado['turmas'])
+            total['professores'] += len(resultado['professores'])
+
+        for ano in (set(turmas_por_ano) | set(professores_por_ano)) - anos_completos:
+            resultado = GradeHorariaService.construir_ano(
+                ano,
+                turma_ids=turmas_por_ano.get(ano, ()),
+                professor_ids=professores_por_ano.get(ano, ()),
+            )
+            total['turmas'] += len(resultado['turmas'])
+            total['professores'] += len(resultado['professores'])
+
+        # Dados do editor de grade dos anos afetados (após a gravação, pois
+        # incluem a ocupação dos professores lida dos caches)
+        for ano in (
+            anos_completos | set(turmas_por_ano) | set(professores_por_ano)
+            | {grupo[0] for grupo in grupos}
+        ):
+            GradeHorariaService.invalidar_dados_edicao(ano)
+
+        return total
+
+    @staticmethod
+    def _anos_em_cache(cache):
+        """Anos (int) presentes em um Funcionario.grade_horaria por ano."""
+        if not isinstance(cache, dict):
+            return []
+        return [int(chave) for chave in cache if str(chave).isdigit()]
+
+    @staticmethod
+    def construir_ano(ano, turma_ids=None, professor_ids=None, salvar=True, referencia=None):
+        """
+        Constrói em lote os caches de grade horária de um ano letivo.
+
+        Carrega turmas, vínculos de disciplina, atribuições, validades, itens
+        da grade e horários do ano (7 queries, independente do número de
+        turmas/professores), monta todas as linhas do tempo em memória e grava
+        com bulk_update.
+
+        Args:
+            ano: Ano letivo (int)
+            turma_ids: IDs de Turma a construir (None = todas do ano)
+            professor_ids: IDs de Funcionario a construir (None = todos com
+                atribuição no ano ou com entrada do ano no cache)
+            salvar: Se True, grava os caches (bulk_update)
+            referencia: Data do período vigente copiado para 'vigente' (padrão: hoje)
+
+        Returns:
+            dict: {'turmas': {turma_id: grade}, 'professores': {funcionario_id: grade}}
+        """
+        from apps.core.models import (
+            Turma, DisciplinaTurma, ProfessorDisciplinaTurma, Funcionario,
+            HorarioAula, GradeHorariaValidade, GradeHoraria,
+        )
+
+        referencia = referencia or timezone.localdate()
+        gerado_em = timezone.now().isoformat()
+        chave_ano = str(ano)
+
+        # 1. Turmas do ano
+        turmas = {
+            t.id: t for t in Turma.objects.filter(ano_letivo=ano).select_related('curso')
+        }
+        turmas_grupo = defaultdict(list)
+        for turma in turmas.values():
+            turmas_grupo[(turma.numero, turma.letra)].append(turma)
+
+        # 2. Disciplinas vinculadas a cada turma
+        disciplinas_turma = defaultdict(set)
+        for turma_id, disciplina_id in DisciplinaTurma.objects.filter(
+            turma__ano_letivo=ano
+        ).values_list('turma_id', 'disciplina_id'):
+            disciplinas_turma[turma_id].add(disciplina_id)
+
+        # 3. Atribuições do ano (ordem padrão do model), com qualquer vigência
+        atribuicoes_professor = defaultdict(list)
+        atribuicoes_turma = defaultdict(list)
+        atribuicoes_disciplina = defaultdict(list)
+        for atribuicao in ProfessorDisciplinaTurma.objects.filter(
+            disciplina_turma__turma__ano_letivo=ano
+        ).select_related('disciplina_turma__disciplina', 'professor__usuario'):
+            dt = atribuicao.disciplina_turma
+            atribuicoes_professor[atribuicao.professor_id].append(atribuicao)
+            atribuicoes_turma[dt.turma_id].append(atribuicao)
+            atribuicoes_disciplina[(dt.turma_id, dt.disciplina_id)].append(atribuicao)
+        for lista in atribuicoes_disciplina.values():
+            lista.sort(key=lambda a: PRIORIDADE_TIPO.get(a.tipo, len(PRIORIDADE_TIPO)))
+
+        # 4. Validades de cada grupo (numero, letra), em ordem cronológica
+        validades_grupo = defaultdict(list)
+        for validade in GradeHorariaValidade.objects.filter(
+            ano_letivo__ano=ano, rascunho=False
+        ).order_by('data_inicio'):
+            validades_grupo[(validade.turma_numero, validade.turma_letra)].append(validade)
+
+        # 5. Itens de todas as validades do ano
+        itens_validade = defaultdict(list)
+        for item in GradeHoraria.objects.filter(
+            validade__ano_letivo__ano=ano, validade__rascunho=False
+        ).select_related('horario_aula', 'disciplina', 'curso').order_by(
+            'horario_aula__dia_semana', 'horario_aula__hora_inicio'
+        ):
+            itens_validade[item.validade_id].append(item)
+
+        # 6. Horários do ano (legenda da grade do professor)
+        horarios_ano = {}
+        horarios_ids = set()
+        for horario in HorarioAula.objects.filter(ano_letivo__ano=ano):
+            horarios_ids.add(horario.id)
+            horarios_ano.setdefault(str(horario.numero), {
+                'hora_inicio': horario.hora_inicio.strftime('%H:%M'),
+                'hora_fim': horario.hora_fim.strftime('%H:%M')
+            })
+
+        # --- Grades das turmas ---
+        alvo_turmas = turmas.keys() if turma_ids is None else [
+            turma_id for turma_id in turma_ids if turma_id in turmas
+        ]
+        grades_turmas = {}
+        for turma_id in alvo_turmas:
+            turma = turmas[turma_id]
+            disciplinas = disciplinas_turma[turma_id]
+            cortes = _cortes_atribuicoes(atribuicoes_turma[turma_id])
+
+            periodos = []
+            for validade in validades_grupo[(turma.numero, turma.letra)]:
+                itens = [g for g in itens_validade[validade.id] if g.disciplina_id in disciplinas]
+                for inicio, fim in _dividir(validade.data_inicio, validade.data_fim, cortes):
+                    matriz = {}
+                    horarios = {}
+                    for g in itens:
+                        num_key = str(g.horario_aula.numero)
+                        professor = next((
+                            a.professor for a in atribuicoes_disciplina[(turma_id, g.disciplina_id)]
+                            if _atribuicao_ativa(a, inicio)
+                        ), None)
+                        matriz.setdefault(num_key, {})[str(g.horario_aula.dia_semana)] = {
+                            'disciplina_id': str(g.disciplina.id),
+                            'disciplina_nome': g.disciplina.nome,
+                            'disciplina_sigla': g.disciplina.sigla,
+                            'curso_sigla': g.curso.sigla if g.curso else '',
+                            'professor_apelido': professor.get_apelido() if professor else None
+                        }
+                        horarios.setdefault(num_key, {
+                            'hora_inicio': g.horario_aula.hora_inicio.strftime('%H:%M'),
+                            'hora_fim': g.horario_aula.hora_fim.strftime('%H:%M')
+                        })
+                    periodos.append({
+                        'data_inicio': _iso(inicio),
+                        'data_fim': _iso(fim),
+                        'validade': {
+                            'data_inicio': validade.data_inicio.isoformat(),
+                            'data_fim': validade.data_fim.isoformat()
+                        },
+                        'matriz': matriz,
+                        'horarios': horarios,
+                    })
+
+            grade = {
+                'ano_letivo': ano,
+                'cursos_turmas': {
+                    str(t.id): {'curso_sigla': t.curso.sigla, 'turma_nome': t.nome}
+                    for t in turmas_grupo[(turma.numero, turma.letra)]
+                },
+                'periodos': _juntar_periodos(periodos),
+                'gerado_em': gerado_em
+            }
+            grades_turmas[turma_id] = GradeHorariaService.aplicar_vigente(grade, referencia)
+
+        # --- Grades dos professores ---
+        if professor_ids is None:
+            alvo_professores = set(atribuicoes_professor)
+            if salvar:
+                # Professores sem atribuição no ano, mas com entrada antiga no cache
+                alvo_professores |= set(
+                    Funcionario.objects.filter(
+                        grade_horaria__has_key=chave_ano
+                    ).values_list('id', flat=True)
+                )
+        else:
+            alvo_professores = set(professor_ids)
+
+        grades_professores = {}
+        for professor_id in alvo_professores:
+            atribuicoes = atribuicoes_professor.get(professor_id, [])
+            grupos = {
+                (turmas[a.disciplina_turma.turma_id].numero, turmas[a.disciplina_turma.turma_id].letra)
+                for a in atribuicoes
+            }
+            cortes = _cortes_atribuicoes(atribuicoes)
+            for grupo in grupos:
+                for validade in validades_grupo[grupo]:
+                    cortes.update((validade.data_inicio, validade.data_fim + UM_DIA))
+
+            periodos = []
+            for inicio, fim in _intervalos(cortes):
+                data = inicio or fim or date(ano, 1, 1)
+                ativas = [a for a in atribuicoes if _atribuicao_ativa(a, data)]
+                if not ativas:
+                    continue
+
+                vigentes = {
+                    grupo: _validade_em(validades_grupo[grupo], data) for grupo in grupos
+                }
+                matriz = {}
+                aulas = []
+                for atribuicao in ativas:
+                    turma = turmas[atribuicao.disciplina_turma.turma_id]
+                    disciplina = atribuicao.disciplina_turma.disciplina
+                    validade = vigentes[(turma.numero, turma.letra)]
+                    if not validade:
+                        continue
+
+                    for item in itens_validade[validade.id]:
+                        if item.disciplina_id != disciplina.id or item.horario_aula_id not in horarios_ids:
+                            continue
+                        horario_aula = item.horario_aula
+                        dia_key = str(horario_aula.dia_semana)
+                        celulas = matriz.setdefault(str(horario_aula.numero), {})
+
+                        celula_existente = celulas.get(dia_key)
+                        if celula_existente:
+                            if turma.sigla not in celula_existente['turma_sigla']:
+                                celula_existente['turma_sigla'] += f", {turma.sigla}"
+                                celula_existente['turma_id'] = None
+                        else:
+                            celulas[dia_key] = {
+                                'disciplina_id': str(disciplina.id),
+                                'disciplina_nome': disciplina.nome,
+                                'disciplina_sigla': disciplina.sigla,
+                                'turma_sigla': turma.sigla,
+                                'turma_label': f"{turma.numero}{turma.letra}",
+                                'turma_nome_completo': turma.nome_completo,
+                                'curso_sigla': item.curso.sigla if item.curso else turma.curso.sigla,
+                                'turma_id': str(turma.id),
+                                'professor_disciplina_turma_id': str(atribuicao.id),
+                                'sala': ''
+                            }
+
+                        aulas.append({
+                            'dia_semana': horario_aula.dia_semana,
+                            'numero_aula': horario_aula.numero,
+                            'hora_inicio': horario_aula.hora_inicio.strftime('%H:%M'),
+                            'hora_fim': horario_aula.hora_fim.strftime('%H:%M'),
+                            'disciplina': disciplina.nome,
+                            'turma': turma.nome_completo
+                        })
+
+                # Validade de referência: a do primeiro grupo (numero, letra) com grade vigente
+                validade_ref = next(
+                    (vigentes[grupo] for grupo in sorted(grupos) if vigentes[grupo]), None
+                )
+                periodos.append({
+                    'data_inicio': _iso(inicio),
+                    'data_fim': _iso(fim),
+                    'validade': {
+                        'data_inicio': validade_ref.data_inicio.isoformat(),
+                        'data_fim': validade_ref.data_fim.isoformat()
+                    } if validade_ref else None,
+                    'mostrar_disciplina': len({a.disciplina_turma.disciplina_id for a in ativas}) > 1,
+                    'matriz': matriz,
+                    'aulas': aulas,
+                })
+
+            ocupacao = _ocupacao_professor(atribuicoes, turmas, validades_grupo, itens_validade, horarios_ids)
+
+            grade = {
+                'ano_letivo': ano,
+                'horarios': dict(horarios_ano) if atribuicoes else {},
+                'periodos': _juntar_periodos(periodos),
+                'ocupacao': ocupacao,
+                'conflitos': _conflitos_ocupacao(ocupacao),
+                'gerado_em': gerado_em
+            }
+            grades_professores[professor_id] = GradeHorariaService.aplicar_vigente(grade, referencia)
+
+        if salvar:
+            GradeHorariaService._gravar(ano, grades_turmas, grades_professores, turmas)
+
+        return {'turmas': grades_turmas, 'professores': grades_professores}
+
+    @staticmethod
+    def _gravar(ano, grades_turmas, grades_professores, turmas):
+        """Grava os caches construídos por construir_ano (bulk_update)."""
+        from apps.core.models import Turma, Funcionario
+
+        if grades_turmas:
+            objetos = []
+            for turma_id, grade in grades_turmas.items():
+                turma = turmas[turma_id]
+                turma.grade_horaria = grade
+                objetos.append(turma)
+            Turma.objects.bulk_update(objetos, ['grade_horaria'], batch_size=500)
+
+        if grades_professores:
+            chave_ano = str(ano)
+            objetos = list(Funcionario.objects.filter(
+                id__in=grades_professores.keys()
+            ).only('id', 'grade_horaria'))
+            for funcionario in objetos:
+                cache = funcionario.grade_horaria
+                # Descarta o formato antigo (grade única do ano selecionado)
+                if not isinstance(cache, dict) or 'matriz' in cache:
+                    cache = {}
+                cache[chave_ano] = grades_professores[funcionario.id]
+                funcionario.grade_horaria = cache
+            Funcionario.objects.bulk_update(objetos, ['grade_horaria'], batch_size=500)
+
+    # -------------------------------------------------------------------------
+    # Consulta por data e virada de vigência
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def periodo_em(grade, data):
+        """
+        Retorna o período da linha do tempo da grade vigente na data (ou None).
+
+        Datas entre a referência e 'vigente_ate' (o caso comum: a semana atual)
+        são respondidas pelo período copiado em 'vigente'; as demais percorrem
+        a linha do tempo.
+
+        Args:
+            grade: Turma.grade_horaria ou uma entrada de Funcionario.grade_horaria
+            data: date
+        """
+        if not grade:
+            return None
+        data_iso = data.isoformat()
+        referencia = grade.get('referencia')
+        vigente_ate = grade.get('vigente_ate')
+        if (
+            'vigente' in grade and referencia and referencia <= data_iso
+            and (vigente_ate is None or vigente_ate >= data_iso)
+        ):
+            return grade['vigente']
+        return _periodo_na_linha_do_tempo(grade, data_iso)
+
+    @staticmethod
+    def aplicar_vigente(grade, data):
+        """
+        Copia para grade['vigente'] o período vigente na data e registra até
+        quando ele vale (grade['vigente_ate'], None = sem fim previsto).
+
+        Returns:
+            A própria grade.
+        """
+        data_iso = data.isoformat()
+        periodo = _periodo_na_linha_do_tempo(grade, data_iso)
+        if periodo:
+            vigente_ate = periodo['data_fim']
+        else:
+            # Sem grade na data: vale até a véspera do próximo período
+            proximo = next((
+                p['data_inicio'] for p in grade.get('periodos', [])
+                if p['data_inicio'] and p['data_inicio'] > data_iso
+            ), None)
+            vigente_ate = _iso(date.fromisoformat(proximo) - UM_DIA) if proximo else None
+
+        grade['referencia'] = data_iso
+        grade['vigente'] = periodo
+        grade['vigente_ate'] = vigente_ate
+        return grade
+
+    @staticmethod
+    def virar_vigencias(data=None):
+        """
+        Atualiza o período vigente dos caches cuja vigência terminou antes da
+        data (padrão: hoje). Não reconstrói nada: apenas escolhe o novo período
+        na linha do tempo já gravada.
+
+        Returns:
+            dict: {'turmas': int, 'professores': int} - caches atualizados
+        """
+        from apps.core.models import Turma, Funcionario
+
+        data = data or timezone.localdate()
+        data_iso = data.isoformat()
+
+        def vencida(grade):
+            return (
+                isinstance(grade, dict) and 'periodos' in grade
+                and grade.get('vigente_ate') is not None and grade['vigente_ate'] < data_iso
+            )
+
+        turmas = []
+        for turma in Turma.objects.filter(
+            grade_horaria__vigente_ate__isnull=False
+        ).only('id', 'grade_horaria').iterator(chunk_size=500):
+            if vencida(turma.grade_horaria):
+                GradeHorariaService.aplicar_vigente(turma.grade_horaria, data)
+                turmas.append(turma)
+        Turma.objects.bulk_update(turmas, ['grade_horaria'], batch_size=500)
+
+        professores = []
+        for funcionario in Funcionario.objects.filter(
+            grade_horaria__isnull=False
+        ).only('id', 'grade_horaria').iterator(chunk_size=500):
+            anos = GradeHorariaService._anos_em_cache(funcionario.grade_horaria)
+            vencidas = [
+                funcionario.grade_horaria[str(ano)] for ano in anos
+                if vencida(funcionario.grade_horaria[str(ano)])
+            ]
+            for grade in vencidas:
+                GradeHorariaService.aplicar_vigente(grade, data)
+            if vencidas:
+                professores.append(funcionario)
+        Funcionario.objects.bulk_update(professores, ['grade_horaria'], batch_size=500)
+
+        return {'turmas': len(turmas), 'professores': len(professores)}
+
+    # -------------------------------------------------------------------------
+    # Choques de horário de professores
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _caches_professores_ano(ano, professor_ids=None):
+        """
+        Funcionarios (com usuario) e a entrada do ano de seus caches, montando
+        em memória as que faltam ou são anteriores ao índice de ocupação.
+
+        Usado em leituras (conflitos, dados_edicao): as entradas montadas não
+        são gravadas, isso fica para a próxima reconstrução do ano.
+
+        Returns:
+            list: [(funcionario, grade_do_ano)]
+        """
+        from apps.core.models import Funcionario, ProfessorDisciplinaTurma
+
+        chave_ano = str(ano)
+        filtro = Q(grade_horaria__isnull=False)
+        atribuidos = ProfessorDisciplinaTurma.objects.filter(
+            disciplina_turma__turma__ano_letivo=ano
+        )
+        if professor_ids is not None:
+            filtro &= Q(id__in=professor_ids)
+            atribuidos = atribuidos.filter(professor_id__in=professor_ids)
+        atribuidos = set(atribuidos.values_list('professor_id', flat=True))
+
+        professores = {
+            f.id: f for f in Funcionario.objects.filter(
+                filtro | Q(id__in=atribuidos)
+            ).select_related('usuario')
+        }
+        grades = {}
+        for professor_id, funcionario in professores.items():
+            cache = funcionario.grade_horaria if isinstance(funcionario.grade_horaria, dict) else {}
+            grade = cache.get(chave_ano)
+            if isinstance(grade, dict) and 'conflitos' in grade:
+                grades[professor_id] = grade
+
+        pendentes = [
+            professor_id for professor_id in professores
+            if professor_id not in grades and professor_id in atribuidos
+        ]
+        if pendentes:
+            grades.update(GradeHorariaService.construir_ano(
+                ano, turma_ids=[], professor_ids=pendentes, salvar=False
+            )['professores'])
+
+        return [(professores[professor_id], grade) for professor_id, grade in grades.items()]
+
+    @staticmethod
+    def conflitos_ano(ano):
+        """
+        Lista os choques de horário de todos os professores no ano letivo.
+
+        Os choques são calculados na construção de cada cache de professor
+        (construir_ano) e mantidos a cada reconstrução; aqui apenas são
+        reunidos, em uma passada pelos caches.
+
+        Returns:
+            list: Choques ordenados por professor, dia, aula e data
+        """
+        conflitos = []
+        for funcionario, grade in GradeHorariaService._caches_professores_ano(ano):
+            for conflito in grade['conflitos']:
+                conflitos.append({
+                    'professor_id': str(funcionario.id),
+                    'professor_nome': funcionario.usuario.get_full_name(),
+                    'professor_apelido': funcionario.get_apelido(),
+                    **conflito
+                })
+
+        conflitos.sort(key=lambda c: (
+            c['professor_nome'], c['dia_semana'], c['numero_aula'], c['data_inicio']
+        ))
+        return conflitos
+
+    @staticmethod
+    def ocupacao_grupo(ano, numero, letra):
+        """
+        Ocupação, em outros grupos, dos professores do grupo (ano, numero, letra),
+        indexada para consulta direta pelo editor de grade:
+        disciplina_id -> horario_aula_id -> aulas do professor da disciplina em
+        outro grupo naquele horário (intervalo recortado pela atribuição no grupo).
+
+        Returns:
+            dict: {disciplina_id: {horario_aula_id: [aula]}} (chaves str)
+        """
+        from apps.core.models import ProfessorDisciplinaTurma
+
+        grupo = f"{numero}{letra}"
+        atribuicoes = list(ProfessorDisciplinaTurma.objects.filter(
+            disciplina_turma__turma__ano_letivo=ano,
+            disciplina_turma__turma__numero=numero,
+            disciplina_turma__turma__letra=letra,
+        ).values_list('professor_id', 'disciplina_turma__disciplina_id', 'data_inicio', 'data_fim'))
+        if not atribuicoes:
+            return {}
+
+        grades = {
+            funcionario.id: (funcionario, grade)
+            for funcionario, grade in GradeHorariaService._caches_professores_ano(
+                ano, professor_ids={a[0] for a in atribuicoes}
+            )
+        }
+
+        ocupacao = defaultdict(lambda: defaultdict(list))
+        for professor_id, disciplina_id, data_inicio, data_fim in atribuicoes:
+            if professor_id not in grades:
+                continue
+            funcionario, grade = grades[professor_id]
+            inicio_atribuicao = _iso(data_inicio) or ''
+            fim_atribuicao = _iso(data_fim) or '9999-12-31'
+            for horario_id, aulas in grade['ocupacao'].items():
+                for aula in aulas:
+                    if aula['grupo'] == grupo:
+                        continue
+                    inicio = max(aula['data_inicio'], inicio_atribuicao)
+                    fim = min(aula['data_fim'], fim_atribuicao)
+                    if inicio > fim:
+                        continue
+                    ocupacao[str(disciplina_id)][horario_id].append({
+                        **aula,
+                        'professor_id': str(professor_id),
+                        'professor_apelido': funcionario.get_apelido(),
+                        'data_inicio': inicio,
+                        'data_fim': fim,
+                    })
+
+        return {disciplina_id: dict(horarios) for disciplina_id, horarios in ocupacao.items()}
+
+    @staticmethod
+    def conflitos_itens(ocupacao, itens, data_inicio, data_fim):
+        """
+        Choques de itens de grade com a ocupação do grupo (ver ocupacao_grupo).
+        Cada item é verificado com uma consulta direta ao índice.
+
+        Args:
+            ocupacao: Resultado de ocupacao_grupo
+            itens: Iterável de (horario_aula_id, disciplina_id)
+            data_inicio, data_fim: Validade (date) dos itens
+
+        Returns:
+            list: [{'horario_aula_id', 'disciplina_id', 'aulas': [...]}]
+        """
+        inicio_iso, fim_iso = data_inicio.isoformat(), data_fim.isoformat()
+        conflitos = []
+        for horario_id, disciplina_id in itens:
+            aulas = [
+                aula for aula in ocupacao.get(str(disciplina_id), {}).get(str(horario_id), [])
+                if aula['data_inicio'] <= fim_iso and aula['data_fim'] >= inicio_iso
+            ]
+            if aulas:
+                conflitos.append({
+                    'horario_aula_id': str(horario_id),
+                    'disciplina_id': str(disciplina_id),
+                    'aulas': aulas,
+                })
+        return conflitos
+
+    # -------------------------------------------------------------------------
+    # Dados estáticos do editor de grade (GradeHorariaViewSet.dados_edicao)
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def versao_ano(ano):
+        """
+        Versão atual das grades do ano (pk + AnoLetivo.versao_grade), trocada a
+        cada reconstrução: chave do editor de grade e ETag das grades montadas
+        em memória (ver views de grade do app pedagogical).
+
+        Lida do banco, e não do próprio cache, para que a invalidação feita
+        por um worker valha para todos (mesmo esquema de AnoLetivoService._versao).
+
+        Queries: 1
+        """
+        from apps.core.models import AnoLetivo
+
+        linha = AnoLetivo.objects.filter(ano=ano).values_list('pk', 'versao_grade').first()
+        return f'{linha[0].hex}.{linha[1]}' if linha else 'inexistente'
+
+    @staticmethod
+    def obter_dados_edicao(ano, numero, letra, calcular):
+        """
+        Lê do cache os dados estáticos do editor de grade de um grupo
+        (ano, numero, letra), calculando e gravando em caso de ausência.
+
+        Args:
+            calcular: Função sem argumentos que produz o valor (serializável)
+        """
+        cache = caches[GRADE_EDICAO_CACHE_ALIAS]
+        versao = GradeHorariaService.versao_ano(ano)
+        chave = f'grade_edicao:{ano}:v{versao}:{numero}{letra}'
+
+        valor = cache.get(chave)
+        if valor is None:
+            valor = calcular()
+            cache.set(chave, valor, GRADE_EDICAO_CACHE_TIMEOUT)
+        return valor
+
+    @staticmethod
+    def invalidar_dados_edicao(ano):
+        """Invalida os dados do editor de grade de todos os grupos do ano."""
+        from apps.core.models import AnoLetivo
+
+        AnoLetivo.objects.filter(ano=ano).update(versao_grade=time.time_ns())
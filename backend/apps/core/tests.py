@@ -0,0 +1,261 @@
+import datetime
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.core.models import (
+    AnoLetivo, Curso, Disciplina, DisciplinaTurma, Funcionario, GradeHoraria,
+    GradeHorariaValidade, HorarioAula, ProfessorDisciplinaTurma, Turma,
+)
+from apps.core.services.gerador_grade_service import GeradorGradeService
+from apps.core.services.grade_horaria_service import GradeHorariaService
+from apps.core.utils import agendar_apos_commit
+from apps.users.models import User
+
+
+_pendentes = ContextVar('testes_pendentes', default=None)
+
+
+class AgendarAposCommitTests(TransactionTestCase):
+    """Marcações acumuladas por transação e processadas uma vez após o commit."""
+
+    def setUp(self):
+        self.processados = []
+        _pendentes.set(None)
+
+    def agendar(self, **marcacoes):
+        agendar_apos_commit(
+            _pendentes, {'itens': marcacoes.get('itens', ()), 'outros': marcacoes.get('outros', ())},
+            self.processados.append
+        )
+
+    def test_marcacoes_da_transacao_sao_processadas_uma_vez_apos_o_commit(self):
+        with transaction.atomic():
+            self.agendar(itens=['a'])
+            self.agendar(itens=['a', 'b'], outros=[1])
+            self.assertEqual(self.processados, [])
+
+        self.assertEqual(self.processados, [{'itens': {'a', 'b'}, 'outros': {1}}])
+
+    def test_transacao_desfeita_nao_processa_nada(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.agendar(itens=['desfeita'])
+                raise RuntimeError
+
+        self.assertEqual(self.processados, [])
+
+        # As marcações desfeitas não vazam para a transação seguinte
+        with transaction.atomic():
+            self.agendar(itens=['confirmada'])
+
+        self.assertEqual(self.processados, [{'itens': {'confirmada'}, 'outros': set()}])
+
+    def test_savepoint_desfeito_antes_da_primeira_marcacao_externa(self):
+        with transaction.atomic():
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.agendar(itens=['desfeita'])
+                    raise RuntimeError
+            self.agendar(itens=['confirmada'])
+
+        self.assertEqual(self.processados, [{'itens': {'confirmada'}, 'outros': set()}])
+
+    def test_fora_de_transacao_processa_imediatamente(self):
+        self.agendar(itens=['a'])
+
+        self.assertEqual(self.processados, [{'itens': {'a'}, 'outros': set()}])
+
+
+class GradeHorariaTestCase(TestCase):
+    """
+    Ano 2026 com dois grupos (1A e 2A), duas disciplinas com 2 aulas semanais
+    e quatro horários (segunda e terça, 1ª e 2ª aula).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = User.objects.create_superuser('gestor', 'g@cemep.local', 'x', tipo_usuario='GESTAO')
+        cls.ano = AnoLetivo.objects.create(ano=2026, is_active=True)
+        cls.curso = Curso.objects.create(nome='Informática', sigla='INF')
+        cls.mat = Disciplina.objects.create(nome='Matemática', sigla='MAT')
+        cls.por = Disciplina.objects.create(nome='Português', sigla='POR')
+
+        cls.horarios = {
+            (dia, numero): HorarioAula.objects.create(
+                ano_letivo=cls.ano, numero=numero, dia_semana=dia,
+                hora_inicio=datetime.time(6 + numero), hora_fim=datetime.time(6 + numero, 50)
+            )
+            for dia in (0, 1) for numero in (1, 2)
+        }
+
+        cls.professores = [
+            Funcionario.objects.create(
+                usuario=User.objects.create_user(f'prof{i}', password='x', tipo_usuario='PROFESSOR'),
+                matricula=i, apelido=f'P{i}'
+            )
+            for i in (1, 2)
+        ]
+
+        cls.turmas = {}
+        cls.disciplinas_turmas = {}
+        for numero in (1, 2):
+            turma = Turma.objects.create(numero=numero, letra='A', ano_letivo=2026, curso=cls.curso)
+            cls.turmas[numero] = turma
+            for disciplina in (cls.mat, cls.por):
+                cls.disciplinas_turmas[(numero, disciplina.sigla)] = DisciplinaTurma.objects.create(
+                    disciplina=disciplina, turma=turma, aulas_semanais=2
+                )
+
+    def validade(self, numero, inicio, fim, itens):
+        """Cria a validade do grupo {numero}A com os itens {(dia, aula): disciplina}."""
+        validade = GradeHorariaValidade.objects.create(
+            ano_letivo=self.ano, turma_numero=numero, turma_letra='A', data_inicio=inicio, data_fim=fim
+        )
+        GradeHoraria.objects.bulk_create([
+            GradeHoraria(validade=validade, horario_aula=self.horarios[chave], disciplina=disciplina, curso=self.curso)
+            for chave, disciplina in itens.items()
+        ])
+        return validade
+
+    def atribuir(self, professor, numero, disciplina, **kwargs):
+        return ProfessorDisciplinaTurma.objects.create(
+            professor=professor, disciplina_turma=self.disciplinas_turmas[(numero, disciplina.sigla)], **kwargs
+        )
+
+
+class ConstruirAnoTests(GradeHorariaTestCase):
+    """Linha do tempo dos caches e choques de professores em construir_ano."""
+
+    def test_linha_do_tempo_cobre_validades_e_trocas_de_professor(self):
+        p1, p2 = self.professores
+        self.validade(1, datetime.date(2026, 2, 1), datetime.date(2026, 6, 30), {(0, 1): self.mat, (0, 2): self.por})
+        self.validade(1, datetime.date(2026, 7, 1), datetime.date(2026, 12, 18), {(0, 1): self.por})
+        self.atribuir(p1, 1, self.mat, data_fim=datetime.date(2026, 3, 31))
+        self.atribuir(p2, 1, self.mat, tipo='SUBSTITUTO', data_inicio=datetime.date(2026, 4, 1))
+
+        grade = GradeHorariaService.construir_ano(
+            2026, turma_ids=[self.turmas[1].id], professor_ids=[], salvar=False,
+            referencia=datetime.date(2026, 3, 2)
+        )['turmas'][self.turmas[1].id]
+
+        def celula(data):
+            periodo = GradeHorariaService.periodo_em(grade, data)
+            return periodo and periodo['matriz']['1']['0']
+
+        self.assertEqual(
+            [(p['data_inicio'], p['data_fim']) for p in grade['periodos']],
+            [('2026-02-01', '2026-03-31'), ('2026-04-01', '2026-06-30'), ('2026-07-01', '2026-12-18')]
+        )
+        self.assertIsNone(celula(datetime.date(2026, 1, 20)))
+        self.assertEqual(celula(datetime.date(2026, 3, 2))['professor_apelido'], 'P1')
+        self.assertEqual(celula(datetime.date(2026, 5, 4))['professor_apelido'], 'P2')
+        self.assertEqual(celula(datetime.date(2026, 8, 3))['disciplina_sigla'], 'POR')
+
+        # Período de referência copiado em 'vigente' até o fim do intervalo
+        self.assertEqual(grade['vigente'], grade['periodos'][0])
+        self.assertEqual(grade['vigente_ate'], '2026-03-31')
+
+    def test_choque_de_professor_entre_grupos_sobrepostos(self):
+        p1 = self.professores[0]
+        self.validade(1, datetime.date(2026, 2, 1), datetime.date(2026, 6, 30), {(0, 1): self.mat})
+        self.validade(2, datetime.date(2026, 5, 1), datetime.date(2026, 12, 18), {(0, 1): self.mat, (1, 1): self.mat})
+        self.atribuir(p1, 1, self.mat)
+        self.atribuir(p1, 2, self.mat)
+
+        grade = GradeHorariaService.construir_ano(
+            2026, turma_ids=[], professor_ids=[p1.id], salvar=False
+        )['professores'][p1.id]
+
+        self.assertEqual(len(grade['conflitos']), 1)
+        conflito = grade['conflitos'][0]
+        self.assertEqual(conflito['horario_aula_id'], str(self.horarios[(0, 1)].id))
+        self.assertEqual((conflito['data_inicio'], conflito['data_fim']), ('2026-05-01', '2026-06-30'))
+        self.assertEqual({aula['grupo'] for aula in conflito['aulas']}, {'1A', '2A'})
+
+
+class SalvarLoteGradeHorariaTests(GradeHorariaTestCase):
+    """Edição em lote da grade: apenas a diferença é gravada."""
+
+    URL = '/api/v1/core/grades-horarias/salvar_lote/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.gestor)
+
+    def salvar(self, itens, **extra):
+        return self.client.post(self.URL, {
+            'turma_id': str(self.turmas[1].id),
+            'data_inicio': '2026-02-01',
+            'data_fim': '2026-12-18',
+            'grades': [
+                {'horario_aula': str(self.horarios[chave].id), 'disciplina': str(disciplina.id)}
+                for chave, disciplina in itens.items()
+            ],
+            **extra,
+        }, format='json')
+
+    def test_reenvio_grava_apenas_a_diferenca(self):
+        criacao = self.salvar({(0, 1): self.mat, (0, 2): self.por})
+        self.assertEqual(criacao.status_code, 201)
+        self.assertEqual(criacao.data['criados'], 2)
+
+        edicao = self.salvar(
+            {(0, 1): self.por, (1, 1): self.mat, (1, 2): self.por},
+            validade_id=str(criacao.data['validade_id'])
+        )
+
+        self.assertEqual(
+            (edicao.data['criados'], edicao.data['atualizados'], edicao.data['removidos']), (2, 1, 1)
+        )
+        itens = GradeHoraria.objects.filter(validade_id=criacao.data['validade_id'])
+        self.assertEqual(
+            {(i.horario_aula.dia_semana, i.horario_aula.numero): i.disciplina.sigla for i in itens},
+            {(0, 1): 'POR', (1, 1): 'MAT', (1, 2): 'POR'}
+        )
+
+        repeticao = self.salvar(
+            {(0, 1): self.por, (1, 1): self.mat, (1, 2): self.por},
+            validade_id=str(criacao.data['validade_id'])
+        )
+        self.assertEqual(
+            (repeticao.data['criados'], repeticao.data['atualizados'], repeticao.data['removidos']), (0, 0, 0)
+        )
+
+
+class GeradorGradeServiceTests(GradeHorariaTestCase):
+    """Grade gerada: cada grupo completo, sem choques de professor."""
+
+    def test_grade_gerada_e_valida(self):
+        p1, p2 = self.professores
+        for numero in (1, 2):
+            self.atribuir(p1, numero, self.mat)
+            self.atribuir(p2, numero, self.por)
+
+        relatorio = GeradorGradeService.gerar(
+            2026, datetime.date(2026, 2, 1), datetime.date(2026, 12, 18), tempo_limite=2, semente=1
+        )
+
+        self.assertEqual((relatorio['grupos'], relatorio['validades'], relatorio['aulas']), (2, 2, 8))
+        self.assertEqual((relatorio['choques'], relatorio['espalhamento']), (0, 0))
+
+        itens = list(GradeHoraria.objects.filter(validade__rascunho=True).select_related('validade', 'horario_aula'))
+        for numero in (1, 2):
+            do_grupo = [i for i in itens if i.validade.turma_numero == numero]
+            # Um item por horário e as aulas semanais de cada disciplina
+            self.assertEqual(len({i.horario_aula_id for i in do_grupo}), 4)
+            self.assertEqual(sorted(i.disciplina_id for i in do_grupo), sorted([self.mat.id] * 2 + [self.por.id] * 2))
+            # No máximo uma aula da disciplina por dia (espalhamento)
+            self.assertEqual(
+                len({(i.disciplina_id, i.horario_aula.dia_semana) for i in do_grupo}), 4
+            )
+
+        # Mesmo professor (mesma disciplina) nunca no mesmo horário em grupos diferentes
+        for disciplina in (self.mat, self.por):
+            horarios = [i.horario_aula_id for i in itens if i.disciplina_id == disciplina.id]
+            self.assertEqual(len(horarios), len(set(horarios)))
+
+        # Rascunhos não entram nos caches publicados
+        self.assertFalse(GradeHorariaValidade.objects.filter(rascunho=False).exists())
@@ -0,0 +1,84 @@
+"""
+Utilitários compartilhados entre os apps.
+"""
+import hashlib
+
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def gerar_etag(*partes):
+    """
+    Gera um ETag forte (entre aspas) a partir dos valores que determinam o
+    conteúdo da resposta (ex.: id, versão/gerado_em do cache, semana).
+    """
+    conteudo = '|'.join(str(parte) for parte in partes)
+    return '"%s"' % hashlib.sha256(conteudo.encode()).hexdigest()[:32]
+
+
+def resposta_com_etag(request, etag, construir):
+    """
+    Responde 304 (sem corpo) se o If-None-Match do cliente contém o ETag;
+    caso contrário chama construir() e responde 200 com o ETag.
+
+    Cache-Control 'private, no-cache': o navegador guarda a resposta, mas
+    sempre revalida com o servidor antes de usá-la.
+
+    Args:
+        request: Request do DRF
+        etag: ETag forte (ver gerar_etag)
+        construir: Função sem argumentos que devolve o corpo da resposta
+    """
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        # If-None-Match usa comparação fraca: W/"x" equivale a "x"
+        etags_cliente = [e.removeprefix('W/') for e in parse_etags(if_none_match)]
+        if '*' in etags_cliente or etag in etags_cliente:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(construir(), headers=headers)
+
+
+def agendar_apos_commit(pendentes, marcacoes, processar):
+    """
+    Acumula marcações para processá-las uma única vez após o commit.
+
+    Cada transação (bloco atomic mais externo) tem seu próprio conjunto,
+    capturado no callback registrado em on_commit. Se ela for desfeita, o
+    callback é descartado junto com as marcações, que não vazam para a
+    próxima transação do mesmo contexto. Fora de transação, processa
+    imediatamente.
+
+    Args:
+        pendentes: ContextVar com o estado da transação corrente
+            (conjunto acumulado, callback)
+        marcacoes: dict nome -> iterável com as novas marcações
+        processar: Função chamada com o dict nome -> set acumulado
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        processar({nome: set(valores) for nome, valores in marcacoes.items()})
+        return
+
+    estado = pendentes.get()
+    # O callback some de run_on_commit quando a transação (ou o savepoint em
+    # que foi registrado) é desfeita: nesse caso começa um conjunto novo.
+    if estado is None or not any(item[1] is estado[1] for item in connection.run_on_commit):
+        acumuladas = {nome: set() for nome in marcacoes}
+
+        def processar_transacao():
+            atual = pendentes.get()
+            if atual is not None and atual[0] is acumuladas:
+                pendentes.set(None)
+            processar(acumuladas)
+
+        estado = (acumuladas, processar_transacao)
+        pendentes.set(estado)
+        transaction.on_commit(processar_transacao)
+
+    for nome, valores in marcacoes.items():
+        estado[0][nome].update(valores)
@@ -6,6 +6,7 @@ from rest_framework.response import Response
 
 from apps.core.models import AnoLetivoSelecionado, AnoLetivo
 from apps.core.serializers import AnoLetivoSelecionadoSerializer
+from apps.core.services.ano_letivo_service import AnoLetivoService
 from core_project.permissions import Policy, AUTHENTICATED, NONE
 
 
@@ -29,7 +30,7 @@ class AnoLetivoSelecionadoViewSet(viewsets.ViewSet):
     def list(self, request):
         """Retorna o ano letivo selecionado do usuário atual."""
         # Garante que existe uma seleção ou cria a padrão
-        ano_ativo = AnoLetivo.objects.filter(is_active=True).first()
+        ano_ativo = AnoLetivoService.obter_ano_ativo()
         if not ano_ativo:
             # Tenta buscar qualquer ano se não tiver um ativo marcado, apenas para não quebrar (fallback de segurança)
             ano_ativo = AnoLetivo.objects.order_by('-ano').first()
@@ -36,6 +36,10 @@ class ArquivoViewSet(mixins.CreateModelMixin,
 
     parser_classes = [MultiPartParser, FormParser]
 
+    def get_queryset(self):
+        """Anota o ownership (OWNER) na consulta do arquivo."""
+        return super().get_queryset().annotate_is_owner(self.request.user)
+
     def perform_create(self, serializer):
         """Associa o usuário logado ao arquivo criado."""
         serializer.save(criado_por=self.request.user)
@@ -1,8 +1,12 @@
 from rest_framework import viewsets, status, decorators
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from apps.core.models import AnoLetivo, DiaLetivoExtra, DiaNaoLetivo
-from apps.core.serializers import AnoLetivoSerializer, DiaLetivoExtraSerializer, DiaNaoLetivoSerializer
+from apps.core.serializers import (
+    AnoLetivoSerializer, DiaLetivoExtraSerializer, DiaNaoLetivoSerializer, CalendarioLoteSerializer
+)
+from apps.core.services.calendario_service import CalendarioService
 from core_project.permissions import Policy, GESTAO, AUTHENTICATED
 
 
@@ -27,6 +31,7 @@ class AnoLetivoViewSet(viewsets.ModelViewSet):
                 'add_dia_nao_letivo': [GESTAO],
                 'add_dia_letivo_extra': [GESTAO],
                 'remove_dia': [GESTAO],
+                'calendario_lote': [GESTAO],
             }
         )
     ]
@@ -44,6 +49,41 @@ class AnoLetivoViewSet(viewsets.ModelViewSet):
             'dias_letivos_extras': dias_extras
         })
 
+    @decorators.action(detail=True, methods=['post'], url_path='calendario-lote')
+    def calendario_lote(self, request, ano=None):
+        """
+        Aplica em lote alterações no calendário: datas dos bimestres, inclusão/
+        atualização de dias não letivos e extras (pela data) e remoção por ID.
+        Os controles do ano são recalculados uma única vez ao final.
+
+        Payload:
+        {
+            "data_fim_1bim": "2026-04-17",
+            "dias_nao_letivos": [{"data": "2026-04-21", "tipo": "FERIADO", "descricao": "Tiradentes"}],
+            "dias_letivos_extras": [{"data": "2026-05-16", "descricao": "Sábado letivo"}],
+            "remover_dias_nao_letivos": ["uuid"],
+            "remover_dias_letivos_extras": ["uuid"]
+        }
+        """
+        ano_obj = self.get_object()
+        serializer = CalendarioLoteSerializer(data=request.data, context={'ano_letivo': ano_obj})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            resumo = CalendarioService.aplicar_lote(ano_obj, **serializer.validated_data)
+        except ValidationError as e:
+            return Response(
+                e.message_dict if hasattr(e, 'message_dict') else {'error': list(e.messages)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ano_obj.refresh_from_db()
+        return Response({
+            'resumo': resumo,
+            'ano_letivo': AnoLetivoSerializer(ano_obj).data,
+        })
+
     @decorators.action(detail=True, methods=['post'], url_path='dia-nao-letivo')
     def add_dia_nao_letivo(self, request, ano=None):
         """Cria e adiciona um dia não letivo ao ano."""
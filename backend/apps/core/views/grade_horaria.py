@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.db import transaction, models
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from collections import defaultdict
 
 from apps.core.models import (
     GradeHoraria, GradeHorariaValidade, Turma, 
@@ -17,6 +18,7 @@ from apps.core.serializers.grade_horaria import (
 )
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from core_project.permissions import Policy, GESTAO, SECRETARIA, FUNCIONARIO
+from apps.core.services.grade_horaria_service import GradeHorariaService
 
 
 class GradeHorariaViewSet(viewsets.ModelViewSet):
@@ -35,6 +37,7 @@ class GradeHorariaViewSet(viewsets.ModelViewSet):
         custom={
             'dados_edicao': [GESTAO, SECRETARIA],
             'salvar_lote': [GESTAO, SECRETARIA],
+            'conflitos': [GESTAO, SECRETARIA],
         }
     )]
 
@@ -48,6 +51,15 @@ class GradeHorariaViewSet(viewsets.ModelViewSet):
         Query params:
             - turma_id: ID de uma das turmas do grupo (ex: 1º Ano A Info)
             - validade_id: (Opcional) ID da validade para carregar grades existentes
+
+        Turmas, disciplinas, horários, validades e a ocupação dos professores
+        em outros grupos ficam em cache por (ano, numero, letra) e são
+        invalidados quando a grade do ano é alterada.
+
+        ocupacao_professores: {disciplina_id: {horario_aula_id: [aulas]}} -
+        aulas que o professor da disciplina já tem em outro grupo naquele
+        horário. Ao posicionar uma disciplina, o editor verifica o choque com
+        uma consulta direta (comparando os intervalos com a validade).
         """
         turma_id = request.query_params.get('turma_id')
         validade_id = request.query_params.get('validade_id')
@@ -57,37 +69,75 @@ class GradeHorariaViewSet(viewsets.ModelViewSet):
 
         turma_ref = get_object_or_404(Turma, id=turma_id)
 
+        estaticos = GradeHorariaService.obter_dados_edicao(
+            turma_ref.ano_letivo, turma_ref.numero, turma_ref.letra,
+            lambda: self._dados_edicao_grupo(turma_ref)
+        )
+
+        # Validade selecionada: a informada, senão a vigente, senão a mais recente.
+        # Rascunhos só são abertos quando informados em validade_id.
+        validades = estaticos['validades']
+        validade_selecionada = None
+        if validade_id:
+            validade_selecionada = next((v for v in validades if str(v['id']) == validade_id), None)
+        else:
+            publicadas = [v for v in validades if not v['rascunho']]
+            hoje = timezone.localdate().isoformat()
+            validade_selecionada = next(
+                (v for v in publicadas if str(v['data_inicio']) <= hoje <= str(v['data_fim'])),
+                publicadas[0] if publicadas else None
+            )
+
+        grades_data = []
+        if validade_selecionada:
+            itens = GradeHoraria.objects.filter(validade_id=validade_selecionada['id'])
+            grades_data = GradeHorariaSerializer(itens, many=True).data
+
+        return Response({
+            'ano_letivo': turma_ref.ano_letivo,
+            'turmas': estaticos['turmas'],
+            'disciplinas': estaticos['disciplinas'],
+            'horarios_aula': estaticos['horarios_aula'],
+            'validades': validades,
+            'ocupacao_professores': estaticos['ocupacao_professores'],
+            'validade_selecionada': validade_selecionada,
+            'grades': grades_data
+        })
+
+    @staticmethod
+    def _dados_edicao_grupo(turma_ref):
+        """
+        Monta as partes estáticas do editor para o grupo da turma
+        (7 queries, independente do número de turmas e disciplinas).
+        """
         # 1. Identificar todas as turmas irmãs (mesmo ano, numero, letra)
-        turmas_irmas = Turma.objects.filter(
+        turmas_irmas = list(Turma.objects.filter(
             ano_letivo=turma_ref.ano_letivo,
             numero=turma_ref.numero,
             letra=turma_ref.letra,
             is_active=True
-        ).select_related('curso')
+        ).select_related('curso'))
 
-        # 2. Buscar disciplinas vinculadas a QUALQUER uma dessas turmas
-        # Precisamos saber qual turma fornece qual disciplina para salvar o curso correto depois
-        disciplinas_ids = DisciplinaTurma.objects.filter(
+        # 2. Disciplina -> turmas irmãs que a oferecem (em uma única query)
+        turmas_por_disciplina = defaultdict(set)
+        for disciplina_id, t_id in DisciplinaTurma.objects.filter(
             turma__in=turmas_irmas
-        ).values_list('disciplina_id', flat=True).distinct()
+        ).values_list('disciplina_id', 'turma_id'):
+            turmas_por_disciplina[disciplina_id].add(t_id)
 
-        disciplinas = Disciplina.objects.filter(id__in=disciplinas_ids).order_by('nome')
+        disciplinas = Disciplina.objects.filter(id__in=turmas_por_disciplina.keys()).order_by('nome')
 
         # Enriquecer disciplinas com sigla do curso (se for específica de um curso)
-        # Se a disciplina existe em todas as turmas irmãs, é "Comum". Se só em uma, é "Especifica".
+        # Se a disciplina existe em todas as turmas irmãs, é "Comum". Se só em algumas,
+        # pega a sigla da primeira. No frontend, exibir a sigla ajuda a distinguir
+        # "Matemática (EnsMed)" de "Matemática (Tec)" se houver.
         disciplinas_data = []
         for d in disciplinas:
-            turmas_vinculadas = [
-                t for t in turmas_irmas 
-                if t.disciplinas_vinculadas.filter(disciplina=d).exists()
-            ]
-            
-            # Se vinculado a todas, curso = None/Comum. Se vinculado a algumas, pega a sigla da primeira.
-            # No frontend, exibir a sigla ajuda a distinguir "Matemática (EnsMed)" de "Matemática (Tec)" se houver.
+            vinculadas = turmas_por_disciplina[d.id]
             curso_sigla = None
-            if len(turmas_vinculadas) < len(turmas_irmas) and len(turmas_vinculadas) > 0:
-                 curso_sigla = turmas_vinculadas[0].curso.sigla
-            
+            if len(vinculadas) < len(turmas_irmas):
+                curso_sigla = next(t.curso.sigla for t in turmas_irmas if t.id in vinculadas)
+
             d_data = DisciplinaSimplificadaSerializer(d).data
             d_data['curso_sigla'] = curso_sigla
             disciplinas_data.append(d_data)
@@ -104,46 +154,33 @@ class GradeHorariaViewSet(viewsets.ModelViewSet):
             turma_letra=turma_ref.letra
         ).order_by('-data_inicio')
 
-        # 5. Se validade_id informada, carregar grades dela
-        grades_data = []
-        validade_selecionada = None
-        if validade_id:
-            try:
-                validade = validades.get(id=validade_id)
-                itens = GradeHoraria.objects.filter(validade=validade)
-                grades_data = GradeHorariaSerializer(itens, many=True).data
-                validade_selecionada = GradeHorariaValidadeSerializer(validade).data
-            except GradeHorariaValidade.DoesNotExist:
-                pass
-        
-        # Se não informou validade, mas existem validades, tenta pegar a vigente
-        elif validades.exists():
-            hoje = timezone.now().date()
-            vigente = validades.filter(data_inicio__lte=hoje, data_fim__gte=hoje).first()
-            # Se não tem vigente, pega a última (mais recente)
-            if not vigente:
-                vigente = validades.first()
-            
-            if vigente:
-                validade = vigente
-                itens = GradeHoraria.objects.filter(validade=vigente)
-                grades_data = GradeHorariaSerializer(itens, many=True).data
-                validade_selecionada = GradeHorariaValidadeSerializer(vigente).data
-
-        return Response({
-            'ano_letivo': turma_ref.ano_letivo,
+        return {
             'turmas': TurmaSimplificadaSerializer(turmas_irmas, many=True).data,
             'disciplinas': disciplinas_data,
             'horarios_aula': HorarioAulaSerializer(horarios, many=True).data,
             'validades': GradeHorariaValidadeSerializer(validades, many=True).data,
-            'validade_selecionada': validade_selecionada,
-            'grades': grades_data
-        })
+            # 5. Ocupação dos professores do grupo em outros grupos (índice de choques)
+            'ocupacao_professores': GradeHorariaService.ocupacao_grupo(
+                turma_ref.ano_letivo, turma_ref.numero, turma_ref.letra
+            ),
+        }
 
     @action(detail=False, methods=['post'])
     def salvar_lote(self, request):
         """
         Salva uma grade horária completa (Validade + Itens).
+
+        Operação em conjunto, com número constante de queries: vínculos de
+        disciplina e horários do grupo são carregados uma vez, todos os itens
+        são validados em memória e comparados com os existentes; depois
+        apenas as diferenças são gravadas (delete, bulk_update, bulk_create)
+        e o cache do grupo é reconstruído uma única vez.
+
+        Choques com aulas dos mesmos professores em outros grupos não impedem
+        o salvamento; são devolvidos em 'conflitos' para o editor avisar.
+
+        Sem 'rascunho' no payload, a validade existente mantém o estado atual
+        (um rascunho gerado só é publicado com rascunho=false explícito).
         """
         serializer = GradeHorariaEdicaoSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -152,23 +189,80 @@ class GradeHorariaViewSet(viewsets.ModelViewSet):
         turma_ref = get_object_or_404(Turma, id=dados['turma_id'])
         ano_letivo_obj = turma_ref.get_ano_letivo_object
 
-        with transaction.atomic():
-            # 1. Gerenciar GradeHorariaValidade
+        # 1. Vínculos do grupo: disciplina -> curso da primeira turma que a oferece
+        # (item de grade tem FK para Curso; disciplina comum usa a primeira turma)
+        disciplina_curso_map = {}
+        for disciplina_id, curso_id in DisciplinaTurma.objects.filter(
+            turma__ano_letivo=turma_ref.ano_letivo,
+            turma__numero=turma_ref.numero,
+            turma__letra=turma_ref.letra
+        ).order_by('-turma__ano_letivo', 'turma__numero', 'turma__letra').values_list(
+            'disciplina_id', 'turma__curso_id'
+        ):
+            disciplina_curso_map.setdefault(disciplina_id, curso_id)
+
+        horarios_ano = set(
+            HorarioAula.objects.filter(ano_letivo=ano_letivo_obj).values_list('id', flat=True)
+        )
+
+        # 2. Validação de todos os itens em memória: horario_aula -> (disciplina, curso)
+        desejados = {}
+        for item in dados['grades']:
+            horario_id = item.get('horario_aula')
+            disciplina_id = item.get('disciplina')
+
+            if not horario_id or not disciplina_id:
+                raise serializers.ValidationError({'error': 'Cada item deve informar horario_aula e disciplina.'})
+            if horario_id not in horarios_ano:
+                raise serializers.ValidationError({
+                    'error': f'O horário de aula {horario_id} não pertence ao ano letivo {turma_ref.ano_letivo}.'
+                })
+            if disciplina_id not in disciplina_curso_map:
+                raise serializers.ValidationError({
+                    'error': f'A disciplina {disciplina_id} não está vinculada a nenhuma turma '
+                             f'do grupo {turma_ref.numero}{turma_ref.letra} no ano {turma_ref.ano_letivo}.'
+                })
+            if horario_id in desejados:
+                raise serializers.ValidationError({'error': f'O horário de aula {horario_id} foi informado mais de uma vez.'})
+
+            desejados[horario_id] = (disciplina_id, disciplina_curso_map[disciplina_id])
+
+        # Choques de professores com outros grupos (índice de ocupação)
+        conflitos = GradeHorariaService.conflitos_itens(
+            GradeHorariaService.ocupacao_grupo(turma_ref.ano_letivo, turma_ref.numero, turma_ref.letra),
+            [(horario_id, disciplina_id) for horario_id, (disciplina_id, _) in desejados.items()],
+            dados['data_inicio'], dados['data_fim']
+        )
+
+        with transaction.atomic(), GradeHorariaService.lote():
+            # 3. Gerenciar GradeHorariaValidade
             try:
                 if dados.get('validade_id'):
-                    validade = get_object_or_404(GradeHorariaValidade, id=dados['validade_id'])
-                    validade.data_inicio = dados['data_inicio']
-                    validade.data_fim = dados['data_fim']
-                    # Validar conflitos (o clean() do model já faz isso, mas precisamos excluir o próprio ID)
-                    # O save() chamará clean()
-                    validade.save()
+                    validade = get_object_or_404(
+                        GradeHorariaValidade,
+                        id=dados['validade_id'],
+                        ano_letivo=ano_letivo_obj,
+                        turma_numero=turma_ref.numero,
+                        turma_letra=turma_ref.letra
+                    )
+                    rascunho = dados.get('rascunho', validade.rascunho)
+                    if (validade.data_inicio, validade.data_fim, validade.rascunho) != (
+                        dados['data_inicio'], dados['data_fim'], rascunho
+                    ):
+                        validade.data_inicio = dados['data_inicio']
+                        validade.data_fim = dados['data_fim']
+                        # Publicar um rascunho passa pela checagem de sobreposição
+                        validade.rascunho = rascunho
+                        # O save() chamará clean(), que valida conflitos excluindo o próprio ID
+                        validade.save()
                 else:
                     validade = GradeHorariaValidade(
                         ano_letivo=ano_letivo_obj,
                         turma_numero=turma_ref.numero,
                         turma_letra=turma_ref.letra,
                         data_inicio=dados['data_inicio'],
-                        data_fim=dados['data_fim']
+                        data_fim=dados['data_fim'],
+                        rascunho=dados.get('rascunho', False)
                     )
                     validade.save() # Vai validar conflitos de datas no clean()
             except ValidationError as e:
@@ -186,76 +280,77 @@ class GradeHorariaViewSet(viewsets.ModelViewSet):
                 # Logar se necessário
                 raise serializers.ValidationError({'error': f'Erro ao salvar grade: {str(e)}'})
 
-            # 2. Limpar itens antigos dessa validade
-            validade.itens_grade.all().delete()
-
-            # 3. Criar novos itens
-            novos_itens = []
-            
-            # Cache de Turmas por Disciplina para definir o Curso do item
-            # (Necessário porque item de grade tem FK para Curso)
-            # Estrattégia: Se a disciplina é da Turma A, usa curso da Turma A.
-            # Se for comum (A e B), usa curso da Turma A (arbitrário, mas consistente).
-            turmas_irmas = Turma.objects.filter(
-                ano_letivo=turma_ref.ano_letivo,
-                numero=turma_ref.numero,
-                letra=turma_ref.letra
-            ).select_related('curso').prefetch_related('disciplinas_vinculadas')
-
-            disciplina_curso_map = {}
-            for t in turmas_irmas:
-                # IDs das disciplinas dessa turma
-                d_ids = t.disciplinas_vinculadas.values_list('disciplina_id', flat=True)
-                for d_id in d_ids:
-                    if d_id not in disciplina_curso_map:
-                        disciplina_curso_map[d_id] = t.curso
-            
-            for item in dados['grades']:
-                horario_id = item['horario_aula']
-                disciplina_id = item['disciplina']
-
-                # Curso
-                curso = disciplina_curso_map.get(disciplina_id)
-                if not curso:
-                    # Disciplina não está vinculada a nenhuma das turmas irmãs?
-                    # Pode acontecer se removeram o vínculo mas o frontend mandou.
-                    # Fallback: curso da turma de referência ou erro.
-                    curso = turma_ref.curso
-
-                novos_itens.append(
-                    GradeHoraria(
-                        validade=validade,
-                        horario_aula_id=horario_id,
-                        disciplina_id=disciplina_id,
-                        curso=curso
-                    )
+            # 4. Diferença entre os itens existentes e os enviados (chave: horario_aula)
+            remover = []
+            atualizar = []
+            existentes = set()
+            for item in GradeHoraria.objects.filter(validade=validade).only(
+                'id', 'horario_aula_id', 'disciplina_id', 'curso_id'
+            ):
+                existentes.add(item.horario_aula_id)
+                desejado = desejados.get(item.horario_aula_id)
+                if desejado is None:
+                    remover.append(item.id)
+                elif (item.disciplina_id, item.curso_id) != desejado:
+                    item.disciplina_id, item.curso_id = desejado
+                    atualizar.append(item)
+
+            criar = [
+                GradeHoraria(
+                    validade=validade,
+                    horario_aula_id=horario_id,
+                    disciplina_id=disciplina_id,
+                    curso_id=curso_id
                 )
+                for horario_id, (disciplina_id, curso_id) in desejados.items()
+                if horario_id not in existentes
+            ]
+
+            # 5. Aplicar (operações em massa não passam pelo save()/delete() do item)
+            if remover:
+                GradeHoraria.objects.filter(id__in=remover).delete()
+            if atualizar:
+                GradeHoraria.objects.bulk_update(atualizar, ['disciplina', 'curso'])
+            if criar:
+                GradeHoraria.objects.bulk_create(criar)
 
-            GradeHoraria.objects.bulk_create(novos_itens)
-
-            # 4. Trigger de Cache (O save() da validade já trigga rebuild turmas, 
-            # mas o bulk_create de itens NÃO trigga signals de itens).
-            # Precisamos forçar o rebuild das turmas envolvidas e professores citados.
-            validade._rebuild_turmas()
-            
-            # Rebuild professores
-            # Pegar todos os professores das disciplinas usadas
-            # (Otimização: fazer isso via tarefa assíncrona se fosse muito pesado, mas aqui é ok)
-            professores_ids = set()
-            disciplinas_ids = [item.disciplina_id for item in novos_itens]
-            
-            from django.apps import apps
-            pdts = apps.get_model('core', 'ProfessorDisciplinaTurma').objects.filter(
-                disciplina_turma__turma__in=turmas_irmas,
-                disciplina_turma__disciplina_id__in=disciplinas_ids
-            ).values_list('professor_id', flat=True)
-            
-            for pid in pdts:
-                # Importar model aqui para evitar circular dependency no topo se houver
-                Funcionario = apps.get_model('core', 'Funcionario')
-                Funcionario.objects.get(id=pid).build_grade_horaria(save=True)
+            # 6. Trigger de Cache: agenda turmas do grupo e seus professores
+            # (reconstruídos uma vez, após o commit)
+            if remover or atualizar or criar:
+                validade._rebuild_turmas()
 
         return Response({
             'message': 'Grade salva com sucesso',
-            'validade_id': validade.id
+            'validade_id': validade.id,
+            'criados': len(criar),
+            'atualizados': len(atualizar),
+            'removidos': len(remover),
+            'conflitos': conflitos
         }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def conflitos(self, request):
+        """
+        Lista os choques de horário de professores no ano letivo: aulas de
+        grupos diferentes no mesmo horário, com validades sobrepostas.
+
+        Query params:
+            - ano: (Opcional) Ano letivo. Padrão: ano letivo selecionado
+        """
+        ano = request.query_params.get('ano')
+        if ano:
+            if not ano.isdigit():
+                return Response({'error': 'Ano inválido.'}, status=400)
+            ano = int(ano)
+        else:
+            ano_letivo = request.user.get_ano_letivo_selecionado()
+            if not ano_letivo:
+                return Response({'error': 'Nenhum ano letivo selecionado.'}, status=400)
+            ano = ano_letivo.ano
+
+        conflitos = GradeHorariaService.conflitos_ano(ano)
+        return Response({
+            'ano_letivo': ano,
+            'total': len(conflitos),
+            'conflitos': conflitos
+        })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Avaliacao, ControleVisto, NotaAvaliacao, NotaBimestral, AvaliacaoConfigDisciplinaTurma
+from .models import Avaliacao, ControleVisto, NotaAvaliacao, NotaBimestral, AvaliacaoConfigDisciplinaTurma, Boletim
 
 @admin.register(Avaliacao)
 class AvaliacaoAdmin(admin.ModelAdmin):
@@ -62,3 +62,11 @@ class AvaliacaoConfigDisciplinaTurmaAdmin(admin.ModelAdmin):
     )
     raw_id_fields = ('ano_letivo', 'disciplina_turma')
     ordering = ('-ano_letivo', 'disciplina_turma__turma__numero')
+
+@admin.register(Boletim)
+class BoletimAdmin(admin.ModelAdmin):
+    list_display = ('matricula_turma', 'atualizado_em')
+    list_filter = ('matricula_turma__turma__ano_letivo',)
+    search_fields = ('matricula_turma__matricula_cemep__estudante__nome_social',)
+    raw_id_fields = ('matricula_turma',)
+    readonly_fields = ('dados', 'assinatura', 'atualizado_em')
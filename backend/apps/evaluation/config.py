@@ -8,8 +8,13 @@ IMPORTANTE:
 - As constantes definidas aqui são VALORES PADRÃO usados para inicialização
 - Em runtime, os valores devem ser obtidos de AnoLetivo.controles['avaliacao']
 - Use get_config_from_ano_letivo(ano_letivo) para obter as configs de um ano específico
+- Para validar/arredondar notas use regras_avaliacao(ano_letivo): objeto imutável
+  (RegrasAvaliacao) com os Decimals e o arredondamento já preparados, em cache
+  por versão da configuração do ano
 """
 from decimal import Decimal, ROUND_CEILING, ROUND_HALF_UP
+from functools import lru_cache, partial
+from types import MappingProxyType
 from typing import Callable
 
 # -----------------------------------------------------------------------------
@@ -43,6 +48,18 @@ OPCOES_REGRA_ARREDONDAMENTO = [
     ('SEMPRE_PARA_CIMA_05', 'Arredondamento Sempre para Cima (Múltiplos de 0,5)'),
 ]
 
+# Regras de arredondamento em múltiplos de 0,5 (incremento de nota = 0,5)
+_REGRAS_MULTIPLOS_05 = ('FAIXAS_MULTIPLOS_05', 'SEMPRE_PARA_CIMA_05')
+
+
+def _choices_frontend() -> dict:
+    """Choices no formato do frontend (listas novas a cada chamada)."""
+    return {
+        "BIMESTRE_CHOICES": [{"id": k, "label": v} for k, v in BIMESTRE_CHOICES],
+        "OPCOES_FORMA_CALCULO": [{"id": k, "label": v} for k, v in OPCOES_FORMA_CALCULO],
+        "OPCOES_REGRA_ARREDONDAMENTO": [{"id": k, "label": v} for k, v in OPCOES_REGRA_ARREDONDAMENTO],
+    }
+
 
 # =============================================================================
 # FUNÇÕES PARA OBTER CONFIGURAÇÃO DO ANO LETIVO
@@ -50,24 +67,28 @@ OPCOES_REGRA_ARREDONDAMENTO = [
 
 def get_config_from_ano_letivo(ano_letivo) -> dict:
     """
-    Retorna as configurações de avaliação do ano letivo.
-    Acessa diretamente AnoLetivo.controles['avaliacao'].
+    Retorna as configurações de avaliação do ano letivo (dict novo, com as
+    choices do frontend). Acessa AnoLetivo.controles['avaliacao'] via
+    regras_avaliacao (em cache).
+    """
+    return {**regras_avaliacao(ano_letivo).config, **_choices_frontend()}
+
+
+def regras_avaliacao(ano_letivo) -> 'RegrasAvaliacao':
+    """
+    Retorna as regras de avaliação (RegrasAvaliacao) do ano letivo.
+
+    O cache é indexado pelo conteúdo de controles['avaliacao']: qualquer
+    alteração na configuração do ano gera uma nova versão (novo objeto),
+    sem necessidade de invalidação.
     """
     cfg = ano_letivo.controles['avaliacao']
-    
-    return {
-        "VALOR_MAXIMO": cfg['valor_maximo'],
-        "MEDIA_APROVACAO": cfg['media_aprovacao'],
-        "FORMA_CALCULO": cfg['forma_calculo'],
-        "REGRA_ARREDONDAMENTO": cfg['regra_arredondamento'],
-        "CASAS_DECIMAIS_BIMESTRAL": cfg['casas_decimais_bimestral'],
-        "CASAS_DECIMAIS_AVALIACAO": cfg['casas_decimais_avaliacao'],
-        "LIVRE_ESCOLHA_PROFESSOR": cfg['livre_escolha_professor'],
-        "PODE_CRIAR": cfg.get('pode_criar', False),
-        "BIMESTRE_CHOICES": [{"id": k, "label": v} for k, v in BIMESTRE_CHOICES],
-        "OPCOES_FORMA_CALCULO": [{"id": k, "label": v} for k, v in OPCOES_FORMA_CALCULO],
-        "OPCOES_REGRA_ARREDONDAMENTO": [{"id": k, "label": v} for k, v in OPCOES_REGRA_ARREDONDAMENTO],
-    }
+    return _regras_da_versao(tuple(sorted(cfg.items())))
+
+
+@lru_cache(maxsize=64)
+def _regras_da_versao(versao: tuple) -> 'RegrasAvaliacao':
+    return RegrasAvaliacao(dict(versao))
 
 
 
@@ -110,6 +131,18 @@ _MAPA_ARREDONDAMENTO: dict[str, Callable[[Decimal, int], Decimal]] = {
 }
 
 
+def _construir_arredondador(regra: str, casas: int) -> Callable[[Decimal], Decimal]:
+    """
+    Retorna a função de arredondamento da regra (de _MAPA_ARREDONDAMENTO) com
+    as casas decimais já fixadas.
+    Regra inválida: função identidade (mesmo comportamento de arredondar).
+    """
+    func = _MAPA_ARREDONDAMENTO.get(regra)
+    if func is None:
+        return lambda valor: valor
+    return partial(func, casas=casas)
+
+
 def arredondar(
     valor: Decimal,
     regra: str,
@@ -142,12 +175,22 @@ def arredondar_bimestral(valor: Decimal, ano_letivo) -> Decimal:
         valor: Valor a ser arredondado
         ano_letivo: Instância de AnoLetivo para obter a config
     """
-    cfg = get_config_from_ano_letivo(ano_letivo)
-    return arredondar(
-        valor,
-        cfg["REGRA_ARREDONDAMENTO"],
-        cfg["CASAS_DECIMAIS_BIMESTRAL"]
-    )
+    return regras_avaliacao(ano_letivo).arredondar_bimestral(valor)
+
+
+def arredondar_bimestral_lote(valores: list, ano_letivo) -> list:
+    """
+    Arredonda uma lista de valores para nota bimestral em uma única passada.
+    Valores None são preservados.
+
+    Args:
+        valores: Lista de Decimal (ou None)
+        ano_letivo: Instância de AnoLetivo para obter a config
+
+    Returns:
+        Lista de valores arredondados, na mesma ordem da entrada.
+    """
+    return regras_avaliacao(ano_letivo).arredondar_bimestral_lote(valores)
 
 
 def arredondar_avaliacao(valor: Decimal, ano_letivo) -> Decimal:
@@ -158,12 +201,7 @@ def arredondar_avaliacao(valor: Decimal, ano_letivo) -> Decimal:
         valor: Valor a ser arredondado
         ano_letivo: Instância de AnoLetivo para obter a config
     """
-    cfg = get_config_from_ano_letivo(ano_letivo)
-    return arredondar(
-        valor,
-        cfg["REGRA_ARREDONDAMENTO"],
-        cfg["CASAS_DECIMAIS_AVALIACAO"]
-    )
+    return regras_avaliacao(ano_letivo).arredondar_avaliacao(valor)
 
 
 def valida_valor_nota(nota: Decimal, ano_letivo) -> bool:
@@ -173,22 +211,128 @@ def valida_valor_nota(nota: Decimal, ano_letivo) -> bool:
     - Respeita o incremento exigido pela regra de arredondamento
     - Zero é sempre considerado válido
     """
-    cfg = ano_letivo.controles['avaliacao']
-    
-    max_valor = Decimal(str(cfg['valor_maximo']))
-    regra = cfg['regra_arredondamento']
-    casas = cfg['casas_decimais_avaliacao']
+    return regras_avaliacao(ano_letivo).valida_valor(nota)
 
-    if nota < 0 or nota > max_valor:
-        return False
 
-    if nota == 0:
-        return True
+# =============================================================================
+# REGRAS DE AVALIAÇÃO PRÉ-COMPILADAS POR ANO LETIVO
+# =============================================================================
 
-    # Regras baseadas em múltiplos de 0.5
-    if regra in ('FAIXAS_MULTIPLOS_05', 'SEMPRE_PARA_CIMA_05'):
-        return (nota * _D2) % _D1 == 0
+class RegrasAvaliacao:
+    """
+    Configuração de avaliação de um ano letivo já convertida para uso nos
+    cálculos: Decimals, quantizadores e função de arredondamento criados uma
+    única vez. Imutável (compartilhada pelo cache de regras_avaliacao): config
+    é um MappingProxyType; use get_config_from_ano_letivo para um dict.
+
+    Uso:
+        regras = regras_avaliacao(ano_letivo)
+        regras.valida_valores(notas)
+        regras.arredondar_bimestral_lote(valores)
+    """
+
+    __slots__ = (
+        'valor_maximo', 'media_aprovacao', 'forma_calculo', 'regra_arredondamento',
+        'casas_decimais_bimestral', 'casas_decimais_avaliacao', 'livre_escolha_professor',
+        'pode_criar', 'config',
+        '_fator_incremento', '_fator_casas_avaliacao', '_arredondar_bimestral', '_arredondar_avaliacao',
+    )
 
-    # Regras baseadas em número fixo de casas decimais
-    fator = _D1.scaleb(casas)
-    return (nota * fator) % _D1 == 0
+    def __init__(self, cfg: dict):
+        atributos = {
+            'valor_maximo': Decimal(str(cfg['valor_maximo'])),
+            'media_aprovacao': Decimal(str(cfg['media_aprovacao'])),
+            'forma_calculo': cfg['forma_calculo'],
+            'regra_arredondamento': cfg['regra_arredondamento'],
+            'casas_decimais_bimestral': cfg['casas_decimais_bimestral'],
+            'casas_decimais_avaliacao': cfg['casas_decimais_avaliacao'],
+            'livre_escolha_professor': cfg['livre_escolha_professor'],
+            'pode_criar': cfg.get('pode_criar', False),
+        }
+        regra = atributos['regra_arredondamento']
+        casas_avaliacao = atributos['casas_decimais_avaliacao']
+
+        atributos['config'] = MappingProxyType({
+            "VALOR_MAXIMO": cfg['valor_maximo'],
+            "MEDIA_APROVACAO": cfg['media_aprovacao'],
+            "FORMA_CALCULO": cfg['forma_calculo'],
+            "REGRA_ARREDONDAMENTO": regra,
+            "CASAS_DECIMAIS_BIMESTRAL": atributos['casas_decimais_bimestral'],
+            "CASAS_DECIMAIS_AVALIACAO": casas_avaliacao,
+            "LIVRE_ESCOLHA_PROFESSOR": cfg['livre_escolha_professor'],
+            "PODE_CRIAR": atributos['pode_criar'],
+        })
+        # Incremento exigido da nota (0,5 nas regras por faixas, senão 10^-casas),
+        # expresso como o fator que torna a nota inteira
+        atributos['_fator_casas_avaliacao'] = _D1.scaleb(casas_avaliacao)
+        atributos['_fator_incremento'] = _D2 if regra in _REGRAS_MULTIPLOS_05 else atributos['_fator_casas_avaliacao']
+        atributos['_arredondar_bimestral'] = _construir_arredondador(regra, atributos['casas_decimais_bimestral'])
+        atributos['_arredondar_avaliacao'] = _construir_arredondador(regra, casas_avaliacao)
+
+        for nome, valor in atributos.items():
+            object.__setattr__(self, nome, valor)
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError('RegrasAvaliacao é imutável.')
+
+    def __repr__(self):
+        return f"RegrasAvaliacao({self.regra_arredondamento}, max={self.valor_maximo})"
+
+    # -------------------------------------------------------------------------
+    # Arredondamento
+    # -------------------------------------------------------------------------
+
+    def arredondar_bimestral(self, valor: Decimal) -> Decimal:
+        return self._arredondar_bimestral(valor)
+
+    def arredondar_avaliacao(self, valor: Decimal) -> Decimal:
+        return self._arredondar_avaliacao(valor)
+
+    def arredondar_bimestral_lote(self, valores) -> list:
+        """Arredonda uma sequência (None é preservado)."""
+        func = self._arredondar_bimestral
+        return [None if v is None else func(v) for v in valores]
+
+    def arredondar_avaliacao_lote(self, valores) -> list:
+        """Arredonda uma sequência (None é preservado)."""
+        func = self._arredondar_avaliacao
+        return [None if v is None else func(v) for v in valores]
+
+    # -------------------------------------------------------------------------
+    # Validação
+    # -------------------------------------------------------------------------
+
+    def valida_valor(self, nota: Decimal) -> bool:
+        """
+        Valida se a nota:
+        - Está no intervalo [0, valor_maximo]
+        - Respeita o incremento exigido pela regra de arredondamento
+        - Zero é sempre considerado válido
+        """
+        if nota < 0 or nota > self.valor_maximo:
+            return False
+        if nota == 0:
+            return True
+        return (nota * self._fator_incremento) % _D1 == 0
+
+    def valida_valores(self, notas) -> list:
+        """valida_valor aplicado a uma sequência de notas."""
+        return [self.valida_valor(nota) for nota in notas]
+
+    def erro_nota(self, nota: Decimal, limite: Decimal):
+        """
+        Mensagem de erro da nota digitada em uma avaliação de valor `limite`
+        (None se válida): 0 <= nota <= limite e no máximo
+        casas_decimais_avaliacao casas decimais.
+        """
+        if nota < 0:
+            return "A nota não pode ser negativa."
+        if nota > limite:
+            return f"A nota ({nota}) não pode exceder o valor máximo da avaliação ({limite})."
+        if (nota * self._fator_casas_avaliacao) % _D1 != 0:
+            return f"A nota deve ter no máximo {self.casas_decimais_avaliacao} casa(s) decimal(ais)."
+        return None
+
+    def erros_notas(self, notas, limite: Decimal) -> list:
+        """erro_nota aplicado a uma sequência (None é nota vazia, sempre válida)."""
+        return [None if nota is None else self.erro_nota(nota, limite) for nota in notas]
@@ -0,0 +1,82 @@
+"""
+Management Command para cálculo em lote das notas bimestrais.
+Preenche NotaBimestral.nota_calculo_avaliacoes a partir das notas das avaliações.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Calcula as notas bimestrais (nota_calculo_avaliacoes) por turma, disciplina da turma ou ano letivo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano',
+            type=int,
+            help='Ano letivo (padrão: ano letivo ativo).',
+        )
+        parser.add_argument(
+            '--turma',
+            help='UUID da turma (calcula apenas esta turma).',
+        )
+        parser.add_argument(
+            '--disciplina-turma',
+            help='UUID da DisciplinaTurma (calcula apenas esta disciplina na turma).',
+        )
+        parser.add_argument(
+            '--bimestre',
+            type=int,
+            choices=[1, 2, 3, 4],
+            help='Bimestre a calcular (padrão: todos).',
+        )
+        parser.add_argument(
+            '--usuario',
+            help='Username gravado em criado_por nos registros novos (padrão: primeiro superusuário ativo).',
+        )
+
+    def handle(self, *args, **options):
+        # Importa os models aqui para evitar problemas de import circular
+        from django.contrib.auth import get_user_model
+        from apps.core.models import AnoLetivo, Turma, DisciplinaTurma
+        from apps.evaluation.services import NotaBimestralService
+
+        User = get_user_model()
+        bimestre = options['bimestre']
+
+        if options['usuario']:
+            usuario = User.objects.filter(username=options['usuario']).first()
+        else:
+            usuario = User.objects.filter(is_superuser=True, is_active=True).order_by('date_joined').first()
+        if not usuario:
+            raise CommandError('Usuário não encontrado. Informe --usuario.')
+
+        self.stdout.write(self.style.NOTICE('Iniciando cálculo das notas bimestrais...'))
+
+        if options['disciplina_turma']:
+            disciplina_turma = DisciplinaTurma.objects.select_related('turma', 'disciplina').filter(
+                pk=options['disciplina_turma']
+            ).first()
+            if not disciplina_turma:
+                raise CommandError('DisciplinaTurma não encontrada.')
+            self.stdout.write(f'Escopo: {disciplina_turma}')
+            resultado = NotaBimestralService.calcular_disciplina_turma(disciplina_turma, usuario, bimestre)
+
+        elif options['turma']:
+            turma = Turma.objects.filter(pk=options['turma']).first()
+            if not turma:
+                raise CommandError('Turma não encontrada.')
+            self.stdout.write(f'Escopo: {turma}')
+            resultado = NotaBimestralService.calcular_turma(turma, usuario, bimestre)
+
+        else:
+            if options['ano']:
+                ano_letivo = AnoLetivo.objects.filter(ano=options['ano']).first()
+            else:
+                ano_letivo = AnoLetivo.objects.filter(is_active=True).first()
+            if not ano_letivo:
+                raise CommandError('Ano letivo não encontrado.')
+            self.stdout.write(f'Escopo: ano letivo {ano_letivo.ano}')
+            resultado = NotaBimestralService.calcular_ano_letivo(ano_letivo, usuario, bimestre)
+
+        self.stdout.write(self.style.NOTICE('=== RESUMO ==='))
+        self.stdout.write(self.style.SUCCESS(f"Notas calculadas: {resultado['calculados']}"))
+        self.stdout.write(f"Cálculos removidos (sem notas lançadas): {resultado['limpos']}")
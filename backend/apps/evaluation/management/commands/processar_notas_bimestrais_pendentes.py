@@ -0,0 +1,75 @@
+"""
+Management Command (worker) para recálculo incremental das notas bimestrais.
+Processa as chaves marcadas em NotaBimestralPendente após escritas em NotaAvaliacao.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as notas bimestrais marcadas como pendentes (use --loop para rodar como worker).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Executa continuamente, verificando a fila a cada --intervalo segundos.',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=1.0,
+            help='Intervalo entre verificações da fila no modo --loop (padrão: 1s).',
+        )
+        parser.add_argument(
+            '--debounce',
+            type=float,
+            default=2.0,
+            help='Tempo mínimo sem novas alterações antes de recalcular uma chave (padrão: 2s).',
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=2000,
+            help='Máximo de chaves processadas por lote (padrão: 2000).',
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Exibe informações detalhadas.',
+        )
+
+    def handle(self, *args, **options):
+        from apps.evaluation.services import NotaBimestralService
+
+        verbose = options['verbose']
+
+        if options['loop']:
+            self.stdout.write(self.style.NOTICE('Worker de notas bimestrais iniciado (Ctrl+C para encerrar).'))
+
+        try:
+            while True:
+                close_old_connections()
+                resultado = NotaBimestralService.processar_pendentes(
+                    debounce_segundos=options['debounce'],
+                    limite=options['limite'],
+                )
+
+                if resultado['processados'] and (verbose or not options['loop']):
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Chaves processadas: {resultado['processados']} "
+                        f"(calculadas: {resultado['calculados']}, limpas: {resultado['limpos']})"
+                    ))
+
+                if not options['loop']:
+                    if not resultado['processados']:
+                        self.stdout.write('Nenhuma nota bimestral pendente.')
+                    break
+
+                # Fila cheia: processa o próximo lote imediatamente
+                if resultado['processados'] < options['limite']:
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.NOTICE('Worker encerrado.'))
@@ -0,0 +1,35 @@
+"""
+Management Command para reconstrução do boletim materializado.
+Regrava Boletim a partir de NotaBimestral e FrequenciaBimestral (ex.: após
+reconstruir_frequencias, importações ou cargas feitas sem passar pelos services).
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os boletins materializados (Boletim) de um ano letivo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano',
+            type=int,
+            help='Ano letivo a reconstruir (padrão: ano letivo ativo).',
+        )
+
+    def handle(self, *args, **options):
+        from apps.core.models import AnoLetivo
+        from apps.evaluation.services import BoletimService
+
+        ano = options['ano']
+        if ano is None:
+            ano = AnoLetivo.objects.filter(is_active=True).values_list('ano', flat=True).first()
+            if ano is None:
+                raise CommandError('Ano letivo não encontrado. Informe --ano.')
+
+        self.stdout.write(self.style.NOTICE(f'Reconstruindo boletins (ano letivo {ano})...'))
+
+        resultado = BoletimService.reconstruir(ano=ano)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Boletins: {resultado['boletins']} (alterados: {resultado['alterados']})"
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-16 23:28
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_initial'),
+        ('core', '0002_initial'),
+        ('evaluation', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotaBimestralPendente',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('bimestre', models.PositiveSmallIntegerField(choices=[(1, '1º Bimestre'), (2, '2º Bimestre'), (3, '3º Bimestre'), (4, '4º Bimestre')])),
+                ('marcado_em', models.DateTimeField(auto_now=True, db_index=True)),
+                ('ano_letivo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.anoletivo')),
+                ('disciplina', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.disciplina')),
+                ('matricula_turma', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='academic.matriculaturma')),
+                ('usuario', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuário da última alteração')),
+            ],
+            options={
+                'verbose_name': 'Nota Bimestral Pendente',
+                'verbose_name_plural': 'Notas Bimestrais Pendentes',
+                'unique_together': {('matricula_turma', 'disciplina', 'bimestre')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 11:20
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_initial'),
+        ('evaluation', '0003_nota_bimestral_pendente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Boletim',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('dados', models.JSONField(default=dict, verbose_name='Documento do Boletim')),
+                ('assinatura', models.CharField(help_text='Hash de dados (ETag): muda apenas quando o conteúdo muda', max_length=64, verbose_name='Assinatura do Conteúdo')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('matricula_turma', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='boletim', to='academic.matriculaturma')),
+            ],
+            options={
+                'verbose_name': 'Boletim',
+                'verbose_name_plural': 'Boletins',
+            },
+        ),
+    ]
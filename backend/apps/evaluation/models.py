@@ -1,12 +1,15 @@
+from collections import defaultdict
+
 from django.db import models
+from django.db.models import Exists, OuterRef, Q
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 from apps.core.models import Funcionario, DisciplinaTurma, ProfessorDisciplinaTurma, UUIDModel, Arquivo, AnoLetivo, Habilidade, Disciplina
 from apps.academic.models import Estudante, MatriculaTurma
-from django.db.models.signals import m2m_changed, post_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from .config import BIMESTRE_CHOICES, OPCOES_FORMA_CALCULO
+from .config import BIMESTRE_CHOICES, OPCOES_FORMA_CALCULO, regras_avaliacao
 
 # =============================================================================
 # AVALIAÇÕES
@@ -141,6 +144,23 @@ class Avaliacao(UUIDModel):
         
         return cobertura_usuario == len(dt_ids_escopo)
 
+    @classmethod
+    def owner_q(cls, user):
+        """
+        Mesma regra de is_owner em SQL: a avaliação tem vínculos e nenhum
+        deles está em uma DisciplinaTurma sem vínculo do usuário nesta avaliação.
+        """
+        Vinculo = cls.professores_disciplinas_turmas.through
+        vinculos = Vinculo.objects.filter(avaliacao=OuterRef('pk'))
+        dts_do_usuario = Vinculo.objects.filter(
+            avaliacao=OuterRef(OuterRef('pk')),
+            professordisciplinaturma__professor__usuario=user
+        ).values('professordisciplinaturma__disciplina_turma')
+
+        return Q(Exists(vinculos)) & ~Q(Exists(
+            vinculos.exclude(professordisciplinaturma__disciplina_turma__in=dts_do_usuario)
+        ))
+
 
       
     class Meta:
@@ -302,6 +322,17 @@ class NotaAvaliacao(UUIDModel):
 
     def is_owner(self, user):
         return self.avaliacao.is_owner(user)
+
+    @classmethod
+    def owner_q(cls, user):
+        return Q(avaliacao__in=Avaliacao.objects.filter(Avaliacao.owner_q(user)).values('pk'))
+
+    def delete(self, *args, **kwargs):
+        """Exclusão avulsa (ex.: admin): marca a NotaBimestral afetada."""
+        from apps.evaluation.services import NotaBimestralService
+
+        NotaBimestralService.marcar_pendentes(self.avaliacao_id, [self.matricula_turma_id], self.criado_por_id)
+        return super().delete(*args, **kwargs)
     
     
     def __str__(self):
@@ -412,6 +443,14 @@ class NotaBimestral(UUIDModel):
             disciplina_turma__turma=self.matricula_turma.turma
         ).exists()
 
+    @classmethod
+    def owner_q(cls, user):
+        return Q(Exists(ProfessorDisciplinaTurma.objects.filter(
+            professor__usuario=user,
+            disciplina_turma__disciplina=OuterRef('disciplina'),
+            disciplina_turma__turma=OuterRef('matricula_turma__turma')
+        )))
+
     def __str__(self):
         return f"{self.matricula_turma} - {self.disciplina}"
     
@@ -431,9 +470,7 @@ class NotaBimestral(UUIDModel):
     
     def _get_media_aprovacao(self) -> 'Decimal':
         """Obtém a média de aprovação do ano letivo relacionado."""
-        from decimal import Decimal
-        cfg = self.matricula_turma.turma.ano_letivo.controles['avaliacao']
-        return Decimal(str(cfg['media_aprovacao']))
+        return regras_avaliacao(self.matricula_turma.turma.ano_letivo).media_aprovacao
     
     @property
     def ficou_de_recuperacao(self) -> bool:
@@ -460,7 +497,103 @@ class NotaBimestral(UUIDModel):
         if self.nota_recuperacao is None:
             return False
         return self.nota_recuperacao >= self._get_media_aprovacao()
-    
+
+
+class NotaBimestralPendente(UUIDModel):
+    """
+    Fila de recálculo incremental das notas bimestrais.
+
+    Cada registro marca uma chave (matricula_turma, disciplina, bimestre) cuja
+    NotaBimestral precisa ser recalculada após escrita em NotaAvaliacao.
+    O worker (processar_notas_bimestrais_pendentes) processa apenas as chaves
+    cujo marcado_em é mais antigo que o debounce.
+
+    As FKs não têm constraint no banco: a marcação pode ocorrer durante a
+    exclusão em cascata dos próprios registros referenciados.
+    """
+
+    ano_letivo = models.ForeignKey(
+        AnoLetivo,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    matricula_turma = models.ForeignKey(
+        MatriculaTurma,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    disciplina = models.ForeignKey(
+        Disciplina,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    bimestre = models.PositiveSmallIntegerField(choices=BIMESTRE_CHOICES)
+    usuario = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Usuário da última alteração'
+    )
+    marcado_em = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Nota Bimestral Pendente'
+        verbose_name_plural = 'Notas Bimestrais Pendentes'
+        unique_together = ['matricula_turma', 'disciplina', 'bimestre']
+
+    def __str__(self):
+        return f"{self.matricula_turma_id} - {self.disciplina_id} ({self.bimestre}º bim)"
+
+
+class Boletim(UUIDModel):
+    """
+    Boletim materializado de uma matrícula na turma (documento JSON pronto
+    para leitura): notas, recuperação, nota final e frequência por
+    disciplina e bimestre.
+
+    Mantido incrementalmente por BoletimService (escritas em NotaBimestral e
+    FrequenciaBimestral, matrícula e disciplinas da turma). Estudantes e
+    responsáveis leem apenas esta tabela. Reconstrução completa:
+    python manage.py reconstruir_boletins
+    """
+
+    matricula_turma = models.OneToOneField(
+        MatriculaTurma,
+        on_delete=models.CASCADE,
+        related_name='boletim'
+    )
+    dados = models.JSONField(default=dict, verbose_name='Documento do Boletim')
+    assinatura = models.CharField(
+        max_length=64,
+        verbose_name='Assinatura do Conteúdo',
+        help_text='Hash de dados (ETag): muda apenas quando o conteúdo muda'
+    )
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Boletim'
+        verbose_name_plural = 'Boletins'
+
+    def is_owner(self, user) -> bool:
+        """O próprio estudante ou um de seus responsáveis."""
+        if not user or user.is_anonymous or not user.is_active:
+            return False
+
+        return Boletim.objects.filter(Boletim.owner_q(user), pk=self.pk).exists()
+
+    @classmethod
+    def owner_q(cls, user):
+        return Q(matricula_turma__matricula_cemep__estudante__in=Estudante.objects.filter(
+            Q(usuario=user) | Q(responsaveis__usuario=user)
+        ).values('pk'))
+
+    def __str__(self):
+        return f"Boletim - {self.matricula_turma}"
+
 
 class AvaliacaoConfigDisciplinaTurma(UUIDModel):
     ano_letivo = models.ForeignKey(
@@ -504,24 +637,149 @@ class AvaliacaoConfigDisciplinaTurma(UUIDModel):
             professor__usuario=user
         ).exists()
 
+    @classmethod
+    def owner_q(cls, user):
+        return Q(disciplina_turma__in=ProfessorDisciplinaTurma.objects.filter(
+            professor__usuario=user
+        ).values('disciplina_turma'))
+
 
     def __str__(self):
         return f"{self.disciplina_turma} - {self.ano_letivo} ({self.forma_calculo})"
 
+    @classmethod
+    def bloquear_por_vinculos(cls, avaliacao_ids, pdt_ids=None):
+        """
+        Bloqueia (pode_alterar=False) a configuração das disciplinas/turmas
+        vinculadas às avaliações, criando as configurações que ainda não existem.
+
+        Em lote: 1 consulta aos vínculos, 1 INSERT (ignore_conflicts) e
+        1 UPDATE, independente do número de avaliações/PDTs. Use também após
+        criar vínculos sem signals (ex.: through.objects.bulk_create).
+
+        Args:
+            avaliacao_ids: IDs das avaliações
+            pdt_ids: Restringe aos vínculos com estes ProfessorDisciplinaTurma
+        """
+        Vinculo = Avaliacao.professores_disciplinas_turmas.through
+        vinculos = Vinculo.objects.filter(avaliacao_id__in=avaliacao_ids)
+        if pdt_ids is not None:
+            vinculos = vinculos.filter(professordisciplinaturma_id__in=pdt_ids)
+
+        # {ano_letivo_id: {disciplina_turma_id}}
+        por_ano = {}
+        for ano_letivo_id, disciplina_turma_id in vinculos.values_list(
+            'avaliacao__ano_letivo_id', 'professordisciplinaturma__disciplina_turma_id'
+        ).distinct():
+            por_ano.setdefault(ano_letivo_id, set()).add(disciplina_turma_id)
+
+        if not por_ano:
+            return
+
+        # Configurações novas já nascem bloqueadas; as existentes são ignoradas
+        cls.objects.bulk_create(
+            [
+                cls(ano_letivo_id=ano_letivo_id, disciplina_turma_id=disciplina_turma_id, pode_alterar=False)
+                for ano_letivo_id, disciplina_turmas in por_ano.items()
+                for disciplina_turma_id in disciplina_turmas
+            ],
+            ignore_conflicts=True,
+        )
+
+        filtro = Q()
+        for ano_letivo_id, disciplina_turmas in por_ano.items():
+            filtro |= Q(ano_letivo_id=ano_letivo_id, disciplina_turma_id__in=disciplina_turmas)
+        cls.objects.filter(filtro, pode_alterar=True).update(pode_alterar=False)
+
 
 @receiver(m2m_changed, sender=Avaliacao.professores_disciplinas_turmas.through)
 def bloquear_configuracao_ao_vincular_avaliacao(sender, instance, action, pk_set, **kwargs):
     """
     Quando uma avaliação é vinculada a um ProfessorDisciplinaTurma, 
     bloqueia a alteração da configuração dessa disciplina/turma.
+
+    Trata o vínculo pelos dois lados (avaliacao.professores_disciplinas_turmas
+    e pdt.avaliacoes) em lote, sem consultas por PDT.
     """
-    if action == "post_add":
-        for pdt_id in pk_set:
-            pdt = ProfessorDisciplinaTurma.objects.get(pk=pdt_id)
-            config, created = AvaliacaoConfigDisciplinaTurma.objects.get_or_create(
-                ano_letivo=instance.ano_letivo,
-                disciplina_turma=pdt.disciplina_turma
-            )
-            if config.pode_alterar:
-                config.pode_alterar = False
-                config.save()
+    if action == "post_add" and pk_set:
+        if kwargs.get('reverse'):
+            # instance é o PDT; pk_set são avaliações
+            AvaliacaoConfigDisciplinaTurma.bloquear_por_vinculos(pk_set, pdt_ids=[instance.pk])
+        else:
+            AvaliacaoConfigDisciplinaTurma.bloquear_por_vinculos([instance.pk], pdt_ids=pk_set)
+
+
+@receiver(post_save, sender=NotaAvaliacao)
+def marcar_nota_bimestral_pendente(sender, instance, **kwargs):
+    """
+    Marca a NotaBimestral afetada para recálculo incremental.
+
+    Exclusões não passam por signal de NotaAvaliacao (um receiver de delete
+    desligaria o fast-delete da cascata de Avaliacao): ver
+    NotaAvaliacao.delete, marcar_notas_bimestrais_avaliacao_excluida e
+    NotaAvaliacaoService.salvar_notas_lote.
+    """
+    from apps.evaluation.services import NotaBimestralService
+
+    NotaBimestralService.marcar_pendentes(
+        instance.avaliacao_id,
+        [instance.matricula_turma_id],
+        instance.criado_por_id
+    )
+
+
+@receiver(pre_delete, sender=Avaliacao)
+def marcar_notas_bimestrais_avaliacao_excluida(sender, instance, **kwargs):
+    """
+    Marca de uma vez as NotaBimestral afetadas pelas notas da avaliação
+    excluída (1 leitura + 1 upsert por autor das notas).
+
+    pre_delete (e não post_delete): depois da exclusão em cascata o vínculo
+    da avaliação com a disciplina já não existe.
+    """
+    from apps.evaluation.services import NotaBimestralService
+
+    por_usuario = defaultdict(set)
+    for usuario_id, mt_id in NotaAvaliacao.objects.filter(avaliacao=instance).values_list(
+        'criado_por_id', 'matricula_turma_id'
+    ):
+        por_usuario[usuario_id].add(mt_id)
+
+    for usuario_id, mt_ids in por_usuario.items():
+        NotaBimestralService.marcar_pendentes(instance.pk, mt_ids, usuario_id)
+
+
+@receiver(post_save, sender=NotaBimestral)
+@receiver(post_delete, sender=NotaBimestral)
+def atualizar_boletim_nota_bimestral(sender, instance, **kwargs):
+    """Edições avulsas de NotaBimestral (ex.: nota final). O cálculo em lote agenda pelo serviço."""
+    from apps.evaluation.services import BoletimService
+
+    BoletimService.agendar(matriculas=[instance.matricula_turma_id])
+
+
+@receiver(post_save, sender=MatriculaTurma)
+def atualizar_boletim_matricula(sender, instance, **kwargs):
+    """Matrícula nova ou alterada (entrada, saída, status)."""
+    from apps.evaluation.services import BoletimService
+
+    BoletimService.agendar(matriculas=[instance.pk])
+
+
+@receiver(post_save, sender=Estudante)
+def atualizar_boletim_estudante(sender, instance, created, **kwargs):
+    """Nome do estudante exibido no boletim."""
+    if created:
+        return
+    from apps.evaluation.services import BoletimService
+
+    BoletimService.agendar(estudantes=[instance.pk])
+
+
+@receiver(post_save, sender=DisciplinaTurma)
+@receiver(post_delete, sender=DisciplinaTurma)
+def atualizar_boletim_disciplina_turma(sender, instance, **kwargs):
+    """Disciplina incluída/removida da grade da turma: boletins da turma inteira."""
+    from apps.evaluation.services import BoletimService
+
+    BoletimService.agendar(turmas=[instance.turma_id])
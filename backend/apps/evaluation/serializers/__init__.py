@@ -6,6 +6,8 @@ from .avaliacao_digitar_nota import (
     NotaAvaliacaoItemSerializer
 )
 from .avaliacao_config_disciplina_turma import AvaliacaoConfigDisciplinaTurmaSerializer
+from .nota_bimestral import CalcularNotasBimestraisSerializer
+from .mapa_notas import MapaNotasSerializer
 
 __all__ = [
     'AvaliacaoSerializer', 
@@ -16,4 +18,6 @@ __all__ = [
     'SalvarNotasSerializer',
     'NotaAvaliacaoItemSerializer',
     'AvaliacaoConfigDisciplinaTurmaSerializer',
+    'CalcularNotasBimestraisSerializer',
+    'MapaNotasSerializer',
 ]
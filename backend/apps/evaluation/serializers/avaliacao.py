@@ -176,10 +176,13 @@ class AvaliacaoSerializer(serializers.ModelSerializer):
         return str(obj.bimestre)
     
     def get_is_owner(self, obj):
-        """Retorna se o usuário atual é o criador."""
+        """
+        Retorna se o usuário atual é owner da avaliação (mesma regra da Policy).
+        Usa o valor anotado pela view (annotate_is_owner) quando presente.
+        """
         request = self.context.get('request')
         if request and request.user:
-            return obj.criado_por == request.user
+            return obj.verificar_owner(request.user)
         return False
 
     # --- CRUD Methods ---
@@ -307,7 +310,7 @@ class AvaliacaoListSerializer(serializers.ModelSerializer):
     def get_is_owner(self, obj):
         request = self.context.get('request')
         if request and request.user:
-            return obj.criado_por == request.user
+            return obj.verificar_owner(request.user)
         return False
 
 
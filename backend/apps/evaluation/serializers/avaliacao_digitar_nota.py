@@ -9,8 +9,9 @@ from decimal import Decimal
 
 from apps.evaluation.models import Avaliacao, NotaAvaliacao
 from apps.academic.models import MatriculaTurma
-from apps.evaluation.validators import validar_nota_avaliacao, get_estudantes_elegiveis
-from apps.evaluation.config import get_config_from_ano_letivo
+from apps.evaluation.validators import validar_notas_avaliacao, get_estudantes_elegiveis
+from apps.evaluation.config import regras_avaliacao
+from apps.evaluation.services import NotaAvaliacaoService
 
 
 class NotaAvaliacaoItemSerializer(serializers.Serializer):
@@ -45,8 +46,7 @@ class AvaliacaoDigitarNotaSerializer(serializers.Serializer):
     
     def get_casas_decimais(self, obj):
         """Retorna casas decimais do ano letivo."""
-        cfg = get_config_from_ano_letivo(obj.ano_letivo)
-        return cfg['CASAS_DECIMAIS_AVALIACAO']
+        return regras_avaliacao(obj.ano_letivo).casas_decimais_avaliacao
     
     def get_turmas_info(self, obj):
         """Retorna lista de turmas/disciplinas vinculadas à avaliação."""
@@ -137,54 +137,34 @@ class SalvarNotasSerializer(serializers.Serializer):
         return value
     
     def validate_notas(self, value):
-        """Valida cada nota individualmente."""
+        """Valida as notas em lote (regras do ano letivo obtidas uma vez)."""
         if not self.avaliacao:
             return value
         
-        ano_letivo = self.avaliacao.ano_letivo
-        
-        for item in value:
-            nota = item.get('nota')
-            if nota is not None:
-                try:
-                    validar_nota_avaliacao(nota, self.avaliacao, ano_letivo)
-                except Exception as e:
-                    raise serializers.ValidationError(str(e))
+        try:
+            validar_notas_avaliacao(
+                [item.get('nota') for item in value], self.avaliacao, self.avaliacao.ano_letivo
+            )
+        except Exception as e:
+            raise serializers.ValidationError(str(e))
         
         return value
     
     def create(self, validated_data):
-        """Cria ou atualiza as notas."""
-        from apps.core.models import ProfessorDisciplinaTurma
-        
-        pdt = ProfessorDisciplinaTurma.objects.get(id=validated_data['pdt_id'])
-        turma_id = pdt.disciplina_turma.turma_id
-        notas_data = validated_data['notas']
-        
-        created_count = 0
-        updated_count = 0
-        
-        for item in notas_data:
-            matricula_turma_id = item['matricula_turma_id']
-            nota_valor = item.get('nota')
-            
-            # Verifica se já existe
-            nota_obj, created = NotaAvaliacao.objects.update_or_create(
-                avaliacao=self.avaliacao,
-                matricula_turma_id=matricula_turma_id,
-                defaults={
-                    'nota': Decimal(str(nota_valor)) if nota_valor is not None else None,
-                    'criado_por': self.user,
-                }
-            )
-            
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
-        
+        """Cria, atualiza ou remove (nota apagada) as notas em lote."""
+        notas_data = [
+            {
+                'matricula_turma_id': item['matricula_turma_id'],
+                'nota': Decimal(str(item['nota'])) if item.get('nota') is not None else None,
+            }
+            for item in validated_data['notas']
+        ]
+
+        resultado = NotaAvaliacaoService.salvar_notas_lote(self.avaliacao, notas_data, self.user)
+
         return {
-            'created': created_count,
-            'updated': updated_count,
+            'created': resultado['criados'],
+            'updated': resultado['atualizados'],
+            'removed': resultado['removidos'],
             'total': len(notas_data)
         }
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+
+from apps.evaluation.config import BIMESTRE_CHOICES
+
+
+class MapaNotasSerializer(serializers.Serializer):
+    """
+    Valida os parâmetros do mapa de notas (query string).
+    """
+    disciplina_turma = serializers.UUIDField()
+    bimestre = serializers.ChoiceField(choices=BIMESTRE_CHOICES)
+    formato = serializers.ChoiceField(choices=['json', 'xlsx'], default='json')
@@ -0,0 +1,22 @@
+from rest_framework import serializers
+
+from apps.evaluation.config import BIMESTRE_CHOICES
+
+
+class CalcularNotasBimestraisSerializer(serializers.Serializer):
+    """
+    Valida o escopo do cálculo em lote das notas bimestrais.
+    Exatamente um entre turma_id, disciplina_turma_id e ano deve ser informado.
+    """
+    turma_id = serializers.UUIDField(required=False)
+    disciplina_turma_id = serializers.UUIDField(required=False)
+    ano = serializers.IntegerField(required=False)
+    bimestre = serializers.ChoiceField(choices=BIMESTRE_CHOICES, required=False, allow_null=True)
+
+    def validate(self, attrs):
+        escopos = [k for k in ('turma_id', 'disciplina_turma_id', 'ano') if attrs.get(k) is not None]
+        if len(escopos) != 1:
+            raise serializers.ValidationError(
+                'Informe exatamente um escopo: turma_id, disciplina_turma_id ou ano.'
+            )
+        return attrs
@@ -1 +1,6 @@
-__all__ = []
+from .nota_bimestral_service import NotaBimestralService
+from .nota_avaliacao_service import NotaAvaliacaoService
+from .boletim_service import BoletimService
+from .mapa_notas_service import MapaNotasService
+
+__all__ = ['NotaBimestralService', 'NotaAvaliacaoService', 'BoletimService', 'MapaNotasService']
@@ -0,0 +1,333 @@
+"""
+Serviço do boletim materializado (Boletim).
+
+Montar um boletim exige cruzar NotaBimestral, FrequenciaBimestral,
+DisciplinaTurma, Turma e a matrícula do estudante. Este módulo mantém um
+documento pronto por MatriculaTurma:
+
+- Incremental: escritas em NotaBimestral (NotaBimestralService e signals),
+  FrequenciaBimestral (FrequenciaService), matrícula e disciplinas da turma
+  agendam as matrículas afetadas; a reconstrução roda após o commit, uma
+  única vez por transação e em lote (consultas constantes por lote).
+- Reconstrução completa: reconstruir() / manage.py reconstruir_boletins.
+- Leitura: documento_visivel() recorta os bimestres ainda não liberados
+  (controle VISUALIZACAO_BOLETIM) para estudantes e responsáveis.
+"""
+import hashlib
+import json
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.academic.models import MatriculaTurma
+from apps.core.models import AnoLetivo, DisciplinaTurma, Turma
+from apps.core.utils import agendar_apos_commit
+from apps.evaluation.config import regras_avaliacao
+from apps.evaluation.models import Boletim, NotaBimestral
+
+
+# Matrículas marcadas na transação corrente (ver agendar_apos_commit)
+_pendentes = ContextVar('boletim_pendentes', default=None)
+
+# Matrículas reconstruídas por lote (limita o tamanho dos IN e do upsert)
+TAMANHO_LOTE = 500
+
+BIMESTRES = (1, 2, 3, 4)
+
+# Bimestre 5 do controle VISUALIZACAO_BOLETIM: resultado anual
+BIMESTRE_ANUAL = 5
+
+
+def _decimal_str(valor):
+    return None if valor is None else str(valor)
+
+
+def _percentual(total_aulas, total_faltas):
+    """Mesmo cálculo de FrequenciaBimestral.percentual_frequencia."""
+    if not total_aulas:
+        return None
+    return round((total_aulas - total_faltas) * 100 / total_aulas, 2)
+
+
+class BoletimService:
+    """
+    Serviço centralizado para o boletim materializado.
+    """
+
+    # -------------------------------------------------------------------------
+    # Agendamento incremental
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def agendar(matriculas=(), estudantes=(), turmas=(), disciplinas_turmas=()):
+        """
+        Marca boletins para reconstrução após o commit da transação.
+
+        Args:
+            matriculas: IDs de MatriculaTurma
+            estudantes: IDs de Estudante (todas as suas matrículas em turmas)
+            turmas: IDs de Turma (todas as matrículas da turma)
+            disciplinas_turmas: IDs de DisciplinaTurma (matrículas da turma)
+        """
+        agendar_apos_commit(_pendentes, {
+            'matriculas': matriculas,
+            'estudantes': estudantes,
+            'turmas': turmas,
+            'disciplinas_turmas': disciplinas_turmas,
+        }, BoletimService.processar_pendentes)
+
+    @staticmethod
+    def processar_pendentes(marcacoes):
+        """
+        Reconstrói os boletins marcados em uma transação (chamado após o commit).
+
+        Args:
+            marcacoes: dict com os conjuntos acumulados por agendar()
+
+        Returns:
+            dict: {'boletins': int, 'alterados': int}
+        """
+        if not any(marcacoes.values()):
+            return {'boletins': 0, 'alterados': 0}
+
+        return BoletimService.reconstruir(**marcacoes)
+
+    # -------------------------------------------------------------------------
+    # Reconstrução
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def reconstruir(matriculas=(), estudantes=(), turmas=(), disciplinas_turmas=(), ano=None):
+        """
+        Reconstrói imediatamente os boletins informados (mesmos argumentos de
+        agendar) ou, com ano, todos os boletins do ano letivo.
+
+        Boletins cujo conteúdo não mudou não são regravados (ETag preservado).
+
+        Returns:
+            dict: {'boletins': int, 'alterados': int}
+        """
+        filtro = Q()
+        if matriculas:
+            filtro |= Q(id__in=set(matriculas))
+        if estudantes:
+            filtro |= Q(matricula_cemep__estudante_id__in=set(estudantes))
+        if turmas:
+            filtro |= Q(turma_id__in=set(turmas))
+        if disciplinas_turmas:
+            filtro |= Q(turma__disciplinas_vinculadas__id__in=set(disciplinas_turmas))
+        if ano is not None:
+            filtro |= Q(turma__ano_letivo=ano)
+        if not filtro:
+            return {'boletins': 0, 'alterados': 0}
+
+        ids = list(MatriculaTurma.objects.filter(filtro).values_list('id', flat=True).distinct())
+
+        alterados = 0
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            alterados += BoletimService._construir(ids[inicio:inicio + TAMANHO_LOTE])
+
+        return {'boletins': len(ids), 'alterados': alterados}
+
+    @staticmethod
+    @transaction.atomic
+    def _construir(matricula_ids):
+        """
+        Monta e grava (upsert) os boletins de um lote de matrículas.
+
+        Queries: 6 (matrículas, anos letivos, disciplinas das turmas, notas,
+        frequências, assinaturas atuais) + 1 upsert, independente do tamanho do lote.
+
+        Returns:
+            int: Quantidade de boletins criados/alterados
+        """
+        from apps.pedagogical.models import FrequenciaBimestral
+        from apps.pedagogical.services.frequencia_service import FREQUENCIA_MINIMA
+
+        matriculas = list(MatriculaTurma.objects.filter(id__in=matricula_ids).values(
+            'id', 'turma_id', 'data_entrada', 'data_saida', 'status',
+            'turma__numero', 'turma__letra', 'turma__nomenclatura', 'turma__ano_letivo',
+            'turma__curso__sigla', 'turma__curso__nome',
+            'matricula_cemep__estudante_id', 'matricula_cemep__numero_matricula',
+            'matricula_cemep__estudante__nome_social',
+            'matricula_cemep__estudante__usuario__first_name',
+            'matricula_cemep__estudante__usuario__last_name',
+        ))
+        if not matriculas:
+            return 0
+
+        turma_ids = {m['turma_id'] for m in matriculas}
+        estudante_ids = {m['matricula_cemep__estudante_id'] for m in matriculas}
+
+        regras = {
+            ano_letivo.ano: regras_avaliacao(ano_letivo)
+            for ano_letivo in AnoLetivo.objects.filter(
+                ano__in={m['turma__ano_letivo'] for m in matriculas}
+            ).only('id', 'ano', 'controles')
+            if 'avaliacao' in ano_letivo.controles
+        }
+
+        disciplinas_por_turma = defaultdict(list)
+        for dt in DisciplinaTurma.objects.filter(turma_id__in=turma_ids).values(
+            'id', 'turma_id', 'disciplina_id', 'disciplina__nome', 'disciplina__sigla'
+        ).order_by('disciplina__nome'):
+            disciplinas_por_turma[dt['turma_id']].append(dt)
+
+        notas = {
+            (n['matricula_turma_id'], n['disciplina_id'], n['bimestre']): n
+            for n in NotaBimestral.objects.filter(matricula_turma_id__in=matricula_ids).values(
+                'matricula_turma_id', 'disciplina_id', 'bimestre',
+                'nota_calculo_avaliacoes', 'nota_recuperacao', 'nota_final',
+            )
+        }
+
+        frequencias = {
+            (f['estudante_id'], f['disciplina_turma_id'], f['bimestre']): (f['total_aulas'], f['total_faltas'])
+            for f in FrequenciaBimestral.objects.filter(
+                disciplina_turma__turma_id__in=turma_ids,
+                estudante_id__in=estudante_ids,
+                bimestre__in=BIMESTRES,
+            ).values('estudante_id', 'disciplina_turma_id', 'bimestre', 'total_aulas', 'total_faltas')
+        }
+
+        assinaturas = dict(
+            Boletim.objects.filter(matricula_turma_id__in=matricula_ids).values_list(
+                'matricula_turma_id', 'assinatura'
+            )
+        )
+
+        boletins = []
+        for matricula in matriculas:
+            regras_ano = regras.get(matricula['turma__ano_letivo'])
+            dados = BoletimService._documento(
+                matricula,
+                disciplinas_por_turma[matricula['turma_id']],
+                notas,
+                frequencias,
+                regras_ano.media_aprovacao if regras_ano else None,
+                FREQUENCIA_MINIMA,
+            )
+            assinatura = hashlib.sha256(
+                json.dumps(dados, sort_keys=True, default=str).encode()
+            ).hexdigest()
+            if assinaturas.get(matricula['id']) == assinatura:
+                continue
+            boletins.append(Boletim(matricula_turma_id=matricula['id'], dados=dados, assinatura=assinatura))
+
+        if boletins:
+            Boletim.objects.bulk_create(
+                boletins,
+                update_conflicts=True,
+                unique_fields=['matricula_turma'],
+                update_fields=['dados', 'assinatura', 'atualizado_em'],
+            )
+        return len(boletins)
+
+    @staticmethod
+    def _documento(matricula, disciplinas, notas, frequencias, media_aprovacao, frequencia_minima):
+        """Monta o documento JSON do boletim de uma matrícula."""
+        mt_id = matricula['id']
+        estudante_id = matricula['matricula_cemep__estudante_id']
+        nome = matricula['matricula_cemep__estudante__nome_social'] or ' '.join(filter(None, [
+            matricula['matricula_cemep__estudante__usuario__first_name'],
+            matricula['matricula_cemep__estudante__usuario__last_name'],
+        ]))
+        ordinal = 'ª' if matricula['turma__nomenclatura'] == Turma.Nomenclatura.SERIE else 'º'
+        nomenclatura = Turma.Nomenclatura(matricula['turma__nomenclatura']).label
+
+        linhas = []
+        for dt in disciplinas:
+            bimestres = {}
+            total_aulas = total_faltas = 0
+            for bimestre in BIMESTRES:
+                nota = notas.get((mt_id, dt['disciplina_id'], bimestre)) or {}
+                aulas, faltas = frequencias.get((estudante_id, dt['id'], bimestre), (0, 0))
+                total_aulas += aulas
+                total_faltas += faltas
+                bimestres[str(bimestre)] = {
+                    'nota_calculo_avaliacoes': _decimal_str(nota.get('nota_calculo_avaliacoes')),
+                    'nota_recuperacao': _decimal_str(nota.get('nota_recuperacao')),
+                    'nota_final': _decimal_str(nota.get('nota_final')),
+                    'total_aulas': aulas,
+                    'total_faltas': faltas,
+                    'frequencia': _percentual(aulas, faltas),
+                }
+            linhas.append({
+                'disciplina_turma_id': str(dt['id']),
+                'disciplina_id': str(dt['disciplina_id']),
+                'disciplina_nome': dt['disciplina__nome'],
+                'disciplina_sigla': dt['disciplina__sigla'],
+                'bimestres': bimestres,
+                'anual': {
+                    'total_aulas': total_aulas,
+                    'total_faltas': total_faltas,
+                    'frequencia': _percentual(total_aulas, total_faltas),
+                },
+            })
+
+        return {
+            'ano_letivo': matricula['turma__ano_letivo'],
+            'matricula_turma_id': str(mt_id),
+            'estudante': {
+                'id': str(estudante_id),
+                'nome': nome,
+                'numero_matricula': matricula['matricula_cemep__numero_matricula'],
+            },
+            'turma': {
+                'id': str(matricula['turma_id']),
+                'nome': f"{matricula['turma__numero']}{ordinal} {nomenclatura} {matricula['turma__letra']}",
+                'sigla': f"{matricula['turma__numero']}{matricula['turma__letra']} - {matricula['turma__curso__sigla']}",
+                'curso': matricula['turma__curso__nome'],
+            },
+            'situacao': {
+                'status': matricula['status'],
+                'data_entrada': matricula['data_entrada'].isoformat(),
+                'data_saida': matricula['data_saida'].isoformat() if matricula['data_saida'] else None,
+            },
+            'media_aprovacao': _decimal_str(media_aprovacao),
+            'frequencia_minima': frequencia_minima,
+            'disciplinas': linhas,
+        }
+
+    # -------------------------------------------------------------------------
+    # Leitura
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def bimestres_liberados(ano, hoje=None):
+        """
+        Bimestres (1-4, e 5 = anual) com VISUALIZACAO_BOLETIM liberada,
+        lidos do banco: uma liberação vale em todos os workers assim que
+        gravada.
+
+        Queries: 1 (índice único ano_letivo/bimestre/tipo)
+        """
+        from apps.core.models import ControleRegistrosVisualizacao
+        from django.utils import timezone
+
+        hoje = hoje or timezone.localdate()
+        controles = ControleRegistrosVisualizacao.objects.filter(
+            ano_letivo__ano=ano,
+            tipo=ControleRegistrosVisualizacao.TipoControle.VISUALIZACAO_BOLETIM,
+            bimestre__in=(*BIMESTRES, BIMESTRE_ANUAL),
+        ).order_by('bimestre').only('bimestre', 'tipo', 'data_inicio', 'data_fim', 'digitacao_futura')
+
+        return tuple(controle.bimestre for controle in controles if controle.esta_liberado(hoje))
+
+    @staticmethod
+    def documento_visivel(dados, liberados):
+        """
+        Recorta o documento para os bimestres liberados: os demais ficam
+        sem notas/frequência e o resultado anual só aparece com o bimestre 5.
+        """
+        visiveis = {str(b) for b in liberados}
+        disciplinas = []
+        for linha in dados.get('disciplinas', []):
+            disciplinas.append({
+                **linha,
+                'bimestres': {b: v for b, v in linha['bimestres'].items() if b in visiveis},
+                'anual': linha['anual'] if BIMESTRE_ANUAL in liberados else None,
+            })
+        return {**dados, 'disciplinas': disciplinas, 'bimestres_liberados': list(liberados)}
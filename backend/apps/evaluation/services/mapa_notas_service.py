@@ -0,0 +1,121 @@
+"""
+Serviço do mapa de notas (estudantes x avaliações) de uma disciplina da turma.
+
+Substitui uma chamada de DigitarNotaViewSet.estudantes por avaliação: todas as
+NotaAvaliacao do escopo vêm em uma única query e são pivotadas em memória
+(numpy) em uma matriz estudantes x avaliações, com None onde não há nota.
+"""
+import tempfile
+
+import numpy as np
+
+from apps.academic.models import MatriculaTurma
+from apps.evaluation.models import Avaliacao, NotaAvaliacao
+
+
+class MapaNotasService:
+    """
+    Serviço centralizado para o mapa de notas.
+    """
+
+    @staticmethod
+    def montar(disciplina_turma, bimestre):
+        """
+        Monta o mapa de notas em formato colunar.
+
+        Queries: 3 (avaliações, matrículas da turma, notas), independente do
+        número de estudantes e avaliações.
+
+        Args:
+            disciplina_turma: Instância de DisciplinaTurma
+            bimestre: Número do bimestre
+
+        Returns:
+            dict: {
+                'estudantes': {'matricula_turma_id': [...], 'nome': [...], 'numero_chamada': [...]},
+                'avaliacoes': {'id': [...], 'titulo': [...], 'tipo': [...], 'valor': [...]},
+                'notas': [[nota | None, ...], ...]  # linha = estudante, coluna = avaliação
+            }
+        """
+        avaliacoes = list(
+            Avaliacao.objects.filter(
+                professores_disciplinas_turmas__disciplina_turma=disciplina_turma,
+                bimestre=bimestre,
+            ).distinct().order_by('data_inicio', 'criado_em').values_list('id', 'titulo', 'tipo', 'valor')
+        )
+        matriculas = list(
+            MatriculaTurma.objects.filter(turma_id=disciplina_turma.turma_id).order_by(
+                'mumero_chamada', 'matricula_cemep__estudante__usuario__first_name'
+            ).values_list(
+                'id', 'mumero_chamada',
+                'matricula_cemep__estudante__nome_social',
+                'matricula_cemep__estudante__usuario__first_name',
+                'matricula_cemep__estudante__usuario__last_name',
+            )
+        )
+
+        linhas = {mt[0]: i for i, mt in enumerate(matriculas)}
+        colunas = {av[0]: j for j, av in enumerate(avaliacoes)}
+        matriz = np.full((len(linhas), len(colunas)), np.nan)
+
+        if linhas and colunas:
+            notas = list(
+                NotaAvaliacao.objects.filter(
+                    avaliacao_id__in=colunas.keys(),
+                    matricula_turma__turma_id=disciplina_turma.turma_id,
+                    nota__isnull=False,
+                ).values_list('matricula_turma_id', 'avaliacao_id', 'nota')
+            )
+            if notas:
+                mt_ids, av_ids, valores = zip(*notas)
+                matriz[
+                    np.fromiter((linhas[mt] for mt in mt_ids), dtype=np.intp, count=len(notas)),
+                    np.fromiter((colunas[av] for av in av_ids), dtype=np.intp, count=len(notas)),
+                ] = np.array(valores, dtype=float)
+
+        return {
+            'disciplina_turma_id': str(disciplina_turma.id),
+            'bimestre': bimestre,
+            'estudantes': {
+                'matricula_turma_id': [str(mt[0]) for mt in matriculas],
+                'nome': [mt[2] or ' '.join(filter(None, mt[3:5])) for mt in matriculas],
+                'numero_chamada': [mt[1] for mt in matriculas],
+            },
+            'avaliacoes': {
+                'id': [str(av[0]) for av in avaliacoes],
+                'titulo': [av[1] for av in avaliacoes],
+                'tipo': [av[2] for av in avaliacoes],
+                'valor': [float(av[3]) for av in avaliacoes],
+            },
+            # NaN -> None (null no JSON)
+            'notas': np.where(np.isnan(matriz), None, matriz).tolist(),
+        }
+
+    @staticmethod
+    def exportar_xlsx(mapa):
+        """
+        Gera a planilha do mapa de notas (openpyxl em modo write_only: as
+        linhas são escritas em sequência, sem montar as células em memória).
+        O .xlsx vai para um arquivo temporário, enviado em blocos pelo
+        FileResponse e removido ao ser fechado.
+
+        Args:
+            mapa: Resultado de montar()
+
+        Returns:
+            Arquivo temporário (binário) com o .xlsx, posicionado no início
+        """
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(f"{mapa['bimestre']}º Bimestre")
+
+        estudantes = mapa['estudantes']
+        sheet.append(['Nº', 'Estudante', *mapa['avaliacoes']['titulo']])
+        for numero, nome, notas in zip(estudantes['numero_chamada'], estudantes['nome'], mapa['notas']):
+            sheet.append([numero, nome, *notas])
+
+        arquivo = tempfile.TemporaryFile()
+        workbook.save(arquivo)
+        arquivo.seek(0)
+        return arquivo
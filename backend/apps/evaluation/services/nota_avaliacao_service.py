@@ -0,0 +1,93 @@
+"""
+Serviço para gravação em lote das notas de avaliação.
+
+Este módulo centraliza a persistência de NotaAvaliacao na digitação de notas,
+usando operações em lote para reduzir queries e o tempo de lock dentro da
+transação da requisição (ATOMIC_REQUESTS) no fechamento do bimestre.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.evaluation.models import NotaAvaliacao
+from apps.evaluation.services.nota_bimestral_service import NotaBimestralService
+
+
+class NotaAvaliacaoService:
+    """
+    Serviço centralizado para operações de notas de avaliação.
+    """
+
+    @staticmethod
+    @transaction.atomic
+    def salvar_notas_lote(avaliacao, notas_data, usuario):
+        """
+        Salva as notas de uma avaliação em lote.
+
+        Usa bulk_create e bulk_update para minimizar queries.
+        Para 40 alunos: ~4-6 queries em vez de ~80.
+
+        Args:
+            avaliacao: Instância de Avaliacao
+            notas_data: Lista de dicts com {'matricula_turma_id': UUID, 'nota': Decimal|None}
+            usuario: Usuário que está lançando as notas
+
+        Returns:
+            dict: {'criados': int, 'atualizados': int, 'removidos': int}
+        """
+        # Última ocorrência de cada matrícula prevalece
+        notas = {item['matricula_turma_id']: item.get('nota') for item in notas_data}
+        if not notas:
+            return {'criados': 0, 'atualizados': 0, 'removidos': 0}
+
+        with NotaBimestralService.marcacao_em_lote():
+            # 1. Busca registros existentes (1 query)
+            existentes = {
+                n.matricula_turma_id: n
+                for n in NotaAvaliacao.objects.filter(
+                    avaliacao=avaliacao,
+                    matricula_turma_id__in=notas.keys()
+                )
+            }
+
+            # 2. Separa para criar / atualizar / remover (nota apagada)
+            para_criar = []
+            para_atualizar = []
+            para_remover = []
+            agora = timezone.now()
+
+            for mt_id, nota in notas.items():
+                existente = existentes.get(mt_id)
+                if nota is None:
+                    if existente:
+                        para_remover.append(existente)
+                elif existente is None:
+                    para_criar.append(NotaAvaliacao(
+                        avaliacao=avaliacao,
+                        matricula_turma_id=mt_id,
+                        nota=nota,
+                        criado_por=usuario
+                    ))
+                elif existente.nota != nota or existente.criado_por_id != usuario.id:
+                    existente.nota = nota
+                    existente.criado_por = usuario
+                    existente.atualizado_em = agora
+                    para_atualizar.append(existente)
+
+            # 3. Bulk operations (1 query cada)
+            if para_remover:
+                NotaAvaliacao.objects.filter(id__in=[n.id for n in para_remover]).delete()
+            if para_criar:
+                NotaAvaliacao.objects.bulk_create(para_criar)
+            if para_atualizar:
+                NotaAvaliacao.objects.bulk_update(para_atualizar, ['nota', 'criado_por', 'atualizado_em'])
+
+            # 4. bulk_* e delete() em queryset não disparam signals: marca as
+            # notas bimestrais afetadas
+            alterados = [n.matricula_turma_id for n in para_criar + para_atualizar + para_remover]
+            NotaBimestralService.marcar_pendentes(avaliacao.pk, alterados, usuario.id)
+
+        return {
+            'criados': len(para_criar),
+            'atualizados': len(para_atualizar),
+            'removidos': len(para_remover)
+        }
@@ -0,0 +1,489 @@
+"""
+Serviço de cálculo em lote das notas bimestrais.
+
+Este módulo centraliza o cálculo de NotaBimestral.nota_calculo_avaliacoes
+a partir das notas lançadas nas avaliações (NotaAvaliacao). O cálculo é
+feito por escopo (turma, disciplina da turma ou ano letivo inteiro) com
+uma única query agrupada e persistido com um único upsert em lote.
+
+Também mantém o recálculo incremental: escritas em NotaAvaliacao marcam as
+chaves afetadas em NotaBimestralPendente e o worker processa só essas chaves.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Max, OuterRef, Q, Subquery, Sum, UUIDField
+from django.utils import timezone
+
+from apps.academic.models import MatriculaTurma
+from apps.core.models import AnoLetivo
+from apps.evaluation.config import regras_avaliacao
+from apps.evaluation.services.boletim_service import BoletimService
+from apps.evaluation.models import (
+    Avaliacao,
+    AvaliacaoConfigDisciplinaTurma,
+    NotaAvaliacao,
+    NotaBimestral,
+    NotaBimestralPendente,
+)
+
+
+_REGULAR = Q(avaliacao__tipo='AVALIACAO_REGULAR')
+_EXTRA = Q(avaliacao__tipo='AVALIACAO_EXTRA')
+_RECUPERACAO = Q(avaliacao__tipo='AVALIACAO_RECUPERACAO')
+
+# Lote de marcações pendentes ativo (ver NotaBimestralService.marcacao_em_lote)
+_lote_pendentes = ContextVar('lote_pendentes', default=None)
+
+
+def _decimal(valor):
+    """Normaliza o retorno dos agregados (alguns bancos devolvem float)."""
+    if valor is None or isinstance(valor, Decimal):
+        return valor
+    return Decimal(str(valor))
+
+
+class NotaBimestralService:
+    """
+    Serviço centralizado para o cálculo das notas bimestrais.
+
+    Regras de cálculo (por estudante x disciplina x bimestre):
+    - SOMA: soma das notas das avaliações regulares
+    - MEDIA_PONDERADA: sum(nota / valor * peso) / sum(peso) * valor_maximo
+    - Avaliação extra é somada ao resultado, limitado ao valor máximo
+    - Avaliação de recuperação é gravada em nota_recuperacao
+    - nota_final NUNCA é alterada por este serviço
+    """
+
+    @staticmethod
+    def calcular_turma(turma, usuario, bimestre=None):
+        """
+        Calcula as notas bimestrais de todas as disciplinas de uma turma.
+
+        Args:
+            turma: Instância de Turma
+            usuario: Usuário gravado em criado_por nos registros novos
+            bimestre: Bimestre (1-4) ou None para todos
+
+        Returns:
+            dict: {'calculados': int, 'limpos': int}
+        """
+        ano_letivo = AnoLetivo.objects.get(ano=turma.ano_letivo)
+        return NotaBimestralService._calcular(
+            ano_letivo,
+            usuario,
+            filtros={'matricula_turma__turma_id': turma.id},
+            bimestre=bimestre,
+        )
+
+    @staticmethod
+    def calcular_disciplina_turma(disciplina_turma, usuario, bimestre=None):
+        """
+        Calcula as notas bimestrais de uma disciplina em uma turma.
+
+        Args:
+            disciplina_turma: Instância de DisciplinaTurma
+            usuario: Usuário gravado em criado_por nos registros novos
+            bimestre: Bimestre (1-4) ou None para todos
+
+        Returns:
+            dict: {'calculados': int, 'limpos': int}
+        """
+        ano_letivo = AnoLetivo.objects.get(ano=disciplina_turma.turma.ano_letivo)
+        return NotaBimestralService._calcular(
+            ano_letivo,
+            usuario,
+            filtros={'matricula_turma__turma_id': disciplina_turma.turma_id},
+            disciplina_id=disciplina_turma.disciplina_id,
+            bimestre=bimestre,
+        )
+
+    @staticmethod
+    def calcular_ano_letivo(ano_letivo, usuario, bimestre=None):
+        """
+        Calcula as notas bimestrais de todas as turmas de um ano letivo.
+
+        Args:
+            ano_letivo: Instância de AnoLetivo
+            usuario: Usuário gravado em criado_por nos registros novos
+            bimestre: Bimestre (1-4) ou None para todos
+
+        Returns:
+            dict: {'calculados': int, 'limpos': int}
+        """
+        return NotaBimestralService._calcular(
+            ano_letivo,
+            usuario,
+            filtros={'matricula_turma__turma__ano_letivo': ano_letivo.ano},
+            bimestre=bimestre,
+        )
+
+    @staticmethod
+    def _agregar_notas(ano_letivo, **filtros):
+        """
+        Agrega as notas das avaliações em UMA query agrupada por
+        (matricula_turma, disciplina, bimestre).
+
+        A disciplina é resolvida por subquery na tabela M2M da avaliação,
+        restrita à turma do estudante, para não duplicar linhas quando a
+        avaliação está vinculada a várias turmas.
+
+        Args:
+            ano_letivo: Instância de AnoLetivo
+            **filtros: Lookups sobre NotaAvaliacao (aceita 'disciplina_ref')
+        """
+        through = Avaliacao.professores_disciplinas_turmas.through
+        disciplina_sq = through.objects.filter(
+            avaliacao_id=OuterRef('avaliacao_id'),
+            professordisciplinaturma__disciplina_turma__turma_id=OuterRef('matricula_turma__turma_id'),
+        ).values('professordisciplinaturma__disciplina_turma__disciplina_id')[:1]
+
+        qs = NotaAvaliacao.objects.filter(
+            avaliacao__ano_letivo=ano_letivo,
+            nota__isnull=False,
+        ).annotate(
+            disciplina_ref=Subquery(disciplina_sq, output_field=UUIDField())
+        ).filter(disciplina_ref__isnull=False, **filtros)
+
+        decimal = DecimalField(max_digits=20, decimal_places=10)
+        return qs.order_by().values(
+            'matricula_turma_id',
+            'matricula_turma__turma_id',
+            'disciplina_ref',
+            'avaliacao__bimestre',
+        ).annotate(
+            soma=Sum('nota', filter=_REGULAR),
+            soma_ponderada=Sum(
+                F('nota') * F('avaliacao__peso') / F('avaliacao__valor'),
+                filter=_REGULAR & Q(avaliacao__valor__gt=0),
+                output_field=decimal,
+            ),
+            peso_total=Sum('avaliacao__peso', filter=_REGULAR & Q(avaliacao__valor__gt=0)),
+            extra=Max('nota', filter=_EXTRA),
+            recuperacao=Max('nota', filter=_RECUPERACAO),
+        )
+
+    @staticmethod
+    def _formas_calculo(ano_letivo):
+        """
+        Retorna (forma_global, mapa) onde mapa é {(turma_id, disciplina_id): forma}.
+
+        O mapa só é consultado quando a forma global é LIVRE_ESCOLHA.
+        """
+        forma_global = regras_avaliacao(ano_letivo).forma_calculo
+        if forma_global != 'LIVRE_ESCOLHA':
+            return forma_global, {}
+
+        mapa = {
+            (turma_id, disciplina_id): forma
+            for turma_id, disciplina_id, forma in AvaliacaoConfigDisciplinaTurma.objects.filter(
+                ano_letivo=ano_letivo
+            ).values_list(
+                'disciplina_turma__turma_id',
+                'disciplina_turma__disciplina_id',
+                'forma_calculo',
+            )
+        }
+        return forma_global, mapa
+
+    @staticmethod
+    def _calcular_valor(linha, forma, valor_maximo):
+        """Aplica a forma de cálculo a uma linha agregada (sem arredondar)."""
+        extra = _decimal(linha['extra'])
+
+        if forma == 'MEDIA_PONDERADA':
+            peso_total = _decimal(linha['peso_total'])
+            base = None
+            if peso_total:
+                base = _decimal(linha['soma_ponderada']) / peso_total * valor_maximo
+        else:
+            base = _decimal(linha['soma'])
+
+        if base is None and extra is None:
+            return None
+
+        return min((base or Decimal('0')) + (extra or Decimal('0')), valor_maximo)
+
+    @staticmethod
+    def _gravar(ano_letivo, linhas, criado_por_id):
+        """
+        Calcula, arredonda (em lote) e grava as linhas agregadas com UM upsert.
+
+        Args:
+            ano_letivo: Instância de AnoLetivo
+            linhas: Resultado de _agregar_notas
+            criado_por_id: Função (chave) -> id do usuário gravado em criado_por
+                nos registros novos
+
+        Returns:
+            set: Chaves (matricula_turma_id, disciplina_id, bimestre) gravadas
+        """
+        regras = regras_avaliacao(ano_letivo)
+        forma_global, formas = NotaBimestralService._formas_calculo(ano_letivo)
+        valor_maximo = regras.valor_maximo
+
+        valores = [
+            NotaBimestralService._calcular_valor(
+                linha,
+                formas.get(
+                    (linha['matricula_turma__turma_id'], linha['disciplina_ref']), 'SOMA'
+                ) if forma_global == 'LIVRE_ESCOLHA' else forma_global,
+                valor_maximo,
+            )
+            for linha in linhas
+        ]
+        valores = regras.arredondar_bimestral_lote(valores)
+
+        notas = []
+        for linha, valor in zip(linhas, valores):
+            chave = (linha['matricula_turma_id'], linha['disciplina_ref'], linha['avaliacao__bimestre'])
+            notas.append(NotaBimestral(
+                matricula_turma_id=chave[0],
+                disciplina_id=chave[1],
+                bimestre=chave[2],
+                nota_calculo_avaliacoes=valor,
+                nota_recuperacao=_decimal(linha['recuperacao']),
+                criado_por_id=criado_por_id(chave),
+            ))
+
+        if notas:
+            NotaBimestral.objects.bulk_create(
+                notas,
+                update_conflicts=True,
+                unique_fields=['matricula_turma', 'disciplina', 'bimestre'],
+                update_fields=['nota_calculo_avaliacoes', 'nota_recuperacao', 'atualizado_em'],
+            )
+            BoletimService.agendar(matriculas={n.matricula_turma_id for n in notas})
+
+        return {(n.matricula_turma_id, n.disciplina_id, n.bimestre) for n in notas}
+
+    @staticmethod
+    def _limpar_obsoletas(existentes, calculadas, chaves=None):
+        """
+        Limpa o cálculo das NotaBimestral que não têm mais notas lançadas.
+
+        Args:
+            existentes: QuerySet de NotaBimestral no escopo
+            calculadas: Chaves gravadas por _gravar
+            chaves: Se informado, limita a limpeza a estas chaves
+
+        Returns:
+            int: Quantidade de registros limpos
+        """
+        existentes = existentes.filter(
+            Q(nota_calculo_avaliacoes__isnull=False) | Q(nota_recuperacao__isnull=False)
+        )
+        obsoletas = []
+        matriculas = set()
+        for pk, *chave in existentes.values_list('id', 'matricula_turma_id', 'disciplina_id', 'bimestre'):
+            chave = tuple(chave)
+            if chave in calculadas or (chaves is not None and chave not in chaves):
+                continue
+            obsoletas.append(pk)
+            matriculas.add(chave[0])
+
+        if obsoletas:
+            NotaBimestral.objects.filter(id__in=obsoletas).update(
+                nota_calculo_avaliacoes=None,
+                nota_recuperacao=None,
+                atualizado_em=timezone.now(),
+            )
+            BoletimService.agendar(matriculas=matriculas)
+        return len(obsoletas)
+
+    @staticmethod
+    @transaction.atomic
+    def _calcular(ano_letivo, usuario, filtros, disciplina_id=None, bimestre=None):
+        """
+        Executa o cálculo para um escopo.
+
+        Queries: 1 agregação + 0/1 configs (LIVRE_ESCOLHA) + 1 upsert
+        + 1 leitura e até 1 UPDATE para limpar cálculos obsoletos.
+
+        Args:
+            ano_letivo: Instância de AnoLetivo
+            usuario: Usuário gravado em criado_por nos registros novos
+            filtros: Lookups sobre matricula_turma válidos em NotaAvaliacao e NotaBimestral
+            disciplina_id: Restringe a uma disciplina (opcional)
+            bimestre: Restringe a um bimestre (opcional)
+
+        Returns:
+            dict: {'calculados': int, 'limpos': int}
+        """
+        filtros_notas = dict(filtros)
+        existentes = NotaBimestral.objects.filter(**filtros)
+        if bimestre:
+            filtros_notas['avaliacao__bimestre'] = bimestre
+            existentes = existentes.filter(bimestre=bimestre)
+        if disciplina_id:
+            filtros_notas['disciplina_ref'] = disciplina_id
+            existentes = existentes.filter(disciplina_id=disciplina_id)
+
+        linhas = list(NotaBimestralService._agregar_notas(ano_letivo, **filtros_notas))
+        calculadas = NotaBimestralService._gravar(ano_letivo, linhas, lambda chave: usuario.id)
+        limpos = NotaBimestralService._limpar_obsoletas(existentes, calculadas)
+
+        return {'calculados': len(calculadas), 'limpos': limpos}
+
+    # -------------------------------------------------------------------------
+    # Recálculo incremental (chaves pendentes)
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    @contextmanager
+    def marcacao_em_lote():
+        """
+        Agrupa as marcações de pendência feitas dentro do bloco em uma única
+        gravação ao final (evita 2 queries por NotaAvaliacao salva).
+
+        Uso:
+            with NotaBimestralService.marcacao_em_lote():
+                for item in itens:
+                    NotaAvaliacao.objects.update_or_create(...)
+        """
+        if _lote_pendentes.get() is not None:
+            # Bloco aninhado: o bloco externo grava
+            yield
+            return
+
+        lote = {}
+        token = _lote_pendentes.set(lote)
+        try:
+            yield
+        finally:
+            _lote_pendentes.reset(token)
+
+        for (avaliacao_id, usuario_id), matricula_turma_ids in lote.items():
+            NotaBimestralService.marcar_pendentes(avaliacao_id, matricula_turma_ids, usuario_id)
+
+    @staticmethod
+    def marcar_pendentes(avaliacao_id, matricula_turma_ids, usuario_id):
+        """
+        Marca as chaves (matricula_turma, disciplina, bimestre) afetadas por
+        escritas em NotaAvaliacao de uma avaliação.
+
+        Queries: 1 leitura (disciplina de cada matrícula) + 1 upsert.
+        Dentro de marcacao_em_lote(), apenas acumula.
+
+        Args:
+            avaliacao_id: ID da Avaliacao
+            matricula_turma_ids: IDs das MatriculaTurma alteradas
+            usuario_id: ID do usuário que alterou as notas
+        """
+        matricula_turma_ids = set(matricula_turma_ids)
+        if not matricula_turma_ids:
+            return
+
+        lote = _lote_pendentes.get()
+        if lote is not None:
+            lote.setdefault((avaliacao_id, usuario_id), set()).update(matricula_turma_ids)
+            return
+
+        through = Avaliacao.professores_disciplinas_turmas.through
+        disciplina_sq = through.objects.filter(
+            avaliacao_id=avaliacao_id,
+            professordisciplinaturma__disciplina_turma__turma_id=OuterRef('turma_id'),
+        ).values('professordisciplinaturma__disciplina_turma__disciplina_id')[:1]
+        avaliacao_qs = Avaliacao.objects.filter(pk=avaliacao_id)
+
+        chaves = MatriculaTurma.objects.filter(
+            id__in=matricula_turma_ids
+        ).annotate(
+            disciplina_ref=Subquery(disciplina_sq, output_field=UUIDField()),
+            ano_letivo_ref=Subquery(avaliacao_qs.values('ano_letivo_id')[:1], output_field=UUIDField()),
+            bimestre_ref=Subquery(avaliacao_qs.values('bimestre')[:1]),
+        ).filter(disciplina_ref__isnull=False).values_list(
+            'id', 'disciplina_ref', 'ano_letivo_ref', 'bimestre_ref'
+        )
+
+        pendentes = [
+            NotaBimestralPendente(
+                ano_letivo_id=ano_letivo_id,
+                matricula_turma_id=mt_id,
+                disciplina_id=disciplina_id,
+                bimestre=bimestre,
+                usuario_id=usuario_id,
+            )
+            for mt_id, disciplina_id, ano_letivo_id, bimestre in chaves
+        ]
+        if pendentes:
+            NotaBimestralPendente.objects.bulk_create(
+                pendentes,
+                update_conflicts=True,
+                unique_fields=['matricula_turma', 'disciplina', 'bimestre'],
+                update_fields=['usuario', 'marcado_em'],
+            )
+
+    @staticmethod
+    @transaction.atomic
+    def processar_pendentes(debounce_segundos=2, limite=2000):
+        """
+        Recalcula apenas as NotaBimestral marcadas como pendentes.
+
+        Só processa chaves sem alteração há pelo menos debounce_segundos, de
+        forma que vários cliques de "salvar" seguidos geram um único recálculo.
+        O custo é proporcional ao número de chaves alteradas, não ao tamanho
+        da turma. Chaves remarcadas durante o processamento permanecem na fila.
+
+        Args:
+            debounce_segundos: Tempo mínimo desde a última marcação
+            limite: Máximo de chaves processadas por chamada
+
+        Returns:
+            dict: {'processados': int, 'calculados': int, 'limpos': int}
+        """
+        corte = timezone.now() - timedelta(seconds=debounce_segundos)
+        pendentes = list(
+            NotaBimestralPendente.objects.select_for_update(skip_locked=True).filter(
+                marcado_em__lte=corte
+            ).order_by('marcado_em').values_list(
+                'id', 'ano_letivo_id', 'matricula_turma_id', 'disciplina_id', 'bimestre', 'usuario_id'
+            )[:limite]
+        )
+        if not pendentes:
+            return {'processados': 0, 'calculados': 0, 'limpos': 0}
+
+        por_ano = defaultdict(dict)
+        for _, ano_id, mt_id, disciplina_id, bimestre, usuario_id in pendentes:
+            por_ano[ano_id][(mt_id, disciplina_id, bimestre)] = usuario_id
+
+        anos = AnoLetivo.objects.in_bulk(list(por_ano))
+        calculados = limpos = 0
+
+        for ano_id, chaves in por_ano.items():
+            ano_letivo = anos.get(ano_id)
+            if ano_letivo is None:
+                continue
+
+            mt_ids = {c[0] for c in chaves}
+            disciplina_ids = {c[1] for c in chaves}
+            bimestres = {c[2] for c in chaves}
+
+            linhas = [
+                linha for linha in NotaBimestralService._agregar_notas(
+                    ano_letivo,
+                    matricula_turma_id__in=mt_ids,
+                    disciplina_ref__in=disciplina_ids,
+                    avaliacao__bimestre__in=bimestres,
+                )
+                if (linha['matricula_turma_id'], linha['disciplina_ref'], linha['avaliacao__bimestre']) in chaves
+            ]
+            calculadas = NotaBimestralService._gravar(ano_letivo, linhas, chaves.__getitem__)
+            existentes = NotaBimestral.objects.filter(
+                matricula_turma_id__in=mt_ids,
+                disciplina_id__in=disciplina_ids,
+                bimestre__in=bimestres,
+            )
+            calculados += len(calculadas)
+            limpos += NotaBimestralService._limpar_obsoletas(existentes, calculadas, chaves)
+
+        NotaBimestralPendente.objects.filter(
+            id__in=[p[0] for p in pendentes],
+            marcado_em__lte=corte,
+        ).delete()
+
+        return {'processados': len(pendentes), 'calculados': calculados, 'limpos': limpos}
@@ -0,0 +1,196 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.academic.models import Estudante, MatriculaCEMEP, MatriculaTurma
+from apps.core.models import (
+    AnoLetivo, Curso, Disciplina, DisciplinaTurma, Funcionario,
+    ProfessorDisciplinaTurma, Turma,
+)
+from apps.evaluation.models import Avaliacao, Boletim, NotaAvaliacao, NotaBimestral
+from apps.evaluation.services import BoletimService, MapaNotasService, NotaBimestralService
+from apps.pedagogical.models import FrequenciaBimestral
+from apps.users.models import User
+
+
+class AvaliacaoTestCase(TestCase):
+    """
+    Turma 1A de 2026 com Matemática e Português e três estudantes
+    (Carla, Ana e Bruno, cadastrados nesta ordem).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ano = AnoLetivo.objects.create(
+            ano=2026, is_active=True,
+            data_inicio_1bim=datetime.date(2026, 2, 2), data_fim_1bim=datetime.date(2026, 4, 17),
+            data_inicio_2bim=datetime.date(2026, 4, 27), data_fim_2bim=datetime.date(2026, 7, 3),
+            data_inicio_3bim=datetime.date(2026, 7, 20), data_fim_3bim=datetime.date(2026, 9, 30),
+            data_inicio_4bim=datetime.date(2026, 10, 5), data_fim_4bim=datetime.date(2026, 12, 18),
+        )
+        curso = Curso.objects.create(nome='Informática', sigla='INF')
+        cls.turma = Turma.objects.create(numero=1, letra='A', ano_letivo=2026, curso=curso)
+        cls.mat = Disciplina.objects.create(nome='Matemática', sigla='MAT')
+        cls.por = Disciplina.objects.create(nome='Português', sigla='POR')
+        cls.usuario_professor = User.objects.create_user('prof', password='x', tipo_usuario='PROFESSOR')
+        professor = Funcionario.objects.create(usuario=cls.usuario_professor, matricula=1)
+
+        cls.disciplinas_turmas = {}
+        cls.pdts = {}
+        for disciplina in (cls.mat, cls.por):
+            dt = DisciplinaTurma.objects.create(disciplina=disciplina, turma=cls.turma, aulas_semanais=2)
+            cls.disciplinas_turmas[disciplina.sigla] = dt
+            cls.pdts[disciplina.sigla] = ProfessorDisciplinaTurma.objects.create(professor=professor, disciplina_turma=dt)
+
+        cls.matriculas = []
+        for i, nome in enumerate(['Carla', 'Ana', 'Bruno'], start=1):
+            estudante = Estudante.objects.create(
+                usuario=User.objects.create_user(f'est{i}', first_name=nome, password='x', tipo_usuario='ESTUDANTE'),
+                cpf=f'{i:011d}', data_nascimento=datetime.date(2010, 1, 1),
+                logradouro='Rua', numero='1', bairro='Centro', cep='00000000'
+            )
+            matricula = MatriculaCEMEP.objects.create(
+                numero_matricula=f'M{i}', estudante=estudante, curso=curso,
+                data_entrada=datetime.date(2026, 2, 1)
+            )
+            cls.matriculas.append(MatriculaTurma.objects.create(
+                matricula_cemep=matricula, turma=cls.turma,
+                data_entrada=datetime.date(2026, 2, 1), mumero_chamada=i
+            ))
+
+    def avaliacao(self, titulo, valor, tipo='AVALIACAO_REGULAR', disciplina='MAT', dia=2):
+        avaliacao = Avaliacao.objects.create(
+            ano_letivo=self.ano, bimestre=1, titulo=titulo, valor=Decimal(valor), tipo=tipo,
+            data_inicio=datetime.date(2026, 3, dia), data_fim=datetime.date(2026, 3, dia),
+            criado_por=self.usuario_professor
+        )
+        avaliacao.professores_disciplinas_turmas.set([self.pdts[disciplina]])
+        return avaliacao
+
+    def nota(self, avaliacao, matricula, valor):
+        return NotaAvaliacao.objects.create(
+            avaliacao=avaliacao, matricula_turma=matricula, nota=Decimal(valor),
+            criado_por=self.usuario_professor
+        )
+
+
+class NotaBimestralServiceTests(AvaliacaoTestCase):
+    """Cálculo em lote das notas bimestrais (upsert por matrícula/disciplina/bimestre)."""
+
+    def setUp(self):
+        self.carla, self.ana, _ = self.matriculas
+        self.prova = self.avaliacao('Prova', '5')
+        self.trabalho = self.avaliacao('Trabalho', '5', dia=9)
+        self.recuperacao = self.avaliacao('Recuperação', '10', tipo='AVALIACAO_RECUPERACAO', dia=16)
+        self.nota(self.prova, self.carla, '3.5')
+        self.nota(self.trabalho, self.carla, '4')
+        self.nota(self.recuperacao, self.carla, '6')
+        self.nota_ana = self.nota(self.prova, self.ana, '2')
+
+    def calcular(self):
+        return NotaBimestralService.calcular_disciplina_turma(
+            self.disciplinas_turmas['MAT'], self.usuario_professor, bimestre=1
+        )
+
+    def notas_bimestrais(self):
+        return {
+            n.matricula_turma_id: (n.pk, n.nota_calculo_avaliacoes, n.nota_recuperacao)
+            for n in NotaBimestral.objects.filter(disciplina=self.mat, bimestre=1)
+        }
+
+    def test_calculo_soma_as_avaliacoes_regulares_e_guarda_a_recuperacao(self):
+        self.assertEqual(self.calcular(), {'calculados': 2, 'limpos': 0})
+
+        notas = self.notas_bimestrais()
+        self.assertEqual(notas[self.carla.id][1:], (Decimal('7.5'), Decimal('6')))
+        self.assertEqual(notas[self.ana.id][1:], (Decimal('2'), None))
+
+    def test_recalculo_atualiza_o_mesmo_registro(self):
+        self.calcular()
+        antes = self.notas_bimestrais()
+
+        NotaAvaliacao.objects.filter(pk=self.nota_ana.pk).update(nota=Decimal('3'))
+        self.calcular()
+
+        depois = self.notas_bimestrais()
+        self.assertEqual(depois[self.ana.id], (antes[self.ana.id][0], Decimal('3'), None))
+        self.assertEqual(depois[self.carla.id], antes[self.carla.id])
+
+    def test_recalculo_limpa_quem_ficou_sem_notas(self):
+        self.calcular()
+
+        NotaAvaliacao.objects.filter(pk=self.nota_ana.pk).delete()
+
+        self.assertEqual(self.calcular(), {'calculados': 1, 'limpos': 1})
+        self.assertEqual(self.notas_bimestrais()[self.ana.id][1:], (None, None))
+
+
+class BoletimServiceTests(AvaliacaoTestCase):
+    """Documento materializado do boletim."""
+
+    def setUp(self):
+        self.matricula = self.matriculas[0]
+        NotaBimestral.objects.create(
+            matricula_turma=self.matricula, disciplina=self.mat, bimestre=1,
+            nota_calculo_avaliacoes=Decimal('7.5'), criado_por=self.usuario_professor
+        )
+        FrequenciaBimestral.objects.create(
+            estudante_id=self.matricula.matricula_cemep.estudante_id,
+            disciplina_turma=self.disciplinas_turmas['MAT'], bimestre=1, total_aulas=10, total_faltas=2
+        )
+
+    def test_documento_reune_notas_e_frequencia_por_bimestre(self):
+        self.assertEqual(
+            BoletimService.reconstruir(matriculas=[self.matricula.id]), {'boletins': 1, 'alterados': 1}
+        )
+
+        dados = Boletim.objects.get(matricula_turma=self.matricula).dados
+        self.assertEqual(dados['estudante']['nome'], 'Carla')
+        self.assertEqual(dados['turma']['sigla'], '1A - INF')
+        self.assertEqual([d['disciplina_sigla'] for d in dados['disciplinas']], ['MAT', 'POR'])
+
+        matematica = dados['disciplinas'][0]
+        primeiro = matematica['bimestres']['1']
+        self.assertEqual(Decimal(primeiro['nota_calculo_avaliacoes']), Decimal('7.5'))
+        self.assertEqual((primeiro['total_aulas'], primeiro['total_faltas'], primeiro['frequencia']), (10, 2, 80.0))
+        self.assertIsNone(matematica['bimestres']['2']['nota_calculo_avaliacoes'])
+        self.assertEqual(matematica['anual'], {'total_aulas': 10, 'total_faltas': 2, 'frequencia': 80.0})
+
+        # Conteúdo igual: nada é regravado (assinatura/ETag preservados)
+        self.assertEqual(
+            BoletimService.reconstruir(matriculas=[self.matricula.id]), {'boletins': 1, 'alterados': 0}
+        )
+
+    def test_documento_visivel_mostra_apenas_bimestres_liberados(self):
+        BoletimService.reconstruir(matriculas=[self.matricula.id])
+        dados = Boletim.objects.get(matricula_turma=self.matricula).dados
+
+        parcial = BoletimService.documento_visivel(dados, (1,))
+        self.assertEqual(list(parcial['disciplinas'][0]['bimestres']), ['1'])
+        self.assertIsNone(parcial['disciplinas'][0]['anual'])
+
+        completo = BoletimService.documento_visivel(dados, (1, 2, 3, 4, 5))
+        self.assertEqual(completo['disciplinas'][0]['anual'], dados['disciplinas'][0]['anual'])
+
+
+class MapaNotasServiceTests(AvaliacaoTestCase):
+    """Mapa de notas pivotado (estudantes x avaliações)."""
+
+    def test_notas_pivotadas_por_estudante_e_avaliacao(self):
+        carla, ana, bruno = self.matriculas
+        trabalho = self.avaliacao('Trabalho', '4', dia=9)
+        prova = self.avaliacao('Prova', '6', dia=2)
+        redacao = self.avaliacao('Redação', '5', disciplina='POR')
+        self.nota(prova, carla, '5.5')
+        self.nota(trabalho, bruno, '3')
+        self.nota(redacao, ana, '4')
+
+        mapa = MapaNotasService.montar(self.disciplinas_turmas['MAT'], 1)
+
+        # Linhas pela chamada (alfabética), colunas pela data da avaliação
+        self.assertEqual(mapa['estudantes']['nome'], ['Ana', 'Bruno', 'Carla'])
+        self.assertEqual(mapa['estudantes']['numero_chamada'], [1, 2, 3])
+        self.assertEqual(mapa['avaliacoes']['titulo'], ['Prova', 'Trabalho'])
+        self.assertEqual(mapa['avaliacoes']['valor'], [6.0, 4.0])
+        self.assertEqual(mapa['notas'], [[None, None], [None, 3.0], [5.5, None]])
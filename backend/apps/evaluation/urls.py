@@ -1,11 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AvaliacaoViewSet, DigitarNotaViewSet, AvaliacaoConfigDisciplinaTurmaViewSet
+from .views import AvaliacaoViewSet, DigitarNotaViewSet, AvaliacaoConfigDisciplinaTurmaViewSet, NotaBimestralViewSet, BoletimViewSet, MapaNotasViewSet
 
 router = DefaultRouter()
 router.register('avaliacoes', AvaliacaoViewSet, basename='avaliacoes')
 router.register('digitar-notas', DigitarNotaViewSet, basename='digitar-notas')
 router.register('config-disciplina-turma', AvaliacaoConfigDisciplinaTurmaViewSet, basename='config-disciplina-turma')
+router.register('notas-bimestrais', NotaBimestralViewSet, basename='notas-bimestrais')
+router.register('boletins', BoletimViewSet, basename='boletins')
+router.register('mapa-notas', MapaNotasViewSet, basename='mapa-notas')
 
 app_name = 'evaluation'
 
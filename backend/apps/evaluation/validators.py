@@ -5,7 +5,7 @@ Este módulo centraliza as validações de regras de negócio para notas de aval
 """
 from decimal import Decimal
 from django.core.exceptions import ValidationError
-from apps.evaluation.config import get_config_from_ano_letivo
+from apps.evaluation.config import regras_avaliacao
 
 
 def validar_estudante_elegivel(matricula_turma, avaliacao):
@@ -47,31 +47,23 @@ def validar_nota_avaliacao(nota, avaliacao, ano_letivo):
     Raises:
         ValidationError: Se a nota é inválida
     """
-    if nota is None:
-        return  # Nota vazia é permitida
-    
-    nota = Decimal(str(nota))
-    
-    # Validação de range
-    if nota < Decimal('0'):
-        raise ValidationError("A nota não pode ser negativa.")
-    
-    if nota > avaliacao.valor:
-        raise ValidationError(
-            f"A nota ({nota}) não pode exceder o valor máximo da avaliação ({avaliacao.valor})."
-        )
-    
-    # Validação de casas decimais
-    cfg = get_config_from_ano_letivo(ano_letivo)
-    casas_decimais = cfg['CASAS_DECIMAIS_AVALIACAO']
-    
-    # Verifica se a nota tem mais casas decimais que o permitido
-    # Multiplica pelo fator e verifica se é inteiro
-    fator = Decimal(10) ** casas_decimais
-    if (nota * fator) % 1 != 0:
-        raise ValidationError(
-            f"A nota deve ter no máximo {casas_decimais} casa(s) decimal(ais)."
-        )
+    validar_notas_avaliacao([nota], avaliacao, ano_letivo)
+
+
+def validar_notas_avaliacao(notas, avaliacao, ano_letivo):
+    """
+    Versão em lote de validar_nota_avaliacao: as regras do ano letivo são
+    obtidas uma única vez para toda a sequência.
+
+    Raises:
+        ValidationError: Na primeira nota inválida
+    """
+    regras = regras_avaliacao(ano_letivo)
+    notas = [None if nota is None else Decimal(str(nota)) for nota in notas]
+
+    for erro in regras.erros_notas(notas, avaliacao.valor):
+        if erro:
+            raise ValidationError(erro)
 
 
 def get_estudantes_elegiveis(avaliacao, turma_id):
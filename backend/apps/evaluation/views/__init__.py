@@ -1,5 +1,8 @@
 from .avaliacao import AvaliacaoViewSet
 from .avaliacao_digitar_nota import DigitarNotaViewSet
 from .avaliacao_config_disciplina_turma import AvaliacaoConfigDisciplinaTurmaViewSet
+from .nota_bimestral import NotaBimestralViewSet
+from .boletim import BoletimViewSet
+from .mapa_notas import MapaNotasViewSet
 
-__all__ = ['AvaliacaoViewSet', 'DigitarNotaViewSet', 'AvaliacaoConfigDisciplinaTurmaViewSet']
+__all__ = ['AvaliacaoViewSet', 'DigitarNotaViewSet', 'AvaliacaoConfigDisciplinaTurmaViewSet', 'NotaBimestralViewSet', 'BoletimViewSet', 'MapaNotasViewSet']
@@ -75,6 +75,9 @@ class AvaliacaoViewSet(AnoLetivoFilterMixin, viewsets.ModelViewSet):
         Refina o queryset base:
         - PROFESSOR: avaliações que criou ou tem vínculo via PDT
         - OUTROS: todas do ano letivo selecionado
+
+        O ownership (OWNER na Policy e is_owner nos serializers) é anotado na
+        própria consulta.
         """
         qs = super().get_queryset()
         user = self.request.user
@@ -87,7 +90,7 @@ class AvaliacaoViewSet(AnoLetivoFilterMixin, viewsets.ModelViewSet):
                 Q(professores_disciplinas_turmas__professor__usuario=user)
             ).distinct()
         
-        return qs.order_by('-data_inicio', '-criado_em')
+        return qs.annotate_is_owner(user).order_by('-data_inicio', '-criado_em')
 
     def get_serializer_context(self):
         """Adiciona request ao contexto do serializer."""
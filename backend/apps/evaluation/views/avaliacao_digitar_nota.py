@@ -46,6 +46,10 @@ class DigitarNotaViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     )]
     lookup_field = 'pk'
 
+    def get_queryset(self):
+        """Anota o ownership (OWNER) na consulta da avaliação."""
+        return super().get_queryset().annotate_is_owner(self.request.user)
+
 
     def retrieve(self, request, pk=None):
         """
@@ -0,0 +1,60 @@
+"""
+ViewSet para leitura do boletim materializado.
+
+O boletim vem pronto da tabela Boletim (uma consulta indexada por matrícula),
+sem tocar NotaBimestral/FrequenciaBimestral. A resposta leva um ETag; se o
+cliente já tem a versão (If-None-Match), responde 304 sem corpo.
+"""
+from rest_framework import viewsets
+
+from apps.core.utils import gerar_etag, resposta_com_etag
+from apps.evaluation.models import Boletim
+from apps.evaluation.services import BoletimService
+from core_project.permissions import Policy, ALUNO, FUNCIONARIO, NONE, OWNER
+
+
+class BoletimViewSet(viewsets.GenericViewSet):
+    """
+    ViewSet para boletins.
+
+    Endpoints:
+    - GET /boletins/<matricula_turma_id>/: Boletim da matrícula na turma
+
+    Estudantes e responsáveis (OWNER) veem apenas os bimestres com
+    VISUALIZACAO_BOLETIM liberada; funcionários veem o boletim completo.
+    A leitura não grava: os documentos são mantidos pelo agendamento do
+    BoletimService e por manage.py reconstruir_boletins (matrículas sem
+    documento respondem 404).
+    """
+    lookup_field = 'matricula_turma'
+    lookup_value_regex = '[0-9a-f-]{36}'
+    permission_classes = [Policy(
+        create=NONE,
+        read=[OWNER, FUNCIONARIO],
+        update=NONE,
+        delete=NONE,
+    )]
+
+    def get_queryset(self):
+        return Boletim.objects.annotate_is_owner(self.request.user).only(
+            'id', 'matricula_turma_id', 'dados', 'assinatura'
+        )
+
+    def retrieve(self, request, matricula_turma=None):
+        """
+        GET /boletins/<matricula_turma_id>/
+        """
+        boletim = self.get_object()
+
+        if request.user.tipo_usuario in ALUNO:
+            liberados = BoletimService.bimestres_liberados(boletim.dados['ano_letivo'])
+        else:
+            liberados = None
+
+        etag = gerar_etag('boletim', boletim.id, boletim.assinatura, liberados)
+
+        return resposta_com_etag(
+            request, etag,
+            lambda: boletim.dados if liberados is None
+            else BoletimService.documento_visivel(boletim.dados, liberados)
+        )
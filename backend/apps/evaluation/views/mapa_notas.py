@@ -0,0 +1,66 @@
+"""
+ViewSet para o mapa de notas (estudantes x avaliações) de uma disciplina da turma.
+"""
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+from apps.core.models import DisciplinaTurma, ProfessorDisciplinaTurma
+from apps.evaluation.serializers import MapaNotasSerializer
+from apps.evaluation.services import MapaNotasService
+from core_project.permissions import Policy, GESTAO, SECRETARIA, PROFESSOR, NONE
+
+
+class MapaNotasViewSet(viewsets.GenericViewSet):
+    """
+    ViewSet para o mapa de notas.
+
+    Endpoints:
+    - GET /mapa-notas/?disciplina_turma=UUID&bimestre=N: Matriz colunar (JSON)
+    - GET /mapa-notas/?disciplina_turma=UUID&bimestre=N&formato=xlsx: Planilha
+    """
+    serializer_class = MapaNotasSerializer
+    permission_classes = [Policy(
+        create=NONE,
+        read=[GESTAO, SECRETARIA, PROFESSOR],
+        update=NONE,
+        delete=NONE,
+    )]
+
+    def list(self, request):
+        """
+        GET /mapa-notas/?disciplina_turma=UUID&bimestre=N[&formato=xlsx]
+        """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        disciplina_turma = get_object_or_404(
+            DisciplinaTurma.objects.select_related('turma', 'disciplina'),
+            pk=params['disciplina_turma'],
+        )
+
+        # Professor: apenas disciplinas da turma às quais está vinculado
+        if request.user.tipo_usuario == PROFESSOR and not ProfessorDisciplinaTurma.objects.filter(
+            disciplina_turma=disciplina_turma,
+            professor__usuario=request.user,
+        ).exists():
+            raise PermissionDenied('Você não está vinculado a esta disciplina da turma.')
+
+        mapa = MapaNotasService.montar(disciplina_turma, params['bimestre'])
+
+        if params['formato'] == 'xlsx':
+            turma = disciplina_turma.turma
+            return FileResponse(
+                MapaNotasService.exportar_xlsx(mapa),
+                as_attachment=True,
+                filename=(
+                    f"mapa_notas_{turma.numero}{turma.letra}_"
+                    f"{disciplina_turma.disciplina.sigla}_{params['bimestre']}bim.xlsx"
+                ),
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+
+        return Response(mapa)
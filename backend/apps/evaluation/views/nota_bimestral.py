@@ -0,0 +1,60 @@
+"""
+ViewSet para o cálculo em lote das notas bimestrais.
+"""
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+
+from apps.core.models import AnoLetivo, Turma, DisciplinaTurma
+from apps.evaluation.models import NotaBimestral
+from apps.evaluation.serializers import CalcularNotasBimestraisSerializer
+from apps.evaluation.services import NotaBimestralService
+from core_project.permissions import Policy, GESTAO, SECRETARIA, NONE
+
+
+class NotaBimestralViewSet(viewsets.GenericViewSet):
+    """
+    ViewSet para notas bimestrais.
+
+    Endpoints:
+    - POST /notas-bimestrais/calcular/: Calcula nota_calculo_avaliacoes em lote
+    """
+    queryset = NotaBimestral.objects.all()
+    serializer_class = CalcularNotasBimestraisSerializer
+    permission_classes = [Policy(
+        create=NONE,
+        read=NONE,
+        update=NONE,
+        delete=NONE,
+        custom={
+            'calcular': [GESTAO, SECRETARIA],
+        }
+    )]
+
+    @action(detail=False, methods=['post'])
+    def calcular(self, request):
+        """
+        POST /notas-bimestrais/calcular/
+        Body: { turma_id | disciplina_turma_id | ano, bimestre? }
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+        bimestre = dados.get('bimestre')
+
+        if dados.get('turma_id'):
+            turma = get_object_or_404(Turma, pk=dados['turma_id'])
+            resultado = NotaBimestralService.calcular_turma(turma, request.user, bimestre)
+        elif dados.get('disciplina_turma_id'):
+            disciplina_turma = get_object_or_404(
+                DisciplinaTurma.objects.select_related('turma'), pk=dados['disciplina_turma_id']
+            )
+            resultado = NotaBimestralService.calcular_disciplina_turma(
+                disciplina_turma, request.user, bimestre
+            )
+        else:
+            ano_letivo = get_object_or_404(AnoLetivo, ano=dados['ano'])
+            resultado = NotaBimestralService.calcular_ano_letivo(ano_letivo, request.user, bimestre)
+
+        return Response(resultado, status=status.HTTP_200_OK)
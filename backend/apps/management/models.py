@@ -2,6 +2,7 @@
 App Management - Tarefas, HTPC, Avisos
 """
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from apps.core.models import Funcionario, UUIDModel
 from ckeditor.fields import RichTextField
@@ -58,6 +59,10 @@ class Tarefa(UUIDModel):
 
     def is_owner(self, user):
         return self.criado_por == user
+
+    @classmethod
+    def owner_q(cls, user):
+        return Q(criado_por=user)
     
     class Meta:
         verbose_name = 'Tarefa'
@@ -248,6 +253,10 @@ class Aviso(UUIDModel):
     
     def is_owner(self, user):
         return self.criado_por == user
+
+    @classmethod
+    def owner_q(cls, user):
+        return Q(criado_por=user)
     
     class Meta:
         verbose_name = 'Aviso'
@@ -3,6 +3,7 @@ from .models import (
     PlanoAula,
     Aula,
     Faltas,
+    FrequenciaBimestral,
     DescritorOcorrenciaPedagogica,
     DescritorOcorrenciaPedagogicaAnoLetivo,
     Atividade
@@ -32,6 +33,13 @@ class FaltasAdmin(admin.ModelAdmin):
     list_filter = ('aula__data', 'aula__bimestre')
     search_fields = ('estudante__nome',)
 
+@admin.register(FrequenciaBimestral)
+class FrequenciaBimestralAdmin(admin.ModelAdmin):
+    list_display = ('estudante', 'disciplina_turma', 'bimestre', 'total_aulas', 'total_faltas', 'atualizado_em')
+    list_filter = ('bimestre', 'disciplina_turma__turma__ano_letivo')
+    search_fields = ('estudante__nome_social', 'estudante__usuario__first_name')
+    readonly_fields = ('total_aulas', 'total_faltas', 'atualizado_em')
+
 @admin.register(DescritorOcorrenciaPedagogica)
 class DescritorOcorrenciaPedagogicaAdmin(admin.ModelAdmin):
     list_display = ('texto',)
@@ -0,0 +1,28 @@
+"""
+Management Command para reconstrução da frequência materializada.
+Recalcula FrequenciaBimestral a partir de Aula e Faltas (ex.: após importações
+ou cargas feitas sem passar pelo FaltasService).
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói a frequência materializada (FrequenciaBimestral) de um ano letivo ou de todos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano',
+            type=int,
+            help='Ano letivo a reconstruir (padrão: todos).',
+        )
+
+    def handle(self, *args, **options):
+        from apps.pedagogical.services.frequencia_service import FrequenciaService
+
+        ano = options['ano']
+        escopo = f'ano letivo {ano}' if ano else 'todos os anos letivos'
+        self.stdout.write(self.style.NOTICE(f'Reconstruindo frequências ({escopo})...'))
+
+        resultado = FrequenciaService.reconstruir(ano)
+
+        self.stdout.write(self.style.SUCCESS(f"Linhas gravadas: {resultado['linhas']}"))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-16 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aula',
+            name='versoes_faltas',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Versões das Faltas'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-16 11:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_initial'),
+        ('core', '0003_anoletivo_indice_dias'),
+        ('pedagogical', '0003_aula_versoes_faltas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrequenciaBimestral',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('bimestre', models.PositiveSmallIntegerField(choices=[(0, 'Anual'), (1, '1º Bimestre'), (2, '2º Bimestre'), (3, '3º Bimestre'), (4, '4º Bimestre')], verbose_name='Bimestre')),
+                ('total_aulas', models.PositiveIntegerField(default=0, verbose_name='Total de Aulas Dadas')),
+                ('total_faltas', models.PositiveIntegerField(default=0, verbose_name='Total de Faltas')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('disciplina_turma', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frequencias_bimestrais', to='core.disciplinaturma')),
+                ('estudante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frequencias_bimestrais', to='academic.estudante')),
+            ],
+            options={
+                'verbose_name': 'Frequência Bimestral',
+                'verbose_name_plural': 'Frequências Bimestrais',
+                'indexes': [models.Index(fields=['disciplina_turma', 'bimestre'], name='freq_bim_dt_bim_idx')],
+                'unique_together': {('estudante', 'disciplina_turma', 'bimestre')},
+            },
+        ),
+    ]
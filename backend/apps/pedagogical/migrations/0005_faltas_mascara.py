@@ -0,0 +1,65 @@
+# Generated by Django 6.0 on 2026-10-16 12:10
+
+from django.db import migrations, models
+
+
+def preencher_mascara_faltas(apps, schema_editor):
+    """
+    Preenche mascara_faltas e qtd_faltas a partir de aulas_faltas.
+
+    Índices fora de 1..15 (ou não inteiros) não cabem na máscara: em vez de
+    descartá-los, a migração falha listando os registros a corrigir (a
+    operação é atômica, nada é gravado).
+    """
+    Faltas = apps.get_model('pedagogical', 'Faltas')
+
+    invalidos = []
+    lote = []
+    for falta in Faltas.objects.only('id', 'aulas_faltas').iterator(chunk_size=2000):
+        mascara = 0
+        for indice in falta.aulas_faltas or []:
+            if type(indice) is not int or not 1 <= indice <= 15:
+                invalidos.append((falta.id, falta.aulas_faltas))
+                break
+            mascara |= 1 << (indice - 1)
+        if invalidos:
+            continue
+        falta.mascara_faltas = mascara
+        falta.aulas_faltas = [i + 1 for i in range(15) if mascara >> i & 1]
+        falta.qtd_faltas = len(falta.aulas_faltas)
+        lote.append(falta)
+
+        if len(lote) >= 2000:
+            Faltas.objects.bulk_update(lote, ['aulas_faltas', 'mascara_faltas', 'qtd_faltas'])
+            lote = []
+
+    if invalidos:
+        detalhes = '\n'.join(f'  {falta_id}: {aulas}' for falta_id, aulas in invalidos[:50])
+        raise ValueError(
+            f'{len(invalidos)} registro(s) de Faltas com aulas_faltas fora de 1..15 '
+            f'(ou não inteiros). Corrija-os e rode a migração novamente:\n{detalhes}'
+        )
+
+    if lote:
+        Faltas.objects.bulk_update(lote, ['aulas_faltas', 'mascara_faltas', 'qtd_faltas'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0004_frequencia_bimestral'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='faltas',
+            name='mascara_faltas',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Máscara das Aulas com Falta'),
+        ),
+        migrations.AddField(
+            model_name='faltas',
+            name='qtd_faltas',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Quantidade de Faltas'),
+        ),
+        migrations.RunPython(preencher_mascara_faltas, migrations.RunPython.noop),
+    ]
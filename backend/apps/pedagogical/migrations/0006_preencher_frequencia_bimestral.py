@@ -0,0 +1,76 @@
+# Generated by Django 6.0 on 2026-10-17 10:20
+
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Sum
+
+
+def preencher_frequencia_bimestral(apps, schema_editor):
+    """
+    Materializa FrequenciaBimestral para as aulas e faltas já registradas.
+
+    Mesmo cálculo de FrequenciaService.reconstruir(), com os modelos
+    históricos: total de aulas por (disciplina_turma, bimestre) e faltas por
+    estudante, para todos os matriculados na turma.
+    """
+    Aula = apps.get_model('pedagogical', 'Aula')
+    Faltas = apps.get_model('pedagogical', 'Faltas')
+    FrequenciaBimestral = apps.get_model('pedagogical', 'FrequenciaBimestral')
+    MatriculaTurma = apps.get_model('academic', 'MatriculaTurma')
+
+    total_aulas = {
+        (dt_id, bimestre): total
+        for dt_id, bimestre, total in Aula.objects.order_by().values(
+            'professor_disciplina_turma__disciplina_turma_id', 'bimestre'
+        ).annotate(total=Sum('numero_aulas')).values_list(
+            'professor_disciplina_turma__disciplina_turma_id', 'bimestre', 'total'
+        )
+    }
+
+    faltas = {}
+    faltas_qs = Faltas.objects.order_by().values(
+        'aula__professor_disciplina_turma__disciplina_turma_id', 'aula__bimestre', 'estudante_id'
+    ).annotate(total=Sum('qtd_faltas')).values_list(
+        'aula__professor_disciplina_turma__disciplina_turma_id', 'aula__bimestre', 'estudante_id', 'total'
+    )
+    for dt_id, bimestre, estudante_id, total in faltas_qs.iterator(chunk_size=5000):
+        faltas[(dt_id, bimestre, estudante_id)] = total
+
+    matriculados = defaultdict(set)
+    mt_qs = MatriculaTurma.objects.filter(
+        turma__disciplinas_vinculadas__id__in={dt_id for dt_id, _ in total_aulas}
+    ).values_list('turma__disciplinas_vinculadas__id', 'matricula_cemep__estudante_id')
+    for dt_id, estudante_id in mt_qs.iterator(chunk_size=5000):
+        matriculados[dt_id].add(estudante_id)
+    for dt_id, _, estudante_id in faltas:
+        matriculados[dt_id].add(estudante_id)
+
+    chaves = set(total_aulas) | {(dt_id, bimestre) for dt_id, bimestre, _ in faltas}
+    FrequenciaBimestral.objects.all().delete()
+    FrequenciaBimestral.objects.bulk_create(
+        (
+            FrequenciaBimestral(
+                estudante_id=estudante_id,
+                disciplina_turma_id=dt_id,
+                bimestre=bimestre,
+                total_aulas=total_aulas.get((dt_id, bimestre), 0),
+                total_faltas=faltas.get((dt_id, bimestre, estudante_id), 0),
+            )
+            for dt_id, bimestre in chaves
+            for estudante_id in matriculados[dt_id]
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_initial'),
+        ('pedagogical', '0005_faltas_mascara'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_frequencia_bimestral, migrations.RunPython.noop),
+    ]
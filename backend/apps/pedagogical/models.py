@@ -2,8 +2,11 @@
 App Pedagogical - Diário de Classe, Planos de Aula, Faltas, Ocorrências
 """
 from django.db import models
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from apps.core.models import Funcionario, Disciplina, Turma, Habilidade, ProfessorDisciplinaTurma, UUIDModel, Arquivo, AnoLetivo
+from apps.core.models import Funcionario, Disciplina, Turma, Habilidade, DisciplinaTurma, ProfessorDisciplinaTurma, UUIDModel, Arquivo, AnoLetivo
 from apps.academic.models import Estudante, Responsavel
 from ckeditor.fields import RichTextField
 
@@ -65,6 +68,10 @@ class PlanoAula(UUIDModel):
 
         return self.professor.usuario == user
 
+    @classmethod
+    def owner_q(cls, user):
+        return Q(professor__usuario=user)
+
     def save(self, *args, **kwargs):
         if self.ano_letivo and self.data_inicio:
             # Tenta calcular o bimestre automaticamente
@@ -106,7 +113,13 @@ class Aula(UUIDModel):
         default=0,
         verbose_name='Bimestre'
     )
-    
+    # Último seq do cliente aplicado por estudante (auto-save em lote de faltas)
+    # {estudante_id: seq} - ver FaltasService.aplicar_deltas
+    versoes_faltas = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Versões das Faltas'
+    )
     
     class Meta:
         verbose_name = 'Aula'
@@ -122,30 +135,46 @@ class Aula(UUIDModel):
             disciplina_turma=self.professor_disciplina_turma.disciplina_turma,
             professor__usuario=user
         ).exists()
+
+    @classmethod
+    def owner_q(cls, user):
+        return Q(professor_disciplina_turma__disciplina_turma__in=ProfessorDisciplinaTurma.objects.filter(
+            professor__usuario=user
+        ).values('disciplina_turma'))
     
     def __str__(self):
         return f"{self.professor_disciplina_turma} - {self.data.strftime('%d/%m/%Y')}"
 
-    def save(self, *args, **kwargs):
+    def save(self, *args, ano_letivo=None, **kwargs):
+        """
+        Salva a aula recalculando o bimestre pela data.
+
+        Args:
+            ano_letivo: AnoLetivo da turma, se já conhecido por quem chama
+                (ex.: serializer). Evita percorrer PDT -> turma e consultar
+                o ano letivo a cada save.
+        """
+        from apps.pedagogical.validators import identificar_bimestre_ano
+
+        # Bimestre gravado antes do recálculo (frequência do bimestre antigo)
+        self._bimestre_anterior = self.bimestre if not self._state.adding else None
+
+        if self.data and ano_letivo is not None:
+            # Caminho rápido: ano letivo já conhecido, sem percorrer PDT -> turma
+            bim_encontrado = identificar_bimestre_ano(ano_letivo.ano, self.data)
+            if bim_encontrado:
+                self.bimestre = bim_encontrado
         # Tenta calcular/atualizar o bimestre sempre antes de salvar
         # Isso garante correção se a data for alterada na edição
-        if self.data and self.professor_disciplina_turma_id:
+        elif self.data and self.professor_disciplina_turma_id:
             try:
-                # Importação local para evitar ciclo
-                from apps.pedagogical.validators import _identificar_bimestre
-                from apps.core.models import AnoLetivo
-                
                 # Acessa diretamente (se falhar, cai no except)
                 turma = self.professor_disciplina_turma.disciplina_turma.turma
-                
-                # Busca AnoLetivo (cacheado se possível ou query leve)
-                ano_letivo = AnoLetivo.objects.filter(ano=turma.ano_letivo).first()
-                
-                if ano_letivo and ano_letivo.controles:
-                    # Usa validador para identificar bimestre
-                    bim_encontrado = _identificar_bimestre(ano_letivo.controles, self.data.isoformat())
-                    if bim_encontrado:
-                        self.bimestre = bim_encontrado
+
+                # Índice data -> bimestre carregado uma vez por processo (O(1))
+                bim_encontrado = identificar_bimestre_ano(turma.ano_letivo, self.data)
+                if bim_encontrado:
+                    self.bimestre = bim_encontrado
             except Exception:
                 # Em caso de erro (ex: dados incompletos), mantém o valor atual ou default
                 pass
@@ -172,11 +201,47 @@ class Faltas(UUIDModel):
         null=True,
         blank=True
     )
+    # Representação compacta de aulas_faltas (mantida em sincronia pelo save
+    # e pelo FaltasService): bit (i - 1) ligado = falta na aula i.
+    mascara_faltas = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Máscara das Aulas com Falta'
+    )
+    qtd_faltas = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Quantidade de Faltas'
+    )
 
-    @property
-    def qtd_faltas(self):
-        """Retorna a quantidade de faltas para compatibilidade."""
-        return len(self.aulas_faltas) if self.aulas_faltas else 0
+    # Maior índice de aula representável na máscara (smallint)
+    MAX_AULAS_MASCARA = 15
+
+    @staticmethod
+    def codificar_mascara(aulas_faltas):
+        """Converte a lista de índices (1-based) em máscara de bits."""
+        mascara = 0
+        for indice in aulas_faltas or []:
+            if not 1 <= indice <= Faltas.MAX_AULAS_MASCARA:
+                raise ValueError(f'Índice de aula inválido para a máscara de faltas: {indice}')
+            mascara |= 1 << (indice - 1)
+        return mascara
+
+    @staticmethod
+    def decodificar_mascara(mascara):
+        """Converte a máscara de bits na lista de índices (1-based)."""
+        return [i + 1 for i in range(Faltas.MAX_AULAS_MASCARA) if mascara >> i & 1]
+
+    def definir_aulas_faltas(self, aulas_faltas):
+        """Define as aulas com falta atualizando lista, máscara e quantidade."""
+        self.mascara_faltas = self.codificar_mascara(aulas_faltas)
+        self.aulas_faltas = self.decodificar_mascara(self.mascara_faltas)
+        self.qtd_faltas = len(self.aulas_faltas)
+
+    def save(self, *args, **kwargs):
+        self.definir_aulas_faltas(self.aulas_faltas)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'aulas_faltas' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'mascara_faltas', 'qtd_faltas'}
+        super().save(*args, **kwargs)
 
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -201,6 +266,71 @@ class Faltas(UUIDModel):
         return f"{self.estudante} - Falta na aula {self.qtd_faltas} ({self.aula.data})"
 
 
+class FrequenciaBimestral(UUIDModel):
+    """
+    Agregado materializado de frequência por estudante, disciplina da turma e bimestre.
+
+    Mantido incrementalmente pelo FaltasService e pelos signals de Aula
+    (ver FrequenciaService). Reconstrução completa:
+    python manage.py reconstruir_frequencias
+    """
+
+    estudante = models.ForeignKey(
+        Estudante,
+        on_delete=models.CASCADE,
+        related_name='frequencias_bimestrais'
+    )
+    disciplina_turma = models.ForeignKey(
+        DisciplinaTurma,
+        on_delete=models.CASCADE,
+        related_name='frequencias_bimestrais'
+    )
+    # Mesmas choices de Aula.bimestre: aulas fora de todos os bimestres ficam
+    # com bimestre 0 ('Anual') e são agregadas aqui nesse mesmo bimestre.
+    bimestre = models.PositiveSmallIntegerField(
+        choices=[(0, 'Anual'), (1, '1º Bimestre'), (2, '2º Bimestre'), (3, '3º Bimestre'), (4, '4º Bimestre')],
+        verbose_name='Bimestre'
+    )
+    total_aulas = models.PositiveIntegerField(default=0, verbose_name='Total de Aulas Dadas')
+    total_faltas = models.PositiveIntegerField(default=0, verbose_name='Total de Faltas')
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Frequência Bimestral'
+        verbose_name_plural = 'Frequências Bimestrais'
+        unique_together = ['estudante', 'disciplina_turma', 'bimestre']
+        indexes = [
+            models.Index(fields=['disciplina_turma', 'bimestre'], name='freq_bim_dt_bim_idx'),
+        ]
+
+    @property
+    def percentual_frequencia(self):
+        """Percentual de presença (0-100) ou None se não houve aulas."""
+        if not self.total_aulas:
+            return None
+        return round((self.total_aulas - self.total_faltas) * 100 / self.total_aulas, 2)
+
+    def __str__(self):
+        return f"{self.estudante} - {self.disciplina_turma} ({self.bimestre}º Bim): {self.total_faltas}/{self.total_aulas}"
+
+
+@receiver(post_save, sender=Aula)
+def atualizar_frequencia_ao_salvar_aula(sender, instance, **kwargs):
+    """Recalcula a frequência do bimestre da aula (e do anterior, se a data mudou de bimestre)."""
+    from apps.pedagogical.services.frequencia_service import FrequenciaService
+
+    bimestres = {instance.bimestre, getattr(instance, '_bimestre_anterior', None)} - {None}
+    FrequenciaService.recalcular_aula(instance, bimestres=bimestres)
+
+
+@receiver(post_delete, sender=Aula)
+def atualizar_frequencia_ao_excluir_aula(sender, instance, **kwargs):
+    """Recalcula a frequência do bimestre da aula excluída (suas faltas saem em cascata)."""
+    from apps.pedagogical.services.frequencia_service import FrequenciaService
+
+    FrequenciaService.recalcular_aula(instance)
+
+
 # =============================================================================
 # OCORRÊNCIAS PEDAGÓGICAS
 # =============================================================================
@@ -347,6 +477,10 @@ class Atividade(UUIDModel):
             return False
 
         return self.criado_por == user
+
+    @classmethod
+    def owner_q(cls, user):
+        return Q(criado_por=user)
     
     class Meta:
         verbose_name = 'Atividade'
@@ -8,8 +8,11 @@ from .aula_faltas import (
     AulaFaltasSerializer,
     AulaFaltasListSerializer,
     ContextoAulaSerializer,
-    AtualizarFaltasSerializer
+    AtualizarFaltasSerializer,
+    FaltaDeltaSerializer,
+    SincronizarFaltasSerializer
 )
+from .frequencia import FrequenciaFiltroSerializer
 from .minhas_turmas import (
     MinhasTurmasSerializer,
     MinhaTurmaDetalhesSerializer
@@ -27,6 +30,9 @@ __all__ = [
     'AulaFaltasListSerializer',
     'ContextoAulaSerializer',
     'AtualizarFaltasSerializer',
+    'FaltaDeltaSerializer',
+    'SincronizarFaltasSerializer',
+    'FrequenciaFiltroSerializer',
     'MinhasTurmasSerializer',
     'MinhaTurmaDetalhesSerializer',
     'DescritorOcorrenciaPedagogicaSerializer',
@@ -12,22 +12,52 @@ from apps.academic.models import MatriculaTurma
 from apps.core.models import ProfessorDisciplinaTurma, AnoLetivo
 from apps.pedagogical.validators import verificar_data_registro_aula
 from apps.pedagogical.services.faltas_service import FaltasService
+from apps.core.services.ano_letivo_service import AnoLetivoService
+
+
+class FaltasMaskField(serializers.Field):
+    """
+    Máscara de faltas: inteiro com bit (i - 1) ligado para falta na aula i
+    (mesma representação de Faltas.mascara_faltas). Por compatibilidade,
+    aceita também a lista de booleanos por horário ([True, False, True] == 5);
+    lista vazia equivale a não informar a máscara.
+    """
+    default_error_messages = {
+        'invalid': 'Informe um inteiro ou uma lista de booleanos.',
+        'max_aulas': f'A máscara suporta no máximo {Faltas.MAX_AULAS_MASCARA} aulas.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            if not data:
+                return None
+            if not all(isinstance(item, bool) for item in data):
+                self.fail('invalid')
+            if len(data) > Faltas.MAX_AULAS_MASCARA and any(data[Faltas.MAX_AULAS_MASCARA:]):
+                self.fail('max_aulas')
+            return sum(1 << i for i, faltou in enumerate(data) if faltou)
+        if isinstance(data, bool) or not isinstance(data, int) or data < 0:
+            self.fail('invalid')
+        if data >> Faltas.MAX_AULAS_MASCARA:
+            self.fail('max_aulas')
+        return data
+
+    def to_representation(self, value):
+        return value
 
 
 class FaltaItemSerializer(serializers.Serializer):
     """
     Serializer para processar um item de falta em lote.
-    Aceita 'faltas_mask' (booleans) ou 'aulas_faltas' (índices).
+    Aceita 'faltas_mask' (máscara de bits ou booleans) ou 'aulas_faltas' (índices).
     """
     estudante_id = serializers.UUIDField()
-    faltas_mask = serializers.ListField(
-        child=serializers.BooleanField(),
+    faltas_mask = FaltasMaskField(
         required=False,
-        default=list,
-        help_text="Lista de booleanos indicando presença/falta em cada horário."
+        help_text="Máscara de bits das aulas com falta (ou lista de booleanos por horário)."
     )
     aulas_faltas = serializers.ListField(
-        child=serializers.IntegerField(min_value=1),
+        child=serializers.IntegerField(min_value=1, max_value=Faltas.MAX_AULAS_MASCARA),
         required=False,
         default=list,
         help_text="Lista de índices (1-based) das aulas que o aluno faltou."
@@ -40,13 +70,12 @@ class FaltaItemSerializer(serializers.Serializer):
         Normaliza os dados de falta.
         Prioridade: faltas_mask > aulas_faltas > qtd_faltas (ignorado/zerado).
         """
-        faltas_mask = attrs.get('faltas_mask')
         aulas_faltas = attrs.get('aulas_faltas')
 
-        if faltas_mask:
-            # Converte máscara booleana para lista de índices (1-based)
-            # Ex: [True, False, True] -> [1, 3]
-            attrs['aulas_faltas'] = [i + 1 for i, faltou in enumerate(faltas_mask) if faltou]
+        if attrs.get('faltas_mask') is not None:
+            # Converte máscara para lista de índices (1-based)
+            # Ex: 0b101 / [True, False, True] -> [1, 3]
+            attrs['aulas_faltas'] = Faltas.decodificar_mascara(attrs['faltas_mask'])
         elif not aulas_faltas:
             # Se não enviou nada, assume sem faltas
             attrs['aulas_faltas'] = []
@@ -54,13 +83,32 @@ class FaltaItemSerializer(serializers.Serializer):
         return attrs
 
 
+class FaltaDeltaSerializer(FaltaItemSerializer):
+    """
+    Alteração de falta de um estudante no auto-save em lote.
+    'seq' é o número de sequência gerado pelo cliente (crescente por aula).
+    """
+    seq = serializers.IntegerField(min_value=0)
+
+
+class SincronizarFaltasSerializer(serializers.Serializer):
+    """
+    Lote de alterações de faltas acumuladas pelo cliente durante a chamada.
+    """
+    deltas = serializers.ListField(
+        child=FaltaDeltaSerializer(),
+        allow_empty=True,
+        max_length=500
+    )
+
+
 class AulaFaltasSerializer(serializers.ModelSerializer):
     """
     Serializer principal para criação e edição de Aulas com Faltas.
     """
     # --- Write Fields ---
     professor_disciplina_turma_id = serializers.PrimaryKeyRelatedField(
-        queryset=ProfessorDisciplinaTurma.objects.all(),
+        queryset=ProfessorDisciplinaTurma.objects.select_related('disciplina_turma__turma'),
         source='professor_disciplina_turma',
         write_only=True
     )
@@ -109,10 +157,11 @@ class AulaFaltasSerializer(serializers.ModelSerializer):
             'total_estudantes',# Read
             'bimestre',       # Read
             'faltas',         # Read (nested list)
+            'versoes_faltas', # Read (último seq aplicado por estudante)
             'criado_em', 
             'atualizado_em'
         ]
-        read_only_fields = ['id', 'professor_disciplina_turma', 'criado_em', 'atualizado_em']
+        read_only_fields = ['id', 'professor_disciplina_turma', 'versoes_faltas', 'criado_em', 'atualizado_em']
 
     def validate(self, attrs):
         """
@@ -129,11 +178,7 @@ class AulaFaltasSerializer(serializers.ModelSerializer):
             
         # Validação da Data usando Cache do Ano Letivo
         if pdt and data_aula:
-            # A turma tem campo ano_letivo como inteiro, precisamos buscar a instância
-            ano_valor = pdt.disciplina_turma.turma.ano_letivo
-            
-            # Busca instância do AnoLetivo pelo ano
-            ano_letivo = AnoLetivo.objects.filter(ano=ano_valor).first()
+            ano_letivo = self._resolver_ano_letivo(pdt)
             
             if ano_letivo:
                 # Valida usando helper centralizado (que lê o cache controles)
@@ -143,6 +188,27 @@ class AulaFaltasSerializer(serializers.ModelSerializer):
                 
         return attrs
 
+    def _resolver_ano_letivo(self, pdt):
+        """
+        Retorna o AnoLetivo da turma da PDT, memorizado no serializer para ser
+        reaproveitado no save da aula (Aula.save(ano_letivo=...)).
+        """
+        # A turma tem campo ano_letivo como inteiro, precisamos buscar a instância
+        ano_valor = pdt.disciplina_turma.turma.ano_letivo
+        
+        cache = getattr(self, '_ano_letivo_cache', None)
+        if cache is not None and cache[0] == ano_valor:
+            return cache[1]
+        
+        # Normalmente é o ano selecionado do usuário (já resolvido na requisição)
+        request = self.context.get('request')
+        ano_letivo = AnoLetivoService.obter_selecionado(request.user) if request else None
+        if ano_letivo is None or ano_letivo.ano != ano_valor:
+            ano_letivo = AnoLetivo.objects.filter(ano=ano_valor).first()
+        
+        self._ano_letivo_cache = (ano_valor, ano_letivo)
+        return ano_letivo
+
     # --- Field Methods ---
 
     def get_total_faltas(self, obj):
@@ -179,7 +245,8 @@ class AulaFaltasSerializer(serializers.ModelSerializer):
                 'estudante_nome': f.estudante.nome_social or f.estudante.usuario.get_full_name(),
                 'numero_chamada': num,
                 'qtd_faltas': f.qtd_faltas,
-                'aulas_faltas': f.aulas_faltas
+                'aulas_faltas': f.aulas_faltas,
+                'faltas_mask': f.mascara_faltas
             })
             
         # Ordena primariamente pelo número de chamada, secundariamente pelo nome
@@ -191,7 +258,8 @@ class AulaFaltasSerializer(serializers.ModelSerializer):
     @transaction.atomic
     def create(self, validated_data):
         faltas_data = validated_data.pop('faltas_data', [])
-        aula = Aula.objects.create(**validated_data)
+        aula = Aula(**validated_data)
+        aula.save(ano_letivo=self._resolver_ano_letivo(aula.professor_disciplina_turma))
         
         # Usa serviço centralizado com bulk operations
         if faltas_data:
@@ -206,7 +274,7 @@ class AulaFaltasSerializer(serializers.ModelSerializer):
         # Atualiza campos da aula
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        instance.save(ano_letivo=self._resolver_ano_letivo(instance.professor_disciplina_turma))
         
         # Atualiza faltas se fornecido (usa serviço centralizado)
         if faltas_data is not None:
@@ -298,20 +366,17 @@ class AtualizarFaltasSerializer(serializers.Serializer):
     Serializer para atualização unitária de faltas (ex: auto-save ou clique único).
     """
     estudante_id = serializers.UUIDField()
-    faltas_mask = serializers.ListField(
-        child=serializers.BooleanField(),
-        required=False,
-    )
+    faltas_mask = FaltasMaskField(required=False)
     aulas_faltas = serializers.ListField(
-        child=serializers.IntegerField(),
+        child=serializers.IntegerField(min_value=1, max_value=Faltas.MAX_AULAS_MASCARA),
         required=False
     )
     # Legado, mantido para evitar quebra se frontend antigo enviar
     qtd_faltas = serializers.IntegerField(required=False, min_value=0)
 
     def validate(self, attrs):
-        if 'faltas_mask' in attrs:
-            attrs['aulas_faltas'] = [i + 1 for i, f in enumerate(attrs['faltas_mask']) if f]
+        if attrs.get('faltas_mask') is not None:
+            attrs['aulas_faltas'] = Faltas.decodificar_mascara(attrs['faltas_mask'])
         elif 'aulas_faltas' not in attrs:
             if 'qtd_faltas' not in attrs:
                 raise serializers.ValidationError("É necessário fornecer 'faltas_mask' ou 'aulas_faltas'.")
@@ -0,0 +1,37 @@
+"""
+Serializers para leitura da frequência materializada (FrequenciaBimestral).
+"""
+from rest_framework import serializers
+
+from apps.pedagogical.services.frequencia_service import FREQUENCIA_MINIMA
+
+
+class FrequenciaFiltroSerializer(serializers.Serializer):
+    """
+    Valida os filtros (query params) das consultas de frequência.
+    Os bimestres filtrados são somados; sem bimestre = frequência anual.
+    """
+    turma_id = serializers.UUIDField(required=False)
+    disciplina_turma_id = serializers.UUIDField(required=False)
+    estudante_id = serializers.UUIDField(required=False)
+    bimestre = serializers.IntegerField(required=False, min_value=1, max_value=4)
+    minimo = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0,
+        max_value=100,
+        required=False,
+        default=FREQUENCIA_MINIMA,
+        help_text="Frequência mínima (%) usada na listagem de risco."
+    )
+
+    def filtros(self):
+        """Converte os dados validados em filtros de FrequenciaBimestral."""
+        dados = self.validated_data
+        mapa = {
+            'turma_id': 'disciplina_turma__turma_id',
+            'disciplina_turma_id': 'disciplina_turma_id',
+            'estudante_id': 'estudante_id',
+            'bimestre': 'bimestre',
+        }
+        return {lookup: dados[campo] for campo, lookup in mapa.items() if dados.get(campo) is not None}
@@ -42,18 +42,8 @@ class PlanoAulaSerializer(serializers.ModelSerializer):
             if hasattr(request.user, 'funcionario'):
                 validated_data['professor'] = request.user.funcionario
             
-            # Define o ano letivo selecionado automaticamente
-            ano_letivo_obj = None
-            try:
-                if hasattr(request.user, 'ano_letivo_selecionado'):
-                    ano_letivo_obj = request.user.ano_letivo_selecionado.ano_letivo
-            except Exception:
-                pass
-            
-            # Se não tiver seleção, pega o ano ativo
-            if not ano_letivo_obj:
-                from apps.core.models import AnoLetivo
-                ano_letivo_obj = AnoLetivo.objects.filter(is_active=True).first()
+            # Define o ano letivo selecionado automaticamente (ou o ano ativo, se não houver seleção)
+            ano_letivo_obj = request.user.get_ano_letivo_selecionado()
             
             if ano_letivo_obj:
                 validated_data['ano_letivo'] = ano_letivo_obj
@@ -6,7 +6,8 @@ usando bulk operations para melhor performance em cenários de
 auto-save com centenas de professores simultâneos.
 """
 from django.db import transaction
-from apps.pedagogical.models import Faltas
+from apps.pedagogical.models import Aula, Faltas
+from apps.pedagogical.services.frequencia_service import FrequenciaService
 
 
 class FaltasService:
@@ -19,7 +20,11 @@ class FaltasService:
     - Transações atômicas garantidas
     """
     
+    # Campos gravados em bulk_update (lista JSON + representação compacta)
+    CAMPOS_FALTAS = ['aulas_faltas', 'mascara_faltas', 'qtd_faltas']
+    
     @staticmethod
+    @transaction.atomic
     def salvar_falta_unitaria(aula, estudante_id, aulas_faltas):
         """
         Salva falta de UM estudante (auto-save por clique).
@@ -41,6 +46,8 @@ class FaltasService:
                 aula=aula, 
                 estudante_id=estudante_id
             ).delete()
+            if deleted:
+                FrequenciaService.recalcular_aula(aula, estudante_ids=[estudante_id])
             return {
                 'acao': 'removido' if deleted else 'nenhuma',
                 'aulas_faltas': []
@@ -52,6 +59,7 @@ class FaltasService:
             estudante_id=estudante_id,
             defaults={'aulas_faltas': aulas_faltas}
         )
+        FrequenciaService.recalcular_aula(aula, estudante_ids=[estudante_id])
         return {
             'acao': 'criado' if criado else 'atualizado',
             'aulas_faltas': aulas_faltas
@@ -64,14 +72,18 @@ class FaltasService:
         Salva faltas em lote (criação/edição de aula).
         
         Usa bulk_create e bulk_update para minimizar queries.
-        Para 30 alunos: ~3-5 queries em vez de ~35.
+        Para 30 alunos: ~4-6 queries em vez de ~35.
+        
+        Os estudantes alterados recebem uma versão acima do maior seq já
+        aplicado (Aula.versoes_faltas), de modo que deltas de auto-save
+        anteriores a este salvamento não o sobrescrevam.
         
         Args:
             aula: Instância de Aula
             faltas_data: Lista de dicts com {'estudante_id': UUID, 'aulas_faltas': list}
             
         Returns:
-            dict: {'criados': int, 'atualizados': int, 'removidos': int}
+            dict: {'criados': int, 'atualizados': int, 'removidos': int, 'versoes': dict}
         """
         # Mapa de estudantes com faltas (ignora listas vazias)
         estudantes_com_faltas = {
@@ -80,48 +92,165 @@ class FaltasService:
             if item.get('aulas_faltas')
         }
         
-        # 1. Remove faltas de quem não está mais na lista (1 query)
-        removidos, _ = Faltas.objects.filter(aula=aula).exclude(
-            estudante_id__in=estudantes_com_faltas.keys()
-        ).delete()
+        # 1. Bloqueia a aula e lê as versões do auto-save (1 query)
+        versoes = Aula.objects.select_for_update().values_list(
+            'versoes_faltas', flat=True
+        ).get(pk=aula.pk) or {}
         
-        if not estudantes_com_faltas:
-            return {'criados': 0, 'atualizados': 0, 'removidos': removidos}
+        # 2. Busca os registros existentes da aula (1 query)
+        existentes = {f.estudante_id: f for f in Faltas.objects.filter(aula=aula)}
         
-        # 2. Busca registros existentes (1 query)
-        existentes = {
-            f.estudante_id: f 
-            for f in Faltas.objects.filter(
-                aula=aula, 
-                estudante_id__in=estudantes_com_faltas.keys()
-            )
-        }
+        # 3. Remove faltas de quem não está mais na lista (0-1 query)
+        para_remover = [
+            est_id for est_id in existentes if est_id not in estudantes_com_faltas
+        ]
+        if para_remover:
+            Faltas.objects.filter(aula=aula, estudante_id__in=para_remover).delete()
         
-        # 3. Separa para criar vs atualizar
+        # 4. Separa para criar vs atualizar
         para_criar = []
         para_atualizar = []
         
         for est_id, aulas in estudantes_com_faltas.items():
             if est_id in existentes:
                 falta = existentes[est_id]
-                if falta.aulas_faltas != aulas:
-                    falta.aulas_faltas = aulas
+                if falta.mascara_faltas != Faltas.codificar_mascara(aulas):
+                    falta.definir_aulas_faltas(aulas)
                     para_atualizar.append(falta)
             else:
-                para_criar.append(Faltas(
-                    aula=aula,
-                    estudante_id=est_id,
-                    aulas_faltas=aulas
-                ))
+                falta = Faltas(aula=aula, estudante_id=est_id)
+                falta.definir_aulas_faltas(aulas)
+                para_criar.append(falta)
         
-        # 4. Bulk operations (1-2 queries)
+        # 5. Bulk operations (1-2 queries)
+        # bulk_* não chama save(): máscara e quantidade já definidas acima
         if para_criar:
             Faltas.objects.bulk_create(para_criar)
         if para_atualizar:
-            Faltas.objects.bulk_update(para_atualizar, ['aulas_faltas'])
+            Faltas.objects.bulk_update(para_atualizar, FaltasService.CAMPOS_FALTAS)
+        
+        alterados = para_remover + [f.estudante_id for f in para_criar + para_atualizar]
+        if alterados:
+            # 6. Avança a versão dos alterados acima de qualquer seq já aplicado:
+            # deltas gerados antes deste salvamento passam a ser ignorados (1 query)
+            topo = max(versoes.values(), default=0) + 1
+            versoes.update({str(est_id): topo for est_id in alterados})
+            Aula.objects.filter(pk=aula.pk).update(versoes_faltas=versoes)
+            
+            # 7. Frequência materializada da disciplina/bimestre: agendada para
+            # após o commit, uma vez só com a do signal da Aula
+            FrequenciaService.recalcular_aula(aula)
         
+        aula.versoes_faltas = versoes
         return {
             'criados': len(para_criar),
             'atualizados': len(para_atualizar),
-            'removidos': removidos
+            'removidos': len(para_remover),
+            'versoes': versoes
+        }
+
+    @staticmethod
+    @transaction.atomic
+    def aplicar_deltas(aula, deltas):
+        """
+        Aplica um lote de alterações de faltas (auto-save agrupado no cliente).
+        
+        Cada delta traz um número de sequência (seq) gerado pelo cliente.
+        Last-write-wins por estudante: o delta só é aplicado se o seq for maior
+        que o último aplicado para aquele estudante (Aula.versoes_faltas), o que
+        descarta requisições atrasadas/reenviadas fora de ordem.
+        
+        As versões vigentes são devolvidas com os estudantes da aula ('seq');
+        o cliente continua a contagem a partir da maior delas, o que mantém
+        válidos os deltas de uma aba recarregada ou de outro dispositivo.
+        
+        Bloqueia a linha da aula durante a transação para serializar lotes
+        concorrentes da mesma chamada. Para 30 alunos: ~5-7 queries.
+        
+        Args:
+            aula: Instância de Aula
+            deltas: Lista de dicts com {'estudante_id': UUID, 'aulas_faltas': list, 'seq': int}
+            
+        Returns:
+            dict: {
+                'aplicados': int,
+                'ignorados': [estudante_id, ...] (seq antigo),
+                'versoes': {estudante_id: seq},
+                'faltas': {estudante_id: aulas_faltas} (estado consolidado da aula)
+            }
+        """
+        # 1. Bloqueia a aula e lê as versões atuais (1 query)
+        versoes = Aula.objects.select_for_update().values_list(
+            'versoes_faltas', flat=True
+        ).get(pk=aula.pk) or {}
+        
+        # 2. Coalesce: maior seq de cada estudante no lote
+        ultimos = {}
+        for delta in deltas:
+            chave = str(delta['estudante_id'])
+            if chave not in ultimos or delta['seq'] >= ultimos[chave]['seq']:
+                ultimos[chave] = delta
+        
+        # 3. Last-write-wins contra o último seq aplicado
+        aceitos = {}
+        ignorados = []
+        for chave, delta in ultimos.items():
+            if delta['seq'] > versoes.get(chave, -1):
+                aceitos[chave] = delta
+                versoes[chave] = delta['seq']
+            else:
+                ignorados.append(chave)
+        
+        if aceitos:
+            com_faltas = {
+                d['estudante_id']: d['aulas_faltas'] for d in aceitos.values() if d['aulas_faltas']
+            }
+            sem_faltas = [d['estudante_id'] for d in aceitos.values() if not d['aulas_faltas']]
+            
+            # 4. Remove de quem ficou sem faltas (1 query)
+            if sem_faltas:
+                Faltas.objects.filter(aula=aula, estudante_id__in=sem_faltas).delete()
+            
+            # 5. Cria/atualiza o restante (1 query + 1-2 bulk)
+            if com_faltas:
+                existentes = {
+                    f.estudante_id: f
+                    for f in Faltas.objects.filter(aula=aula, estudante_id__in=com_faltas.keys())
+                }
+                para_criar = []
+                para_atualizar = []
+                for est_id, aulas in com_faltas.items():
+                    falta = existentes.get(est_id)
+                    if falta is None:
+                        falta = Faltas(aula=aula, estudante_id=est_id)
+                        falta.definir_aulas_faltas(aulas)
+                        para_criar.append(falta)
+                    elif falta.mascara_faltas != Faltas.codificar_mascara(aulas):
+                        falta.definir_aulas_faltas(aulas)
+                        para_atualizar.append(falta)
+                
+                if para_criar:
+                    Faltas.objects.bulk_create(para_criar)
+                if para_atualizar:
+                    Faltas.objects.bulk_update(para_atualizar, FaltasService.CAMPOS_FALTAS)
+            
+            # 6. Grava as versões sem passar por Aula.save() (1 query)
+            Aula.objects.filter(pk=aula.pk).update(versoes_faltas=versoes)
+            
+            # Frequência materializada apenas dos estudantes alterados
+            FrequenciaService.recalcular_aula(
+                aula, estudante_ids=[d['estudante_id'] for d in aceitos.values()]
+            )
+        
+        # 7. Estado consolidado para o cliente reconciliar (1 query)
+        faltas = {
+            str(est_id): aulas
+            for est_id, aulas in Faltas.objects.filter(aula=aula).values_list('estudante_id', 'aulas_faltas')
+        }
+        
+        return {
+            'aplicados': len(aceitos),
+            'ignorados': ignorados,
+            'versoes': versoes,
+            'faltas': faltas
         }
@@ -0,0 +1,301 @@
+"""
+Serviço da frequência materializada (FrequenciaBimestral).
+
+Calcular frequência direto das aulas exige somar Aula.numero_aulas e
+Faltas.qtd_faltas em milhares de registros. Este módulo mantém o agregado por
+(estudante, disciplina_turma, bimestre):
+
+- Incremental: FaltasService recalcula apenas os estudantes alterados; os
+  signals de Aula e os salvamentos em lote agendam a disciplina/bimestre
+  inteira (total de aulas) para uma única vez após o commit.
+- Reconstrução completa: reconstruir() / manage.py reconstruir_frequencias.
+- Leitura: consultar() e estudantes_em_risco() para boletins e busca ativa.
+"""
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.academic.models import MatriculaTurma
+from apps.core.models import ProfessorDisciplinaTurma
+from apps.core.utils import agendar_apos_commit
+from apps.pedagogical.models import Aula, Faltas, FrequenciaBimestral
+
+
+# Frequência mínima (%) exigida para aprovação (LDB art. 24, VI)
+FREQUENCIA_MINIMA = getattr(settings, 'FREQUENCIA_MINIMA', 75)
+
+# (disciplina_turma, bimestre) marcados na transação corrente (ver agendar_apos_commit)
+_pendentes = ContextVar('frequencia_pendentes', default=None)
+
+
+class FrequenciaService:
+    """
+    Serviço centralizado para a frequência materializada.
+    """
+
+    @staticmethod
+    def recalcular_aula(aula, estudante_ids=None, bimestres=None):
+        """
+        Recalcula a frequência afetada por uma aula.
+
+        Args:
+            aula: Instância de Aula (pode já ter sido excluída)
+            estudante_ids: Se informado, recalcula na hora apenas esses
+                estudantes (alteração de faltas). Senão, agenda a
+                disciplina/bimestre inteira para após o commit.
+            bimestres: Bimestres a recalcular (padrão: o da aula)
+        """
+        if 'professor_disciplina_turma' in aula._state.fields_cache:
+            dt_id = aula.professor_disciplina_turma.disciplina_turma_id
+        else:
+            # Aula excluída em cascata junto com a PDT: não há o que recalcular
+            dt_id = ProfessorDisciplinaTurma.objects.filter(
+                id=aula.professor_disciplina_turma_id
+            ).values_list('disciplina_turma_id', flat=True).first()
+            if dt_id is None:
+                return
+
+        bimestres = bimestres or [aula.bimestre]
+        if estudante_ids is None:
+            FrequenciaService.agendar([(dt_id, bimestre) for bimestre in bimestres])
+            return
+
+        for bimestre in bimestres:
+            FrequenciaService.recalcular(dt_id, bimestre, estudante_ids)
+
+    @staticmethod
+    def agendar(disciplinas_bimestres):
+        """
+        Marca disciplinas/bimestres para recálculo completo após o commit.
+
+        Salvar uma aula com faltas dispara o signal da Aula e o salvamento em
+        lote das faltas: o recálculo acontece uma única vez por transação.
+
+        Args:
+            disciplinas_bimestres: Pares (disciplina_turma_id, bimestre)
+        """
+        agendar_apos_commit(_pendentes, {
+            'disciplinas_bimestres': disciplinas_bimestres,
+        }, FrequenciaService.processar_pendentes)
+
+    @staticmethod
+    def processar_pendentes(marcacoes):
+        """Recalcula as disciplinas/bimestres marcados em uma transação (após o commit)."""
+        for dt_id, bimestre in marcacoes['disciplinas_bimestres']:
+            FrequenciaService.recalcular(dt_id, bimestre)
+
+    @staticmethod
+    @transaction.atomic
+    def recalcular(disciplina_turma_id, bimestre, estudante_ids=None):
+        """
+        Recalcula FrequenciaBimestral de uma disciplina da turma em um bimestre.
+
+        Queries: 3-4 (total de aulas, faltas, estudantes da turma, upsert),
+        +1 para limpar linhas obsoletas no recálculo completo ou para as
+        matrículas cujo boletim é agendado no recálculo por estudante.
+
+        Args:
+            disciplina_turma_id: UUID da DisciplinaTurma
+            bimestre: Número do bimestre
+            estudante_ids: Se informado, recalcula apenas esses estudantes
+        """
+        from apps.evaluation.services import BoletimService
+
+        # Boletins afetados são reconstruídos após o commit
+        if estudante_ids is None:
+            BoletimService.agendar(disciplinas_turmas=[disciplina_turma_id])
+        else:
+            # Apenas as matrículas desses estudantes na turma da disciplina
+            BoletimService.agendar(matriculas=MatriculaTurma.objects.filter(
+                turma__disciplinas_vinculadas__id=disciplina_turma_id,
+                matricula_cemep__estudante_id__in=estudante_ids
+            ).values_list('id', flat=True))
+
+        # 1. Aulas dadas (soma das geminadas) no bimestre
+        total_aulas = Aula.objects.filter(
+            professor_disciplina_turma__disciplina_turma_id=disciplina_turma_id,
+            bimestre=bimestre
+        ).aggregate(total=Sum('numero_aulas'))['total'] or 0
+
+        # 2. Faltas por estudante
+        faltas_qs = Faltas.objects.filter(
+            aula__professor_disciplina_turma__disciplina_turma_id=disciplina_turma_id,
+            aula__bimestre=bimestre
+        )
+        if estudante_ids is not None:
+            faltas_qs = faltas_qs.filter(estudante_id__in=estudante_ids)
+
+        faltas = dict(
+            faltas_qs.order_by().values('estudante_id').annotate(
+                total=Sum('qtd_faltas')
+            ).values_list('estudante_id', 'total')
+        )
+
+        # 3. Estudantes da linha: todos os matriculados na turma (recálculo completo)
+        if estudante_ids is None:
+            estudantes = set(
+                MatriculaTurma.objects.filter(
+                    turma__disciplinas_vinculadas__id=disciplina_turma_id
+                ).values_list('matricula_cemep__estudante_id', flat=True)
+            ) | faltas.keys()
+        else:
+            estudantes = set(estudante_ids)
+
+        existentes = FrequenciaBimestral.objects.filter(
+            disciplina_turma_id=disciplina_turma_id,
+            bimestre=bimestre
+        )
+
+        if not total_aulas and not faltas:
+            # Bimestre sem aulas: nada a materializar
+            if estudante_ids is None:
+                existentes.delete()
+            else:
+                existentes.filter(estudante_id__in=estudantes).delete()
+            return
+
+        if estudante_ids is None:
+            existentes.exclude(estudante_id__in=estudantes).delete()
+
+        FrequenciaService._gravar([
+            FrequenciaBimestral(
+                estudante_id=estudante_id,
+                disciplina_turma_id=disciplina_turma_id,
+                bimestre=bimestre,
+                total_aulas=total_aulas,
+                total_faltas=faltas.get(estudante_id, 0),
+            )
+            for estudante_id in estudantes
+        ])
+
+    @staticmethod
+    @transaction.atomic
+    def reconstruir(ano=None):
+        """
+        Reconstrói todo o agregado (opcionalmente de um ano letivo) de forma set-based.
+
+        Args:
+            ano: Ano (int) do ano letivo; None = todos
+
+        Returns:
+            dict: {'linhas': int}
+        """
+        filtro_dt = {'disciplina_turma__turma__ano_letivo': ano} if ano else {}
+
+        # 1. Aulas dadas por (disciplina_turma, bimestre)
+        aulas_qs = Aula.objects.all()
+        if ano:
+            aulas_qs = aulas_qs.filter(professor_disciplina_turma__disciplina_turma__turma__ano_letivo=ano)
+        total_aulas = {
+            (row['professor_disciplina_turma__disciplina_turma_id'], row['bimestre']): row['total']
+            for row in aulas_qs.order_by().values(
+                'professor_disciplina_turma__disciplina_turma_id', 'bimestre'
+            ).annotate(total=Sum('numero_aulas'))
+        }
+
+        # 2. Faltas por (disciplina_turma, bimestre, estudante)
+        faltas = {}
+        faltas_qs = Faltas.objects.filter(aula__in=aulas_qs).order_by().values(
+            'aula__professor_disciplina_turma__disciplina_turma_id', 'aula__bimestre', 'estudante_id'
+        ).annotate(total=Sum('qtd_faltas')).values_list(
+            'aula__professor_disciplina_turma__disciplina_turma_id', 'aula__bimestre', 'estudante_id', 'total'
+        )
+        for dt_id, bimestre, estudante_id, total in faltas_qs.iterator(chunk_size=5000):
+            faltas[(dt_id, bimestre, estudante_id)] = total
+
+        # 3. Estudantes por disciplina_turma (matriculados na turma)
+        matriculados = defaultdict(set)
+        mt_qs = MatriculaTurma.objects.filter(
+            turma__disciplinas_vinculadas__id__in={dt_id for dt_id, _ in total_aulas}
+        ).values_list('turma__disciplinas_vinculadas__id', 'matricula_cemep__estudante_id')
+        for dt_id, estudante_id in mt_qs.iterator(chunk_size=5000):
+            matriculados[dt_id].add(estudante_id)
+        for dt_id, bimestre, estudante_id in faltas:
+            matriculados[dt_id].add(estudante_id)
+
+        # 4. Substitui o agregado do escopo
+        chaves = set(total_aulas) | {(dt_id, bim) for dt_id, bim, _ in faltas}
+        linhas = [
+            FrequenciaBimestral(
+                estudante_id=estudante_id,
+                disciplina_turma_id=dt_id,
+                bimestre=bimestre,
+                total_aulas=total_aulas.get((dt_id, bimestre), 0),
+                total_faltas=faltas.get((dt_id, bimestre, estudante_id), 0),
+            )
+            for dt_id, bimestre in chaves
+            for estudante_id in matriculados[dt_id]
+        ]
+
+        FrequenciaBimestral.objects.filter(**filtro_dt).delete()
+        FrequenciaBimestral.objects.bulk_create(linhas, batch_size=2000)
+
+        return {'linhas': len(linhas)}
+
+    @staticmethod
+    def consultar(queryset=None, **filtros):
+        """
+        Frequência agregada por (estudante, disciplina_turma) somando os bimestres filtrados.
+
+        Args:
+            queryset: QuerySet base de FrequenciaBimestral (ex.: já filtrado por ano)
+            **filtros: Filtros adicionais (bimestre, disciplina_turma__turma_id, estudante_id...)
+
+        Returns:
+            Lista de dicts com estudante_id, disciplina_turma_id, total_aulas,
+            total_faltas e percentual_frequencia.
+        """
+        qs = (queryset if queryset is not None else FrequenciaBimestral.objects.all()).filter(**filtros)
+        linhas = qs.order_by().values('estudante_id', 'disciplina_turma_id').annotate(
+            aulas=Sum('total_aulas'),
+            faltas=Sum('total_faltas'),
+        )
+
+        resultado = []
+        for linha in linhas:
+            total_aulas = linha['aulas'] or 0
+            total_faltas = linha['faltas'] or 0
+            resultado.append({
+                'estudante_id': linha['estudante_id'],
+                'disciplina_turma_id': linha['disciplina_turma_id'],
+                'total_aulas': total_aulas,
+                'total_faltas': total_faltas,
+                'percentual_frequencia': (
+                    round((total_aulas - total_faltas) * 100 / total_aulas, 2) if total_aulas else None
+                ),
+            })
+        return resultado
+
+    @staticmethod
+    def estudantes_em_risco(queryset=None, minimo=FREQUENCIA_MINIMA, **filtros):
+        """
+        Estudantes com frequência abaixo do mínimo em alguma disciplina.
+
+        Returns:
+            Lista de dicts (ver consultar), ordenada pela menor frequência.
+        """
+        linhas = [
+            linha for linha in FrequenciaService.consultar(queryset, **filtros)
+            if linha['percentual_frequencia'] is not None and linha['percentual_frequencia'] < minimo
+        ]
+        linhas.sort(key=lambda linha: linha['percentual_frequencia'])
+        return linhas
+
+    @staticmethod
+    def _gravar(linhas):
+        """Upsert das linhas pela chave (estudante, disciplina_turma, bimestre)."""
+        if not linhas:
+            return
+        agora = timezone.now()
+        for linha in linhas:
+            linha.atualizado_em = agora
+        FrequenciaBimestral.objects.bulk_create(
+            linhas,
+            update_conflicts=True,
+            unique_fields=['estudante', 'disciplina_turma', 'bimestre'],
+            update_fields=['total_aulas', 'total_faltas', 'atualizado_em'],
+        )
@@ -0,0 +1,131 @@
+import datetime
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.academic.models import Estudante, MatriculaCEMEP, MatriculaTurma
+from apps.core.models import (
+    AnoLetivo, Curso, Disciplina, DisciplinaTurma, Funcionario,
+    ProfessorDisciplinaTurma, Turma,
+)
+from apps.pedagogical.models import Aula, Faltas
+from apps.pedagogical.services.faltas_service import FaltasService
+from apps.users.models import User
+
+
+class FaltasServiceTests(TestCase):
+    """Persistência das faltas e versionamento do auto-save em lote."""
+
+    @classmethod
+    def setUpTestData(cls):
+        AnoLetivo.objects.create(
+            ano=2026, is_active=True,
+            data_inicio_1bim=datetime.date(2026, 2, 2), data_fim_1bim=datetime.date(2026, 4, 17),
+            data_inicio_2bim=datetime.date(2026, 4, 27), data_fim_2bim=datetime.date(2026, 7, 3),
+            data_inicio_3bim=datetime.date(2026, 7, 20), data_fim_3bim=datetime.date(2026, 9, 30),
+            data_inicio_4bim=datetime.date(2026, 10, 5), data_fim_4bim=datetime.date(2026, 12, 18),
+        )
+        curso = Curso.objects.create(nome='Informática', sigla='INF')
+        turma = Turma.objects.create(numero=1, letra='A', ano_letivo=2026, curso=curso)
+        disciplina_turma = DisciplinaTurma.objects.create(
+            disciplina=Disciplina.objects.create(nome='Matemática', sigla='MAT'),
+            turma=turma, aulas_semanais=2
+        )
+        cls.usuario_professor = User.objects.create_user('prof', password='x', tipo_usuario='PROFESSOR')
+        professor = Funcionario.objects.create(usuario=cls.usuario_professor, matricula=1)
+        cls.pdt = ProfessorDisciplinaTurma.objects.create(professor=professor, disciplina_turma=disciplina_turma)
+
+        cls.estudantes = []
+        for i in range(1, 4):
+            estudante = Estudante.objects.create(
+                usuario=User.objects.create_user(f'est{i}', password='x', tipo_usuario='ESTUDANTE'),
+                cpf=f'{i:011d}', data_nascimento=datetime.date(2010, 1, 1),
+                logradouro='Rua', numero='1', bairro='Centro', cep='00000000'
+            )
+            matricula = MatriculaCEMEP.objects.create(
+                numero_matricula=f'M{i}', estudante=estudante, curso=curso,
+                data_entrada=datetime.date(2026, 2, 1)
+            )
+            MatriculaTurma.objects.create(
+                matricula_cemep=matricula, turma=turma,
+                data_entrada=datetime.date(2026, 2, 1), mumero_chamada=i
+            )
+            cls.estudantes.append(estudante)
+
+    def setUp(self):
+        self.aula = Aula.objects.create(
+            professor_disciplina_turma=self.pdt, data=datetime.date(2026, 3, 10), numero_aulas=2
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario_professor)
+
+    def _delta(self, estudante, aulas_faltas, seq):
+        return {'estudante_id': estudante.id, 'aulas_faltas': aulas_faltas, 'seq': seq}
+
+    def _faltas(self):
+        return dict(Faltas.objects.filter(aula=self.aula).values_list('estudante_id', 'aulas_faltas'))
+
+    def test_mascara_codifica_e_decodifica_as_aulas(self):
+        self.assertEqual(Faltas.codificar_mascara([1, 3]), 0b101)
+        self.assertEqual(Faltas.decodificar_mascara(0b101), [1, 3])
+        self.assertEqual(Faltas.decodificar_mascara(Faltas.codificar_mascara([])), [])
+
+        falta = Faltas(aula=self.aula, estudante=self.estudantes[0])
+        falta.definir_aulas_faltas([2, 1, 2])
+        self.assertEqual((falta.aulas_faltas, falta.mascara_faltas, falta.qtd_faltas), ([1, 2], 0b11, 2))
+
+    def test_salvar_lote_aplica_apenas_a_diferenca(self):
+        a, b, c = self.estudantes
+        FaltasService.salvar_faltas_lote(self.aula, [
+            {'estudante_id': a.id, 'aulas_faltas': [1]},
+            {'estudante_id': b.id, 'aulas_faltas': [1, 2]},
+        ])
+
+        resultado = FaltasService.salvar_faltas_lote(self.aula, [
+            {'estudante_id': a.id, 'aulas_faltas': [1]},
+            {'estudante_id': c.id, 'aulas_faltas': [2]},
+        ])
+
+        self.assertEqual(
+            (resultado['criados'], resultado['atualizados'], resultado['removidos']), (1, 0, 1)
+        )
+        self.assertEqual(self._faltas(), {a.id: [1], c.id: [2]})
+
+    def test_deltas_fora_de_ordem_sao_ignorados(self):
+        a = self.estudantes[0]
+        FaltasService.aplicar_deltas(self.aula, [self._delta(a, [1, 2], 2)])
+
+        resultado = FaltasService.aplicar_deltas(self.aula, [self._delta(a, [1], 1)])
+
+        self.assertEqual(resultado['ignorados'], [str(a.id)])
+        self.assertEqual(self._faltas(), {a.id: [1, 2]})
+
+    def test_cliente_recarregado_continua_a_partir_das_versoes_devolvidas(self):
+        a, b, _ = self.estudantes
+        FaltasService.aplicar_deltas(self.aula, [self._delta(a, [1], 5), self._delta(b, [2], 7)])
+
+        # Aba recarregada / outro dispositivo: a sequência vem do servidor
+        resposta = self.client.get(f'/api/v1/pedagogical/aulas-faltas/{self.aula.id}/estudantes/')
+        self.assertEqual(resposta.status_code, 200)
+        seq = max(item['seq'] for item in resposta.data)
+        self.assertEqual(seq, 7)
+
+        resultado = FaltasService.aplicar_deltas(self.aula, [self._delta(a, [], seq + 1)])
+
+        self.assertEqual((resultado['aplicados'], resultado['ignorados']), (1, []))
+        self.assertEqual(self._faltas(), {b.id: [2]})
+
+    def test_salvar_lote_supera_deltas_anteriores(self):
+        a, b, _ = self.estudantes
+        FaltasService.aplicar_deltas(self.aula, [self._delta(a, [1], 3)])
+
+        resultado = FaltasService.salvar_faltas_lote(self.aula, [
+            {'estudante_id': b.id, 'aulas_faltas': [1]},
+        ])
+        self.assertEqual(resultado['versoes'], {str(a.id): 4, str(b.id): 4})
+
+        # Delta reenviado, gerado antes do salvamento em lote
+        atrasado = FaltasService.aplicar_deltas(self.aula, [self._delta(b, [], 4)])
+
+        self.assertEqual(atrasado['ignorados'], [str(b.id)])
+        self.assertEqual(self._faltas(), {b.id: [1]})
@@ -4,13 +4,14 @@ URLs para o App Pedagogical
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    PlanoAulaViewSet, AulaFaltasViewSet, MinhasTurmasViewSet, grade_professor_view, grade_turma_view,
+    PlanoAulaViewSet, AulaFaltasViewSet, FrequenciaViewSet, MinhasTurmasViewSet, grade_professor_view, grade_turma_view,
     DescritorOcorrenciaPedagogicaViewSet, DescritorOcorrenciaPedagogicaAnoLetivoViewSet
 )
 
 router = DefaultRouter()
 router.register('planos-aula', PlanoAulaViewSet)
 router.register('aulas-faltas', AulaFaltasViewSet, basename='aulas-faltas')
+router.register('frequencias', FrequenciaViewSet, basename='frequencias')
 router.register('minhas-turmas', MinhasTurmasViewSet, basename='minhas-turmas')
 router.register('descritores-ocorrencia', DescritorOcorrenciaPedagogicaViewSet)
 router.register('descritores-ocorrencia-ano', DescritorOcorrenciaPedagogicaAnoLetivoViewSet, basename='descritores-ocorrencia-ano')
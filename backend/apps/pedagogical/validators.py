@@ -2,9 +2,12 @@
 Validadores para o módulo Pedagogical.
 
 Este módulo contém funções de validação otimizadas para alto volume,
-usando cache com TTL de 2 horas para evitar recálculos frequentes.
+usando o cache compartilhado do ano letivo (validade diária) para evitar
+recálculos frequentes.
 """
 from datetime import datetime, timedelta
+
+import numpy as np
 from django.utils import timezone
 
 
@@ -25,29 +28,33 @@ def _obter_datas_com_grade_valida(ano_letivo):
     
     # Busca todas as validades do ano letivo
     validades = GradeHorariaValidade.objects.filter(
-        ano_letivo__ano=ano_letivo.ano
+        ano_letivo__ano=ano_letivo.ano,
+        rascunho=False
     ).values_list('data_inicio', 'data_fim')
     
     if not validades:
         return None  # Sem validades = não filtrar por grade
     
-    datas_validas = set()
-    for data_inicio, data_fim in validades:
-        if data_inicio and data_fim:
-            curr = data_inicio
-            while curr <= data_fim:
-                datas_validas.add(curr.isoformat())
-                curr += timedelta(days=1)
+    # Intervalos expandidos de forma vetorizada (np.arange por validade)
+    intervalos = [
+        np.arange(data_inicio, data_fim + timedelta(days=1), dtype='datetime64[D]')
+        for data_inicio, data_fim in validades if data_inicio and data_fim
+    ]
+    if not intervalos:
+        return None
     
+    datas_validas = set(np.datetime_as_string(np.concatenate(intervalos), unit='D').tolist())
     return datas_validas if datas_validas else None
 
 
 def obter_datas_liberadas_cached(ano_letivo):
     """
-    Retorna datas liberadas usando cache com validade diária.
+    Retorna datas liberadas usando o cache compartilhado (validade diária).
     
-    Se cache de hoje: retorna dados em O(1)
-    Se cache de outro dia: recalcula, salva, e retorna
+    A chave é versionada por ano letivo (AnoLetivoService.obter_do_cache) e
+    invalidada por AnoLetivo.atualizar_controles_json/invalidar_cache_datas_liberadas.
+    Se cache de hoje: retorna sem tocar no banco
+    Se cache de outro dia ou invalidado: recalcula e grava no cache
     
     Args:
         ano_letivo: Instância de AnoLetivo
@@ -58,32 +65,22 @@ def obter_datas_liberadas_cached(ano_letivo):
     if not ano_letivo:
         return set()
     
-    hoje = timezone.localdate().isoformat()
-    cache = ano_letivo.datas_liberadas_aulas_faltas or {}
-    
-    # Verifica se cache é de hoje
-    validade = cache.get('validade') if isinstance(cache, dict) else None
-    
-    if validade == hoje:
-        # Cache válido (mesmo dia) - retorna imediatamente
-        return set(cache.get('datasLiberadas', []))
+    from apps.core.services.ano_letivo_service import AnoLetivoService
     
-    # Cache expirado (outro dia) ou inexistente - recalcula
-    datas = _calcular_datas_liberadas(ano_letivo)
+    agora = timezone.localtime()
+    hoje = agora.date().isoformat()
     
-    # Salva novo cache (validade = hoje)
-    novo_cache = {
-        'datasLiberadas': sorted(list(datas)),
-        'validade': hoje
-    }
+    # Expira na virada do dia (a liberação depende de "hoje")
+    fim_do_dia = agora.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    segundos_restantes = max(int((fim_do_dia - agora).total_seconds()), 1)
     
-    # Update atômico sem disparar save()
-    from apps.core.models import AnoLetivo
-    AnoLetivo.objects.filter(pk=ano_letivo.pk).update(
-        datas_liberadas_aulas_faltas=novo_cache
+    datas = AnoLetivoService.obter_do_cache(
+        ano_letivo.ano,
+        f'datas_liberadas:{hoje}',
+        lambda: sorted(_calcular_datas_liberadas(ano_letivo)),
+        timeout=segundos_restantes,
     )
-    
-    return datas
+    return set(datas)
 
 
 def _calcular_datas_liberadas(ano_letivo):
@@ -99,29 +96,21 @@ def _calcular_datas_liberadas(ano_letivo):
     Returns:
         set: Conjunto de datas ISO liberadas
     """
-    hoje_iso = timezone.localdate().isoformat()
+    from apps.core.services.calendario_service import CalendarioLetivo
+    
+    hoje = timezone.localdate()
+    hoje_iso = hoje.isoformat()
     datas_liberadas = set()
     
     controles = ano_letivo.controles if ano_letivo else None
     if not controles:
         return datas_liberadas
     
-    # Percorre bimestres 1-5
-    for bim_key in ('1', '2', '3', '4', '5'):
-        bimestre = controles.get(bim_key)
-        if not bimestre:
-            continue
-        
-        # Apenas dados de AULA
-        aula = bimestre.get('AULA')
-        if not aula:
-            continue
-        
-        inicio = aula.get('data_liberada_inicio')
-        fim = aula.get('data_liberada_fim')
-        dias_letivos = aula.get('dias_letivos', [])
-        digitacao_futura = aula.get('digitacao_futura', True)
-        
+    # Dias letivos vêm do calendário vetorizado (sem reprocessar as listas ISO)
+    calendario = CalendarioLetivo.do_indice(controles['indice_dias']) if controles.get('indice_dias') else None
+    
+    # Janelas de AULA por bimestre (1-5)
+    for bim_key, (inicio, fim, digitacao_futura) in _liberacoes(controles, 'AULA').items():
         # Verifica se período está aberto (hoje entre inicio e fim)
         if inicio and hoje_iso < inicio:
             continue
@@ -129,6 +118,14 @@ def _calcular_datas_liberadas(ano_letivo):
             continue
         
         # Adiciona dias letivos conforme regra
+        if calendario is not None:
+            dias = calendario.dias_bimestre(int(bim_key))
+            if not digitacao_futura:
+                dias = dias[dias <= np.datetime64(hoje)]
+            datas_liberadas.update(np.datetime_as_string(dias, unit='D').tolist())
+            continue
+
+        dias_letivos = controles.get(bim_key, {}).get('AULA', {}).get('dias_letivos', [])
         if digitacao_futura:
             datas_liberadas.update(dias_letivos)
         else:
@@ -192,17 +189,15 @@ def verificar_data_registro_aula(ano_letivo, data_verificar):
         except: pass
         return {'valida': False, 'mensagem': 'A data selecionada não é considerada um dia letivo ou é feriado.', 'bimestre': None}
 
+    inicio_reg, fim_reg, digitacao_futura = _liberacoes(controles, 'AULA').get(
+        str(bimestre_idx), (None, None, True)
+    )
+
     # 2. Verifica se é dia futuro e se é permitido
-    if data_iso > hoje_iso:
-        aula_ctrl = controles.get(str(bimestre_idx), {}).get('AULA', {})
-        if not aula_ctrl.get('digitacao_futura', True):
-            return {'valida': False, 'mensagem': f'Não é permitido o registro antecipado de aulas para o {bimestre_idx}º bimestre.', 'bimestre': None}
+    if data_iso > hoje_iso and not digitacao_futura:
+        return {'valida': False, 'mensagem': f'Não é permitido o registro antecipado de aulas para o {bimestre_idx}º bimestre.', 'bimestre': None}
 
     # 3. Verifica se o período de registro do bimestre está aberto
-    aula_ctrl = controles.get(str(bimestre_idx), {}).get('AULA', {})
-    inicio_reg = aula_ctrl.get('data_liberada_inicio')
-    fim_reg = aula_ctrl.get('data_liberada_fim')
-    
     if inicio_reg and hoje_iso < inicio_reg:
         data_br = datetime.strptime(inicio_reg, '%Y-%m-%d').strftime('%d/%m/%Y')
         return {'valida': False, 'mensagem': f'O período de registro para o {bimestre_idx}º bimestre só começa em {data_br}.', 'bimestre': None}
@@ -223,11 +218,74 @@ def verificar_data_registro_aula(ano_letivo, data_verificar):
     }
 
 
+def _liberacoes(controles, tipo):
+    """
+    Janelas de liberação do tipo (AULA, NOTA, BOLETIM) por bimestre:
+    {'1': (inicio_iso, fim_iso, digitacao_futura), ...}.
+
+    Lidas de controles['indice_dias']['liberacoes'] (gerado por
+    AnoLetivo.atualizar_controles_json). Controles gerados antes do índice
+    caem nos dicts por bimestre.
+    """
+    indice = controles.get('indice_dias') or {}
+    if 'liberacoes' in indice:
+        return {bim_key: tuple(janela) for bim_key, janela in indice['liberacoes'].get(tipo, {}).items()}
+
+    janelas = {}
+    for bim_key in ('1', '2', '3', '4', '5'):
+        controle = controles.get(bim_key, {}).get(tipo)
+        if controle:
+            janelas[bim_key] = (
+                controle.get('data_liberada_inicio'),
+                controle.get('data_liberada_fim'),
+                controle.get('digitacao_futura', True),
+            )
+    return janelas
+
+
 def _identificar_bimestre(controles, data_iso):
-    """Retorna o número do bimestre (1-4) para uma data, ou None."""
+    """
+    Retorna o número do bimestre (1-4) para uma data, ou None.
+    
+    O(1) pelo calendário letivo de controles['indice_dias'] (gerado por
+    AnoLetivo.atualizar_controles_json). Controles gerados antes do índice
+    caem na varredura das listas de dias letivos.
+    """
+    from apps.core.services.calendario_service import CalendarioLetivo
+    
+    indice = controles.get('indice_dias')
+    if indice:
+        try:
+            return CalendarioLetivo.do_indice(indice).bimestre(data_iso) or None
+        except ValueError:
+            return None
+    
     for bim_key in ('1', '2', '3', '4', '5'):
         bimestre = controles.get(bim_key, {})
         aula = bimestre.get('AULA', {})
         if data_iso in aula.get('dias_letivos', []):
             return int(bim_key)
     return None
+
+
+def identificar_bimestre_ano(ano, data):
+    """
+    Retorna o bimestre (1-4) de uma data no ano letivo, ou None.
+
+    Fonte única do bimestre de Aula: índice de dias do processo
+    (AnoLetivoService.obter_indice_dias, O(1) e sem queries com cache quente),
+    com fallback para a varredura dos controles em cache.
+
+    Args:
+        ano: Ano (int) do AnoLetivo
+        data: date
+    """
+    from apps.core.models.calendario import consultar_indice_dias
+    from apps.core.services.ano_letivo_service import AnoLetivoService
+
+    indice = AnoLetivoService.obter_indice_dias(ano)
+    if indice:
+        return consultar_indice_dias(indice, data)
+
+    controles = AnoLetivoService.obter_controles(ano)
+    return _identificar_bimestre(controles, data.isoformat()) if controles else None
@@ -5,6 +5,7 @@ Re-exporta todos os ViewSets para manter compatibilidade com imports existentes.
 """
 from .plano_aula import PlanoAulaViewSet
 from .aula_faltas import AulaFaltasViewSet
+from .frequencia import FrequenciaViewSet
 from .minhas_turmas import MinhasTurmasViewSet
 from .grade_professor import grade_professor_view
 from .grade_turma import grade_turma_view
@@ -17,6 +18,7 @@ from .descritor_ocorrencia import (
 __all__ = [
     'PlanoAulaViewSet',
     'AulaFaltasViewSet',
+    'FrequenciaViewSet',
     'MinhasTurmasViewSet',
     'grade_professor_view',
     'grade_turma_view',
@@ -19,6 +19,7 @@ from apps.pedagogical.serializers.aula_faltas import (
     AulaFaltasSerializer,
     AulaFaltasListSerializer,
     AtualizarFaltasSerializer,
+    SincronizarFaltasSerializer,
     ContextoAulaSerializer
 )
 from apps.academic.models import MatriculaTurma
@@ -47,6 +48,7 @@ class AulaFaltasViewSet(AnoLetivoFilterMixin, viewsets.ModelViewSet):
             'estudantes': [PROFESSOR],
             'estudantes_por_turma': [PROFESSOR],
             'atualizar_faltas': OWNER,
+            'sincronizar_faltas': OWNER,
         }
     )]
 
@@ -84,6 +86,13 @@ class AulaFaltasViewSet(AnoLetivoFilterMixin, viewsets.ModelViewSet):
         if user.tipo_usuario == 'PROFESSOR':
             # Garante que o professor veja apenas suas atribuições
             qs = qs.filter(professor_disciplina_turma__professor__usuario=user)
+        
+        # Ownership (OWNER em update/delete/faltas) resolvido na mesma consulta
+        qs = qs.annotate_is_owner(user)
+
+        if self.action in ('atualizar_faltas', 'sincronizar_faltas'):
+            # Auto-save: só precisa da aula para permissão, sem faltas/contagens
+            return qs.prefetch_related(None)
             
         return qs.annotate(
             total_faltas_count=Count('faltas')
@@ -155,7 +164,8 @@ class AulaFaltasViewSet(AnoLetivoFilterMixin, viewsets.ModelViewSet):
 
         # 4. Datas Liberadas para DateInputAnoLetivo (scope=full)
         # =====================================================================
-        # Usa cache com TTL de 2h para evitar recálculo a cada requisição.
+        # Usa o cache compartilhado do ano letivo (validade diária, invalidado
+        # quando os controles mudam) para evitar recálculo a cada requisição.
         # Frontend recebe datasLiberadas já processadas, não precisa calcular.
         # =====================================================================
         if scope == 'full':
@@ -240,9 +250,10 @@ class AulaFaltasViewSet(AnoLetivoFilterMixin, viewsets.ModelViewSet):
 
         # Se tiver aula, mapeia as faltas existentes efficiently
         faltas_map = {}
+        versoes = aula.versoes_faltas if aula else {}
         if aula:
             faltas_map = {
-                f.estudante_id: {'qtd': f.qtd_faltas, 'aulas': f.aulas_faltas}
+                f.estudante_id: {'qtd': f.qtd_faltas, 'aulas': f.aulas_faltas, 'mascara': f.mascara_faltas}
                 for f in aula.faltas.all()
             }
 
@@ -252,7 +263,7 @@ class AulaFaltasViewSet(AnoLetivoFilterMixin, viewsets.ModelViewSet):
             est_id = estudante.id
             
             # Default: sem faltas
-            falta_info = faltas_map.get(est_id, {'qtd': 0, 'aulas': []})
+            falta_info = faltas_map.get(est_id, {'qtd': 0, 'aulas': [], 'mascara': 0})
             
             response_data.append({
                 'id': str(est_id),
@@ -260,7 +271,9 @@ class AulaFaltasViewSet(AnoLetivoFilterMixin, viewsets.ModelViewSet):
                 'status': m.status,
                 'numero_chamada': m.mumero_chamada, # Campo numero_chamada para o frontend
                 'qtd_faltas': falta_info['qtd'],
-                'aulas_faltas': falta_info['aulas']
+                'aulas_faltas': falta_info['aulas'],
+                'faltas_mask': falta_info['mascara'],
+                'seq': versoes.get(str(est_id), 0) # Último seq aplicado (auto-save em lote)
             })
         return response_data
 
@@ -320,6 +333,29 @@ class AulaFaltasViewSet(AnoLetivoFilterMixin, viewsets.ModelViewSet):
             'aulas_faltas': resultado['aulas_faltas']
         })
 
+    @action(detail=True, methods=['post'])
+    def sincronizar_faltas(self, request, pk=None):
+        """
+        Auto-save em lote: aplica as alterações de faltas acumuladas pelo cliente.
+        
+        O cliente agrupa os cliques da chamada e envia periodicamente:
+            {"deltas": [{"estudante_id": "...", "faltas_mask": [true, false], "seq": 12}, ...]}
+        
+        'seq' deve ser crescente por aula no cliente, a partir do maior 'seq'
+        devolvido em 'estudantes' (ou em 'versoes_faltas' da aula); deltas com seq
+        menor ou igual ao último aplicado para o estudante são ignorados
+        (last-write-wins).
+        A resposta traz o estado consolidado para o cliente reconciliar.
+        """
+        aula = self.get_object()
+        
+        serializer = SincronizarFaltasSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        resultado = FaltasService.aplicar_deltas(aula, serializer.validated_data['deltas'])
+        
+        return Response({'status': 'ok', **resultado})
+
     def list(self, request, *args, **kwargs):
         """Override do list para injetar metadados para professores."""
         response = super().list(request, *args, **kwargs)
@@ -0,0 +1,78 @@
+"""
+ViewSet de leitura da frequência materializada (FrequenciaBimestral).
+"""
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.academic.models import Estudante
+from apps.core.mixins import AnoLetivoFilterMixin
+from apps.core.models import DisciplinaTurma
+from apps.pedagogical.models import FrequenciaBimestral
+from apps.pedagogical.serializers.frequencia import FrequenciaFiltroSerializer
+from apps.pedagogical.services.frequencia_service import FrequenciaService
+from core_project.permissions import Policy, FUNCIONARIO, NONE
+
+
+class FrequenciaViewSet(AnoLetivoFilterMixin, viewsets.GenericViewSet):
+    """
+    Consulta de frequência (aulas dadas x faltas) a partir do agregado materializado.
+
+    Endpoints:
+    - GET /frequencias/?turma_id=&disciplina_turma_id=&estudante_id=&bimestre=
+    - GET /frequencias/risco/?turma_id=&bimestre=&minimo=75
+    """
+    queryset = FrequenciaBimestral.objects.all()
+    serializer_class = FrequenciaFiltroSerializer
+    ano_letivo_field = 'disciplina_turma__turma__ano_letivo'
+    permission_classes = [Policy(
+        create=NONE,
+        read=[FUNCIONARIO],
+        update=NONE,
+        delete=NONE,
+        custom={
+            'risco': [FUNCIONARIO],
+        }
+    )]
+
+    def _filtros(self, request):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def list(self, request):
+        """Frequência por estudante e disciplina da turma (somando os bimestres filtrados)."""
+        serializer = self._filtros(request)
+        return Response(FrequenciaService.consultar(self.get_queryset(), **serializer.filtros()))
+
+    @action(detail=False, methods=['get'])
+    def risco(self, request):
+        """Estudantes abaixo da frequência mínima, ordenados pela menor frequência."""
+        serializer = self._filtros(request)
+        linhas = FrequenciaService.estudantes_em_risco(
+            self.get_queryset(),
+            minimo=serializer.validated_data['minimo'],
+            **serializer.filtros()
+        )
+
+        # Identificação para exibição (2 queries)
+        estudantes = {
+            e.id: e.nome_social or e.usuario.get_full_name()
+            for e in Estudante.objects.filter(
+                id__in={linha['estudante_id'] for linha in linhas}
+            ).select_related('usuario')
+        }
+        disciplinas = {
+            dt.id: dt
+            for dt in DisciplinaTurma.objects.filter(
+                id__in={linha['disciplina_turma_id'] for linha in linhas}
+            ).select_related('disciplina', 'turma__curso')
+        }
+
+        for linha in linhas:
+            dt = disciplinas.get(linha['disciplina_turma_id'])
+            linha['estudante_nome'] = estudantes.get(linha['estudante_id'], '')
+            linha['disciplina_sigla'] = dt.disciplina.sigla if dt else ''
+            linha['turma_nome'] = dt.turma.nome_completo if dt else ''
+
+        return Response(linhas)
@@ -1,13 +1,20 @@
 """
 View para exibição da grade horária do professor logado.
 Retorna a grade horária com todas as turmas onde o professor dá aula.
+
+A grade vem do cache Funcionario.grade_horaria (linha do tempo do ano letivo),
+então qualquer semana pode ser consultada sem recalcular a grade. A consulta
+nunca grava: sem cache, a grade é montada em memória. Apenas os
+registros de aula da semana são buscados a cada requisição. A resposta leva um
+ETag; se o cliente já tem a versão (If-None-Match), responde 304 sem corpo.
 """
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.core.models import GradeHorariaValidade, GradeHoraria, ProfessorDisciplinaTurma
+from apps.core.services.grade_horaria_service import GradeHorariaService
+from apps.core.utils import gerar_etag, resposta_com_etag
 
 
 @api_view(['GET'])
@@ -15,34 +22,44 @@ from apps.core.models import GradeHorariaValidade, GradeHoraria, ProfessorDiscip
 def grade_professor_view(request):
     """
     Retorna a grade horária de um professor.
-    
+
     URL: /api/pedagogical/grade-professor/
     Query params:
         - professor_id (opcional): UUID do professor (apenas para GESTAO/SECRETARIA)
-    
+        - data (opcional): Qualquer dia da semana desejada (AAAA-MM-DD). Padrão: hoje
+
     Se professor_id não for informado, retorna a grade do professor logado.
     """
+    from datetime import date, timedelta
     from django.utils import timezone
-    from datetime import timedelta
-    from django.db import models
     from apps.core.models import Funcionario
     from apps.pedagogical.models import Aula
-    
+
     user = request.user
-    hoje = timezone.now().date()
-    
+
+    data_param = request.query_params.get('data')
+    if data_param:
+        try:
+            data_referencia = date.fromisoformat(data_param)
+        except ValueError:
+            return Response({
+                'error': 'Data inválida. Use o formato AAAA-MM-DD.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        data_referencia = timezone.localdate()
+
     # Se passou professor_id, verifica permissão
     professor_id = request.query_params.get('professor_id')
-    
+
     if professor_id:
         # Apenas GESTAO e SECRETARIA podem ver grade de outros
         if user.tipo_usuario not in ('GESTAO', 'SECRETARIA'):
             return Response({
                 'error': 'Sem permissão para visualizar grade de outros professores.'
             }, status=status.HTTP_403_FORBIDDEN)
-        
+
         try:
-            professor = Funcionario.objects.get(id=professor_id)
+            professor = Funcionario.objects.select_related('usuario').get(id=professor_id)
         except Funcionario.DoesNotExist:
             return Response({
                 'error': 'Professor não encontrado.'
@@ -54,183 +71,122 @@ def grade_professor_view(request):
                 'error': 'Usuário não é professor ou não possui vínculo de funcionário.'
             }, status=status.HTTP_403_FORBIDDEN)
         professor = user.funcionario
-    
+
     # Busca ano letivo selecionado
     ano_letivo = user.get_ano_letivo_selecionado()
     if not ano_letivo:
         return Response({
             'error': 'Nenhum ano letivo selecionado.'
         }, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Busca atribuições ativas do professor
-    atribuicoes = ProfessorDisciplinaTurma.objects.filter(
-        professor=professor,
-        disciplina_turma__turma__ano_letivo=ano_letivo.ano
-    ).filter(
-        models.Q(data_fim__isnull=True) | models.Q(data_fim__gte=hoje)
-    ).select_related(
-        'disciplina_turma__turma__curso',
-        'disciplina_turma__disciplina'
+
+    # Linha do tempo do professor no ano
+    cache = professor.grade_horaria if isinstance(professor.grade_horaria, dict) else {}
+    grade = cache.get(str(ano_letivo.ano))
+    versao_cache = grade and grade.get('gerado_em')
+    if not grade or 'periodos' not in grade:
+        # Cache ainda não construído (ou no formato antigo): monta em memória,
+        # sem gravar na consulta (reconstruir_grades_horarias converte os
+        # existentes). A versão das grades do ano identifica o conteúdo.
+        grade = professor.build_grade_horaria(save=False, ano=ano_letivo.ano)[str(ano_letivo.ano)]
+        grade['gerado_em'] = None
+        versao_cache = GradeHorariaService.versao_ano(ano_letivo.ano)
+
+    periodo = GradeHorariaService.periodo_em(grade, data_referencia)
+
+    # Intervalo da semana consultada (Segunda a Sexta) para checar registros de aula
+    inicio_semana = data_referencia - timedelta(days=data_referencia.weekday())
+    fim_semana = inicio_semana + timedelta(days=4)
+
+    # Aulas registradas pelo professor NESTA semana: (pdt_id, data_iso)
+    registros = set()
+    if periodo and periodo['validade']:
+        registros = {
+            (str(pdt_id), data.isoformat())
+            for pdt_id, data in Aula.objects.filter(
+                professor_disciplina_turma__professor=professor,
+                professor_disciplina_turma__disciplina_turma__turma__ano_letivo=ano_letivo.ano,
+                data__range=[inicio_semana, fim_semana]
+            ).values_list('professor_disciplina_turma_id', 'data')
+        }
+
+    # A resposta só muda com o cache (gerado_em), o período, a semana e os registros
+    etag = gerar_etag(
+        'grade-professor', professor.pk, professor.get_apelido(), ano_letivo.ano,
+        versao_cache, periodo and periodo['data_inicio'], periodo and periodo['data_fim'],
+        inicio_semana, sorted(registros),
     )
-    
-    if not atribuicoes.exists():
-        return Response({
-            'ano_letivo': ano_letivo.ano,
+
+    return resposta_com_etag(
+        request, etag,
+        lambda: _montar_grade(professor, ano_letivo.ano, grade, periodo, inicio_semana, registros)
+    )
+
+
+def _montar_grade(professor, ano, grade, periodo, inicio_semana, registros):
+    """Monta a resposta da grade do professor a partir do período do cache."""
+    from datetime import timedelta
+
+    if not periodo:
+        return {
+            'ano_letivo': ano,
             'professor_nome': professor.get_apelido(),
             'validade': None,
             'matriz': {},
             'horarios': {},
             'mostrar_disciplina': False,
             'mensagem': 'Você não possui atribuições neste ano letivo.'
-        })
-    
-    # Identifica turmas e disciplinas do professor
-    turmas = set()
-    disciplinas = set()
-    turma_disciplina_map = {}  # (turma_id, disciplina_id) -> turma
-    
-    for atrib in atribuicoes:
-        turma = atrib.disciplina_turma.turma
-        disciplina = atrib.disciplina_turma.disciplina
-        turmas.add(turma)
-        disciplinas.add(disciplina.id)
-        turma_disciplina_map[(turma.id, disciplina.id)] = {
-            'turma': turma,
-            'disciplina': disciplina,
-            'pdt_id': atrib.id
         }
-    
+
     # Se professor tem mais de uma disciplina, mostra sigla
-    mostrar_disciplina = len(disciplinas) > 1
-    
-    # Busca validades vigentes das turmas do professor
-    # Como GradeHorariaValidade não tem FK para turma, usamos numero/letra.
-    # Montamos query com Q objects para cada par (numero, letra) das turmas do professor
-    q_turmas = models.Q()
-    for t in turmas:
-        q_turmas |= models.Q(turma_numero=t.numero, turma_letra=t.letra)
-    
-    validades = GradeHorariaValidade.objects.filter(
-        q_turmas,
-        ano_letivo__ano=ano_letivo.ano,
-        data_inicio__lte=hoje,
-        data_fim__gte=hoje
-    )
-    
-    if not validades.exists():
-        return Response({
-            'ano_letivo': ano_letivo.ano,
+    mostrar_disciplina = periodo['mostrar_disciplina']
+
+    if not periodo['validade']:
+        return {
+            'ano_letivo': ano,
             'professor_nome': professor.get_apelido(),
             'validade': None,
             'matriz': {},
             'horarios': {},
             'mostrar_disciplina': mostrar_disciplina,
             'mensagem': 'Nenhuma grade horária vigente para suas turmas.'
-        })
-    
-    validade_ref = validades.first()
-    
-    # Busca itens de grade das validades onde o professor leciona
-    grades = GradeHoraria.objects.filter(
-        validade__in=validades
-    ).select_related(
-        'horario_aula',
-        'disciplina',
-        # 'validade__turma__curso' # Validade nao tem FK turma
-    ).order_by('horario_aula__dia_semana', 'horario_aula__numero')
-    
-    # Identifica o intervalo da semana atual (Segunda a Sexta) para checar registros de aula
-    hoje_hoje = timezone.localtime(timezone.now()).date()
-    dia_semana_hoje = hoje_hoje.weekday() # 0=Segunda, 6=Domingo
-    
-    # Início da semana (Segunda)
-    inicio_semana = hoje_hoje - timedelta(days=dia_semana_hoje)
-    # Fim da semana (Sexta) - Grade só mostra até sexta
-    fim_semana = inicio_semana + timedelta(days=4)
-    
-    # Busca todas as aulas registradas pelo professor para as turmas dele NESTA semana
-    aulas_registradas = Aula.objects.filter(
-        professor_disciplina_turma__in=atribuicoes,
-        data__range=[inicio_semana, fim_semana]
-    ).values('professor_disciplina_turma_id', 'data')
-    
-    # Map para busca rápida: (pdt_id, data_iso) -> True
-    map_registros = {
-        (str(a['professor_disciplina_turma_id']), a['data'].isoformat()): True 
-        for a in aulas_registradas
+        }
+
+    # Calcula as datas da semana para cada dia (0=Segunda, 4=Sexta)
+    datas_semana = {
+        str(i): (inicio_semana + timedelta(days=i)).isoformat() for i in range(5)
     }
 
-    # Monta matriz com apenas as aulas do professor
     matriz = {}
-    horarios = {}
-    
-    # Calcula as datas da semana para cada dia (0=Segunda, 4=Sexta)
-    datas_semana = {}
-    for i in range(5):
-        data_dia = inicio_semana + timedelta(days=i)
-        datas_semana[str(i)] = data_dia.isoformat()
-
-    for g in grades:
-        # Encontra a turma correta dessa validade
-        # g.validade tem numero/letra. Precisamos achar a 'turma' objeto correspondente 
-        # que está no set 'turmas' (que filtramos do professor).
-        turma = next((
-            t for t in turmas 
-            if t.numero == g.validade.turma_numero and t.letra == g.validade.turma_letra
-        ), None)
-
-        if not turma:
-            continue
-
-        disciplina = g.disciplina
-        
-        # Verifica se essa aula é do professor
-        if (turma.id, disciplina.id) not in turma_disciplina_map:
-            continue
-        
-        numero_aula = g.horario_aula.numero
-        dia = g.horario_aula.dia_semana
-        num_key = str(numero_aula)
-        dia_key = str(dia)
-        
-        if num_key not in matriz:
-            matriz[num_key] = {}
-        
-        # Monta label: turma + disciplina (se múltiplas disciplinas)
-        turma_label = f"{turma.numero}{turma.letra}"
-        
-        # Dados da célula
-        matriz[num_key][dia_key] = {
-            'turma_id': str(turma.id),
-            'turma_label': turma_label,
-            'turma_nome_completo': turma.nome_completo,
-            'disciplina_id': str(disciplina.id),
-            'disciplina_nome': disciplina.nome,
-            'disciplina_sigla': disciplina.sigla if mostrar_disciplina else None,
-            'curso_sigla': g.curso.sigla if g.curso else turma.curso.sigla,
-            'professor_disciplina_turma_id': str(turma_disciplina_map[(turma.id, disciplina.id)]['pdt_id']),
-            'registrada': map_registros.get(
-                (str(turma_disciplina_map[(turma.id, disciplina.id)]['pdt_id']), datas_semana.get(dia_key)), 
-                False
-            )
-        }
-        
-        # Horários para legenda
-        if num_key not in horarios:
-            horarios[num_key] = {
-                'hora_inicio': g.horario_aula.hora_inicio.strftime('%H:%M'),
-                'hora_fim': g.horario_aula.hora_fim.strftime('%H:%M')
+    for num_key, dias in periodo['matriz'].items():
+        matriz[num_key] = {}
+        for dia_key, celula in dias.items():
+            pdt_id = celula['professor_disciplina_turma_id']
+            matriz[num_key][dia_key] = {
+                'turma_id': celula['turma_id'],
+                'turma_label': celula['turma_label'],
+                'turma_sigla': celula['turma_sigla'],
+                'turma_nome_completo': celula['turma_nome_completo'],
+                'disciplina_id': celula['disciplina_id'],
+                'disciplina_nome': celula['disciplina_nome'],
+                'disciplina_sigla': celula['disciplina_sigla'] if mostrar_disciplina else None,
+                'curso_sigla': celula['curso_sigla'],
+                'professor_disciplina_turma_id': pdt_id,
+                'registrada': (pdt_id, datas_semana.get(dia_key)) in registros
             }
-    
-    return Response({
-        'ano_letivo': ano_letivo.ano,
+
+    # Horários para legenda (apenas das aulas do professor)
+    horarios = {
+        num_key: grade['horarios'][num_key]
+        for num_key in matriz if num_key in grade['horarios']
+    }
+
+    return {
+        'ano_letivo': ano,
         'professor_nome': professor.get_apelido(),
-        'validade': {
-            'data_inicio': validade_ref.data_inicio.isoformat(),
-            'data_fim': validade_ref.data_fim.isoformat()
-        },
+        'validade': periodo['validade'],
         'matriz': matriz,
         'horarios': horarios,
         'mostrar_disciplina': mostrar_disciplina,
-        'gerado_em': timezone.now().isoformat()
-    })
+        'semana': datas_semana,
+        'gerado_em': grade['gerado_em']
+    }
@@ -2,13 +2,20 @@
 View para exibição pública da grade horária de uma turma.
 Retorna a grade horária unificada de todas as turmas relacionadas
 (mesmo numero/letra/ano_letivo, cursos diferentes).
+
+A grade vem do cache Turma.grade_horaria (linha do tempo do ano letivo),
+então qualquer semana pode ser consultada sem recalcular a grade. A consulta
+nunca grava: sem cache, a grade do grupo é montada em memória. A resposta
+leva um ETag; se o cliente já tem a versão (If-None-Match), responde 304 sem corpo.
 """
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.core.models import Turma, GradeHorariaValidade, GradeHoraria, DisciplinaTurma, ProfessorDisciplinaTurma
+from apps.core.models import Turma, ProfessorDisciplinaTurma
+from apps.core.services.grade_horaria_service import GradeHorariaService
+from apps.core.utils import gerar_etag, resposta_com_etag
 
 
 @api_view(['GET'])
@@ -16,47 +23,93 @@ from apps.core.models import Turma, GradeHorariaValidade, GradeHoraria, Discipli
 def grade_turma_view(request, ano, numero, letra):
     """
     Retorna a grade horária unificada de uma turma (e suas relacionadas).
-    
+
     URL: /api/pedagogical/grade-turma/<ano>/<numero>/<letra>/
     Exemplo: /api/pedagogical/grade-turma/2026/1/A/
-    
-    Retorna a grade vigente (baseada na data atual) com todas as disciplinas
-    de todas as turmas relacionadas (mesmo numero/letra/ano).
+    Query params:
+        - data (opcional): Qualquer dia da semana desejada (AAAA-MM-DD). Padrão: hoje
+
+    Retorna a grade vigente na data com todas as disciplinas de todas as
+    turmas relacionadas (mesmo numero/letra/ano).
     """
+    from datetime import date
     from django.utils import timezone
     from django.db import models
-    
-    hoje = timezone.now().date()
+
+    data_param = request.query_params.get('data')
+    if data_param:
+        try:
+            data_referencia = date.fromisoformat(data_param)
+        except ValueError:
+            return Response({
+                'error': 'Data inválida. Use o formato AAAA-MM-DD.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        data_referencia = timezone.localdate()
+
     letra = letra.upper()
-    
+
     # Busca todas as turmas relacionadas (mesmo numero/letra/ano, cursos diferentes)
-    turmas = Turma.objects.filter(
+    turmas = list(Turma.objects.filter(
         ano_letivo=ano,
         numero=numero,
         letra=letra,
         is_active=True
-    ).select_related('curso')
-    
-    if not turmas.exists():
+    ).select_related('curso'))
+
+    if not turmas:
         return Response({
             'error': 'Turma não encontrada'
         }, status=status.HTTP_404_NOT_FOUND)
-    
-    # Pega a primeira turma como referência
-    turma_ref = turmas.first()
-    
-    # Busca validades vigentes de qualquer uma das turmas relacionadas
-    # Busca validades vigentes para esta turma (grupo)
-    validades = GradeHorariaValidade.objects.filter(
-        ano_letivo__ano=ano,
-        turma_numero=numero,
-        turma_letra=letra,
-        data_inicio__lte=hoje,
-        data_fim__gte=hoje
+
+    # Caches ainda não construídos (ou no formato antigo): monta o grupo em
+    # memória, sem gravar na consulta (reconstruir_grades_horarias converte os
+    # existentes). A versão das grades do ano identifica o conteúdo.
+    versao_cache = [t.grade_horaria and t.grade_horaria.get('gerado_em') for t in turmas]
+    if any(not t.grade_horaria or 'periodos' not in t.grade_horaria for t in turmas):
+        grades = GradeHorariaService.construir_ano(
+            ano, turma_ids=[t.id for t in turmas], professor_ids=[], salvar=False
+        )['turmas']
+        for turma in turmas:
+            turma.grade_horaria = {**grades[turma.id], 'gerado_em': None}
+        versao_cache = GradeHorariaService.versao_ano(ano)
+
+    periodos = [
+        (turma, GradeHorariaService.periodo_em(turma.grade_horaria, data_referencia))
+        for turma in turmas
+    ]
+    periodos = [(turma, periodo) for turma, periodo in periodos if periodo]
+
+    # Busca disciplinas do professor logado (se for professor)
+    minhas_disciplinas = []
+    if request.user.tipo_usuario == 'PROFESSOR' and hasattr(request.user, 'funcionario'):
+        atribuicoes = ProfessorDisciplinaTurma.objects.filter(
+            professor=request.user.funcionario,
+            disciplina_turma__turma__in=turmas
+        ).filter(
+            models.Q(data_inicio__isnull=True) | models.Q(data_inicio__lte=data_referencia),
+            models.Q(data_fim__isnull=True) | models.Q(data_fim__gte=data_referencia)
+        ).values_list('disciplina_turma__disciplina_id', flat=True)
+        minhas_disciplinas = sorted(str(d) for d in atribuicoes)
+
+    # A resposta só muda com os caches (gerado_em), os períodos e as disciplinas do usuário
+    etag = gerar_etag(
+        'grade-turma', ano, numero, letra,
+        [(t.pk, t.curso.sigla, t.nomenclatura) for t in turmas], versao_cache,
+        [(p['data_inicio'], p['data_fim']) for _, p in periodos],
+        minhas_disciplinas,
     )
-    
-    if not validades.exists():
-        return Response({
+
+    return resposta_com_etag(
+        request, etag,
+        lambda: _montar_grade(ano, numero, letra, turmas, periodos, minhas_disciplinas)
+    )
+
+
+def _montar_grade(ano, numero, letra, turmas, periodos, minhas_disciplinas):
+    """Monta a resposta unificada a partir dos períodos das turmas do grupo."""
+    if not periodos:
+        return {
             'ano_letivo': ano,
             'numero': numero,
             'letra': letra,
@@ -65,115 +118,33 @@ def grade_turma_view(request, ano, numero, letra):
             'matriz': {},
             'horarios': {},
             'mensagem': 'Nenhuma grade horária vigente para esta turma.'
-        })
-    
-    # Usa a primeira validade como referência de datas
-    validade_ref = validades.first()
-    
-    # Busca todos os itens de grade de todas as validades vigentes
-    grades = GradeHoraria.objects.filter(
-        validade__in=validades
-    ).select_related(
-        'horario_aula',
-        'disciplina',
-    ).order_by('horario_aula__dia_semana', 'horario_aula__numero')
-    
-    # Mapa de professores: disciplina_turma -> professor ativo
-    professores_map = {}
-    for turma in turmas:
-        disciplinas_turma = DisciplinaTurma.objects.filter(
-            turma=turma
-        ).prefetch_related('professores__professor')
-        
-        for dt in disciplinas_turma:
-            professor_ativo = dt.professores.filter(
-                models.Q(data_fim__isnull=True) | models.Q(data_fim__gte=hoje)
-            ).order_by(
-                models.Case(
-                    models.When(tipo='TITULAR', then=0),
-                    models.When(tipo='SUBSTITUTO', then=1),
-                    models.When(tipo='AUXILIAR', then=2),
-                    default=3,
-                    output_field=models.IntegerField()
-                )
-            ).first()
-            
-            # Chave: (turma_id, disciplina_id)
-            key = (turma.id, dt.disciplina_id)
-            if professor_ativo:
-                professores_map[key] = professor_ativo.professor.get_apelido()
-            else:
-                professores_map[key] = None
-    
-    # Monta matriz unificada
+        }
+
+    # Pega a primeira turma como referência
+    turma_ref = turmas[0]
+
+    # Monta matriz unificada: em horários compartilhados, prevalece a célula
+    # da turma do mesmo curso do item da grade
     matriz = {}
     horarios = {}
-    
-    for g in grades:
-        numero_aula = g.horario_aula.numero
-        dia = g.horario_aula.dia_semana
-        num_key = str(numero_aula)
-        dia_key = str(dia)
-        
-        if num_key not in matriz:
-            matriz[num_key] = {}
-        
-        # Pega professor para essa disciplina/turma
-        # Tenta encontrar a turma relacionada que corresponde ao curso_sigla esperado ou pega a primeira
-        validade = g.validade
-        turma_da_grade = None
-        for t in turmas:
-             if t.numero == validade.turma_numero and t.letra == validade.turma_letra:
-                  if g.curso and t.curso_id == g.curso_id:
-                       turma_da_grade = t
-                       break
-        
-        # Fallback: pega qualquer turma que combine (para caso de curso generico ou erro)
-        if not turma_da_grade:
-             turma_da_grade = turmas.first() # Simplificacao segura pois todas as turmas sao "irmas"
-
-        prof_key = (turma_da_grade.id, g.disciplina_id)
-        professor_apelido = professores_map.get(prof_key)
-        
-        # Dados da célula
-        matriz[num_key][dia_key] = {
-            'disciplina_id': str(g.disciplina.id),
-            'disciplina_nome': g.disciplina.nome,
-            'disciplina_sigla': g.disciplina.sigla,
-            'curso_sigla': g.curso.sigla if g.curso else '',
-            'professor_apelido': professor_apelido
-        }
-        
-        # Horários para legenda
-        if num_key not in horarios:
-            horarios[num_key] = {
-                'hora_inicio': g.horario_aula.hora_inicio.strftime('%H:%M'),
-                'hora_fim': g.horario_aula.hora_fim.strftime('%H:%M')
-            }
-    
-    # Busca disciplinas do professor logado (se for professor)
-    minhas_disciplinas = []
-    if request.user.tipo_usuario == 'PROFESSOR' and hasattr(request.user, 'funcionario'):
-        atribuicoes = ProfessorDisciplinaTurma.objects.filter(
-            professor=request.user.funcionario,
-            disciplina_turma__turma__in=turmas
-        ).filter(
-            models.Q(data_fim__isnull=True) | models.Q(data_fim__gte=hoje)
-        ).values_list('disciplina_turma__disciplina_id', flat=True)
-        minhas_disciplinas = [str(d) for d in atribuicoes]
-    
-    return Response({
+    for turma, periodo in periodos:
+        for num_key, dias in periodo['matriz'].items():
+            celulas = matriz.setdefault(num_key, {})
+            for dia_key, celula in dias.items():
+                if dia_key not in celulas or celula['curso_sigla'] == turma.curso.sigla:
+                    celulas[dia_key] = celula
+        for num_key, horario in periodo['horarios'].items():
+            horarios.setdefault(num_key, horario)
+
+    return {
         'ano_letivo': ano,
         'numero': numero,
         'letra': letra,
         'turma_nome': f"{turma_ref.numero}º {turma_ref.get_nomenclatura_display()} {turma_ref.letra}",
         'cursos': [t.curso.sigla for t in turmas],
-        'validade': {
-            'data_inicio': validade_ref.data_inicio.isoformat(),
-            'data_fim': validade_ref.data_fim.isoformat()
-        },
+        'validade': periodos[0][1]['validade'],
         'matriz': matriz,
         'horarios': horarios,
         'minhas_disciplinas': minhas_disciplinas,
-        'gerado_em': timezone.now().isoformat()
-    })
+        'gerado_em': turma_ref.grade_horaria['gerado_em']
+    }
@@ -58,8 +58,9 @@ class PlanoAulaViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         # Filtra pelo ano letivo selecionado
-        if hasattr(user, 'ano_letivo_selecionado') and user.ano_letivo_selecionado:
-             qs = qs.filter(ano_letivo=user.ano_letivo_selecionado.ano_letivo)
+        ano_letivo = user.get_ano_letivo_selecionado()
+        if ano_letivo:
+             qs = qs.filter(ano_letivo=ano_letivo)
 
         # Se for professor (e não gestão), vê apenas os próprios planos
         if user.tipo_usuario == 'PROFESSOR' and not user.is_staff: # Refinar is_staff check se necessario
@@ -4,6 +4,7 @@ Remove dados de estudantes após 1 ano da saída do CEMEP.
 """
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Sum
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
@@ -148,17 +149,15 @@ class Command(BaseCommand):
                             if dados['notas']:
                                 media = sum(dados['notas']) / len(dados['notas'])
                                 
-                                # Calcula frequência (simplificado)
-                                from apps.pedagogical.models import Faltas, Aula
-                                total_aulas = Aula.objects.filter(
+                                # Frequência anual a partir do agregado materializado
+                                from apps.pedagogical.models import FrequenciaBimestral
+                                totais = FrequenciaBimestral.objects.filter(
+                                    estudante=estudante,
                                     disciplina_turma__turma=turma,
                                     disciplina_turma__disciplina__nome=disc_nome
-                                ).count() or 1
-                                total_faltas = Faltas.objects.filter(
-                                    estudante=estudante,
-                                    aula__disciplina_turma__turma=turma,
-                                    aula__disciplina_turma__disciplina__nome=disc_nome
-                                ).count()
+                                ).aggregate(aulas=Sum('total_aulas'), faltas=Sum('total_faltas'))
+                                total_aulas = totais['aulas'] or 1
+                                total_faltas = totais['faltas'] or 0
                                 frequencia = int(((total_aulas - total_faltas) / total_aulas) * 100)
                                 
                                 HistoricoEscolarNotas.objects.get_or_create(
@@ -79,11 +79,10 @@ class User(AbstractUser):
         Retorna o objeto AnoLetivo selecionado pelo usuário.
         Se não houver seleção, retorna o ano ativo.
         Se não houver ano ativo, retorna None.
+
+        Memoizado por requisição (AnoLetivoRequestMiddleware); o ano ativo
+        vem do cache de processo. Ver AnoLetivoService.
         """
-        from apps.core.models import AnoLetivo, AnoLetivoSelecionado
-        try:
-            return self.ano_letivo_selecionado.ano_letivo
-        except AnoLetivoSelecionado.DoesNotExist:
-            ano_ativo = AnoLetivo.objects.filter(is_active=True).first()
-            return ano_ativo if ano_ativo else None
+        from apps.core.services.ano_letivo_service import AnoLetivoService
+        return AnoLetivoService.obter_selecionado(self)
 
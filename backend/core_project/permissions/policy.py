@@ -46,6 +46,8 @@ def Policy(*, create=None, read=None, update=None, delete=None, custom=None):
     
     Nota: Para OWNER, todos os models herdam de UUIDModel que possui o método is_owner().
     O método retorna False por padrão e pode ser sobrescrito em cada model conforme necessário.
+    Se o queryset da view usar annotate_is_owner(request.user), o valor anotado é
+    usado no lugar de is_owner() (sem consulta por objeto).
     """
     
     def _normalize(value):
@@ -141,7 +143,8 @@ def Policy(*, create=None, read=None, update=None, delete=None, custom=None):
                 return True
 
             # Todos os models herdam de UUIDModel e possuem is_owner
-            # O método retorna False por padrão e é sobrescrito quando necessário
-            return obj.is_owner(request.user)
+            # O método retorna False por padrão e é sobrescrito quando necessário.
+            # verificar_owner usa o valor de annotate_is_owner quando presente.
+            return obj.verificar_owner(request.user)
     
     return ConfiguredPolicy
@@ -62,6 +62,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.AnoLetivoRequestMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -114,6 +115,28 @@ DATABASES = {
     }
 }
 
+# Cache
+# Sem CACHE_BACKEND: LocMem (por processo). As chaves do ano letivo são
+# versionadas no banco (AnoLetivo.versao_cache), então continuam corretas com
+# vários workers: cada worker relê a versão a cada ANO_LETIVO_VERSAO_TTL
+# segundos, o atraso máximo para enxergar a invalidação feita por outro.
+# Um backend compartilhado apenas evita recalcular os mesmos dados em cada
+# worker, ex.:
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'cemep-digital'),
+    }
+}
+
+# Alias do cache usado para AnoLetivo.controles e datas liberadas (AnoLetivoService)
+ANO_LETIVO_CACHE_ALIAS = 'default'
+
+# Segundos em que um worker reaproveita a versão do cache do ano lida do banco
+ANO_LETIVO_VERSAO_TTL = 5
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -8,6 +8,7 @@ from paths import DATA_DIR, setup_django
 setup_django()
 
 from apps.core.models import AnoLetivo, DiaLetivoExtra, DiaNaoLetivo
+from apps.core.services.calendario_service import CalendarioService
 
 def to_date(date_str):
     return date.fromisoformat(date_str) if date_str else None
@@ -63,54 +64,56 @@ def import_ano_letivo(json_path):
     else:
         print(f"Ano Letivo {ano_val} criado com sucesso.")
 
-    # 2. Processar Dias Letivos Extras
-    print("Processando dias letivos extras...")
-    # Limpa associações atuais para refletir o JSON
-    ano_letivo.dias_letivos_extras.clear()
+    # 2 e 3. Dias extras e não letivos em lote: os signals de cada save/add não
+    # recalculam os controles; o recálculo é feito uma única vez ao final do bloco
+    with CalendarioService.lote():
+        # 2. Processar Dias Letivos Extras
+        print("Processando dias letivos extras...")
+        # Limpa associações atuais para refletir o JSON
+        ano_letivo.dias_letivos_extras.clear()
     
-    for item in data.get('dias_letivos_extras', []):
-        data_str = item.get('data')
-        descricao = item.get('descricao', f'Dia letivo extra {ano_val}')
+        for item in data.get('dias_letivos_extras', []):
+            data_str = item.get('data')
+            descricao = item.get('descricao', f'Dia letivo extra {ano_val}')
         
-        d_extra, _ = DiaLetivoExtra.objects.get_or_create(
-            data=data_str,
-            defaults={'descricao': descricao}
-        )
-        # Se a descrição mudou, atualiza
-        if d_extra.descricao != descricao:
-            d_extra.descricao = descricao
-            d_extra.save()
+            d_extra, _ = DiaLetivoExtra.objects.get_or_create(
+                data=data_str,
+                defaults={'descricao': descricao}
+            )
+            # Se a descrição mudou, atualiza
+            if d_extra.descricao != descricao:
+                d_extra.descricao = descricao
+                d_extra.save()
             
-        ano_letivo.dias_letivos_extras.add(d_extra)
+            ano_letivo.dias_letivos_extras.add(d_extra)
 
-    # 3. Processar Dias Não Letivos (Feriados/Recessos)
-    print("Processando dias não letivos...")
-    # Limpa associações atuais para refletir o JSON
-    ano_letivo.dias_nao_letivos.clear()
+        # 3. Processar Dias Não Letivos (Feriados/Recessos)
+        print("Processando dias não letivos...")
+        # Limpa associações atuais para refletir o JSON
+        ano_letivo.dias_nao_letivos.clear()
     
-    for item in data.get('dias_nao_letivos', []):
-        data_str = item.get('data')
-        tipo = item.get('tipo', 'FERIADO')
-        descricao = item.get('descricao', '')
+        for item in data.get('dias_nao_letivos', []):
+            data_str = item.get('data')
+            tipo = item.get('tipo', 'FERIADO')
+            descricao = item.get('descricao', '')
         
-        d_nao_letivo, _ = DiaNaoLetivo.objects.get_or_create(
-            data=data_str,
-            defaults={
-                'tipo': tipo,
-                'descricao': descricao
-            }
-        )
-        # Se tipo ou descrição mudaram, atualiza
-        if d_nao_letivo.tipo != tipo or d_nao_letivo.descricao != descricao:
-            d_nao_letivo.tipo = tipo
-            d_nao_letivo.descricao = descricao
-            d_nao_letivo.save()
+            d_nao_letivo, _ = DiaNaoLetivo.objects.get_or_create(
+                data=data_str,
+                defaults={
+                    'tipo': tipo,
+                    'descricao': descricao
+                }
+            )
+            # Se tipo ou descrição mudaram, atualiza
+            if d_nao_letivo.tipo != tipo or d_nao_letivo.descricao != descricao:
+                d_nao_letivo.tipo = tipo
+                d_nao_letivo.descricao = descricao
+                d_nao_letivo.save()
             
-        ano_letivo.dias_nao_letivos.add(d_nao_letivo)
+            ano_letivo.dias_nao_letivos.add(d_nao_letivo)
 
-    # 4. Atualizar Cache/JSON de Controles
-    print("Atualizando configurações de controle e cache de dias letivos...")
-    ano_letivo.atualizar_controles_json()
+        # 4. Atualizar Cache/JSON de Controles (executado ao sair do lote)
+        print("Atualizando configurações de controle e cache de dias letivos...")
 
     print(f"\nImportação do Ano Letivo {ano_val} finalizada com sucesso!")
 
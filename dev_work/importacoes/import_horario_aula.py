@@ -8,6 +8,7 @@ from paths import DATA_DIR, setup_django
 setup_django()
 
 from apps.core.models import AnoLetivo, HorarioAula
+from apps.core.services.grade_horaria_service import GradeHorariaService
 
 def import_horario_aula(json_path, ano_referencia=2026):
     """
@@ -31,31 +32,33 @@ def import_horario_aula(json_path, ano_referencia=2026):
     contador_criados = 0
     contador_atualizados = 0
 
-    for item in data:
-        numero = item.get('numero')
-        hora_inicio_str = item.get('hora_inicio')
-        hora_fim_str = item.get('hora_fim')
-        dias_semana = item.get('dias', [])
-
-        # Converte strings para objetos time
-        h_inicio = time.fromisoformat(hora_inicio_str)
-        h_fim = time.fromisoformat(hora_fim_str)
-
-        for dia in dias_semana:
-            obj, created = HorarioAula.objects.update_or_create(
-                ano_letivo=ano_letivo,
-                dia_semana=dia,
-                hora_inicio=h_inicio,
-                defaults={
-                    'numero': numero,
-                    'hora_fim': h_fim
-                }
-            )
+    # Reconstrói os caches de grade uma única vez, ao final da importação
+    with GradeHorariaService.lote():
+        for item in data:
+            numero = item.get('numero')
+            hora_inicio_str = item.get('hora_inicio')
+            hora_fim_str = item.get('hora_fim')
+            dias_semana = item.get('dias', [])
+
+            # Converte strings para objetos time
+            h_inicio = time.fromisoformat(hora_inicio_str)
+            h_fim = time.fromisoformat(hora_fim_str)
+
+            for dia in dias_semana:
+                obj, created = HorarioAula.objects.update_or_create(
+                    ano_letivo=ano_letivo,
+                    dia_semana=dia,
+                    hora_inicio=h_inicio,
+                    defaults={
+                        'numero': numero,
+                        'hora_fim': h_fim
+                    }
+                )
             
-            if created:
-                contador_criados += 1
-            else:
-                contador_atualizados += 1
+                if created:
+                    contador_criados += 1
+                else:
+                    contador_atualizados += 1
 
     print(f"Concluído!")
     print(f"- Registros criados: {contador_criados}")